@@ -5,13 +5,33 @@ For internal admin/ops team.
 Returns internal scores, fraud flags, and review queues.
 NEVER exposed to businesses or public APIs.
 """
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from datetime import datetime
+from typing import List, Optional
+from ..core.database import get_repository
+from ..core.job_queue import job_queue
+from ..models.audit import EventType
 from ..models.verification import InternalVerificationScores
 from ..models.dog import Dog
 from ..services.dog_service import get_dog
-from ..services.verification_engine import VerificationEngine
-from ..services.record_service import get_dog_records
+from ..services.public_status_cache import public_status_cache, public_status_flight
+from ..services.audit_writer import audit_writer
+from ..services.audit_query_service import query_audit_events, get_rollups
+from ..services.review_queue_service import review_queue
+from ..services.near_duplicate_index import near_duplicate_index
+from ..services.photo_hash_index import photo_hash_index
+from ..services.batch_scoring import submit_rescore_all
+from ..services.rescore_scheduler import rescore_scheduler
+from ..services.expiration_scheduler import expiration_scheduler
+from ..services.extraction_cache import extraction_cache
+from ..services.record_service import get_evidence_summary
+from ..services.rule_engine import RuleError, rule_engine
+from ..services.fraud_graph import fraud_graph, dog_node, handler_node, submit_rebuild
+from ..services.document_hash_index import (
+    get_hash_stats,
+    list_shared_hashes,
+    submit_backfill
+)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -27,15 +47,15 @@ async def get_internal_scores(dog_id: str):
     - Fraud flags
     - Mismatch flags
     - Review requirements
+
+    Scores are stored and kept current by the rescore scheduler; they may
+    lag a record change by the debounce window.
     """
     dog = get_dog(dog_id)
     if not dog:
         raise HTTPException(status_code=404, detail="Dog not found")
     
-    records = get_dog_records(dog_id)
-    
-    # Compute internal scores
-    internal_scores = VerificationEngine.compute_internal_scores(dog, records)
+    internal_scores = rescore_scheduler.get_scores(dog_id)
     
     return {
         "dog_id": dog_id,
@@ -44,29 +64,289 @@ async def get_internal_scores(dog_id: str):
     }
 
 
+@router.get("/dogs/{dog_id}/verification-history")
+async def get_verification_history(dog_id: str):
+    """
+    A dog's verification level changes, oldest first.
+    ADMIN ONLY.
+    """
+    if not get_dog(dog_id):
+        raise HTTPException(status_code=404, detail="Dog not found")
+    return {
+        "dog_id": dog_id,
+        "history": get_repository().list_verification_history(dog_id)
+    }
+
+
+@router.get("/dogs/{dog_id}/rule-trace")
+async def get_rule_trace(dog_id: str):
+    """
+    Evaluate every verification rule for a dog: the result of each decision,
+    the rule that decided it and whether each rule matched.
+    ADMIN ONLY.
+    """
+    dog = get_dog(dog_id)
+    if not dog:
+        raise HTTPException(status_code=404, detail="Dog not found")
+    evidence = get_evidence_summary(dog_id)
+    return {
+        "dog_id": dog_id,
+        "service_role": dog.service_role.value,
+        "jurisdiction": dog.jurisdiction,
+        "rules_version": rule_engine.rules().version,
+        "decisions": rule_engine.trace(dog, evidence.mask, rescore_scheduler.get_scores(dog_id))
+    }
+
+
+@router.get("/rules")
+async def get_rules():
+    """
+    Active verification rule set: version, reload status and per-rule hit counts.
+    ADMIN ONLY.
+    """
+    return rule_engine.stats()
+
+
+@router.post("/rules/reload", status_code=202)
+async def reload_rules():
+    """
+    Re-read the verification rule file now and rescore every dog against it
+    (background job). An invalid file is rejected and the current rules stay
+    active. Edits are also picked up automatically within
+    RULES_RELOAD_CHECK_SECONDS, but existing levels only change on rescore.
+    ADMIN ONLY.
+    """
+    try:
+        rules = rule_engine.reload()
+    except (RuleError, OSError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rule set: {e}")
+    job = submit_rescore_all()
+    return {
+        "rules_version": rules.version,
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}"
+    }
+
+
+@router.post("/rescore", status_code=202)
+async def rescore_all_dogs():
+    """
+    Rescore every dog in vectorized batches and apply changed verification
+    levels (background job). Run after threshold or breed table changes.
+    ADMIN ONLY.
+    """
+    job = submit_rescore_all()
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+
 @router.get("/review-queue")
-async def get_review_queue():
+async def get_review_queue(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
     """
     Get list of dogs requiring human review.
     Based on internal flags and scores.
+    
+    Ordered by severity: fraud flags first, then lowest service
+    eligibility score, then longest waiting.
     """
-    # In production, query database for dogs with requires_human_review=True
-    # For now, return empty list
+    try:
+        entries, next_cursor = review_queue.page(cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     return {
-        "queue": [],
-        "count": 0
+        "queue": [entry.to_dict() for entry in entries],
+        "count": len(review_queue),
+        "next_cursor": next_cursor
     }
 
 
 @router.get("/fraud-flags")
-async def get_fraud_flags():
+async def get_fraud_flags(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
     """
     Get list of dogs with fraud flags.
     ADMIN ONLY.
     """
-    # In production, query database for dogs with fraud_flags
+    try:
+        flagged, next_cursor = review_queue.fraud_flag_page(cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "flagged_dogs": flagged,
+        "count": review_queue.fraud_flag_count(),
+        "next_cursor": next_cursor
+    }
+
+
+@router.get("/fraud-clusters")
+async def get_fraud_clusters(
+    limit: int = Query(20, ge=1, le=200),
+    min_handlers: int = Query(1, ge=1)
+):
+    """
+    Largest clusters of dogs and handlers linked by shared microchips,
+    documents or photos (possible fraud rings).
+    ADMIN ONLY.
+    """
+    return {
+        "clusters": fraud_graph.largest_clusters(limit, min_handlers),
+        "graph": fraud_graph.stats()
+    }
+
+
+@router.get("/fraud-clusters/dogs/{dog_id}")
+async def get_dog_fraud_cluster(dog_id: str):
+    """
+    The cluster a dog belongs to.
+    ADMIN ONLY.
+    """
+    cluster = fraud_graph.cluster_of(dog_node(dog_id))
+    if cluster is None:
+        raise HTTPException(status_code=404, detail="Dog not in fraud graph")
+    return cluster
+
+
+@router.get("/fraud-clusters/handlers/{handler_id}")
+async def get_handler_fraud_cluster(handler_id: str):
+    """
+    The cluster a handler belongs to.
+    ADMIN ONLY.
+    """
+    cluster = fraud_graph.cluster_of(handler_node(handler_id))
+    if cluster is None:
+        raise HTTPException(status_code=404, detail="Handler not in fraud graph")
+    return cluster
+
+
+@router.post("/fraud-clusters/rebuild", status_code=202)
+async def rebuild_fraud_clusters():
+    """
+    Recompute the fraud graph from current data (background job).
+    ADMIN ONLY.
+    """
+    job = submit_rebuild()
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+
+@router.get("/document-hashes/shared")
+async def get_shared_document_hashes(
+    min_dogs: int = Query(2, ge=1),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    File hashes uploaded for at least `min_dogs` dogs, with distinct dog and handler counts.
+    ADMIN ONLY.
+    """
+    hashes, next_cursor = list_shared_hashes(min_dogs, cursor, limit)
+    return {"hashes": hashes, "next_cursor": next_cursor}
+
+
+@router.get("/document-hashes/{file_hash}")
+async def get_document_hash(file_hash: str):
+    """
+    Dogs and handlers that have uploaded a file.
+    ADMIN ONLY.
+    """
+    stats = get_hash_stats(file_hash)
+    if not stats["owners"]:
+        raise HTTPException(status_code=404, detail="File hash not indexed")
+    return stats
+
+
+@router.post("/document-hashes/backfill", status_code=202)
+async def backfill_document_hashes():
+    """
+    Index all stored documents by file hash (background job).
+    ADMIN ONLY.
+    """
+    job = submit_backfill()
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+
+@router.get("/audit-events")
+async def get_audit_events(
+    dog_id: Optional[str] = None,
+    organization_id: Optional[str] = None,
+    event_type: Optional[EventType] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Query audit events, newest first.
+    ADMIN ONLY.
+    
+    Pass `next_cursor` from a response as `cursor` to get the next page.
+    """
+    try:
+        events, next_cursor = query_audit_events(
+            dog_id=dog_id,
+            organization_id=organization_id,
+            event_type=event_type,
+            since=since,
+            until=until,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     return {
-        "flagged_dogs": [],
-        "count": 0
+        "events": events,
+        "count": len(events),
+        "next_cursor": next_cursor
     }
 
+
+@router.get("/audit-rollups/{metric}")
+async def get_audit_rollups(
+    metric: str,
+    granularity: str = "hour",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    key: Optional[str] = None
+):
+    """
+    Pre-aggregated audit counters (scans_per_org, denials_per_dog).
+    ADMIN ONLY.
+    """
+    try:
+        buckets = get_rollups(metric, granularity, since, until, key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "metric": metric,
+        "granularity": granularity,
+        "buckets": buckets
+    }
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Operational counters for in-process caches and workers.
+    ADMIN ONLY.
+    """
+    return {
+        "public_status_cache": public_status_cache.stats(),
+        "public_status_coalescing": public_status_flight.stats(),
+        "audit_writer": audit_writer.stats(),
+        "jobs": job_queue.stats(),
+        "rescore_scheduler": rescore_scheduler.stats(),
+        "expiration_scheduler": expiration_scheduler.stats(),
+        "rule_engine": rule_engine.stats(),
+        "extraction_cache": extraction_cache.stats(),
+        "near_duplicate_index": near_duplicate_index.stats(),
+        "photo_hash_index": photo_hash_index.stats(),
+        "fraud_graph": fraud_graph.stats()
+    }
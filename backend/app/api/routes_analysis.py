@@ -1,6 +1,17 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from ..services.analysis_service import analyze_record
+import json
+from typing import AsyncIterator, List
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from ..core.config import DOCUMENT_BATCH_MAX_ITEMS, JOB_LONG_POLL_MAX_SECONDS
+from ..core.database import get_repository
+from ..core.job_queue import Job, JobQueueFull, job_queue
+from ..services.analysis_service import (
+    process_raw_documents,
+    submit_record_analysis,
+    submit_document_processing
+)
+from ..services.record_service import get_record
 from ..services.dog_service import get_dog
 
 router = APIRouter(tags=["analysis"])
@@ -9,21 +20,111 @@ router = APIRouter(tags=["analysis"])
 class AnalyzeRequest(BaseModel):
     dog_id: str
     record_id: str
+    priority: int = Field(0, ge=0, le=9)  # higher runs first
 
 
-@router.post("/analyze-record")
+class ProcessDocumentRequest(BaseModel):
+    priority: int = Field(0, ge=0, le=9)
+
+
+class ProcessDocumentsRequest(BaseModel):
+    document_ids: List[str] = Field(..., min_length=1, max_length=DOCUMENT_BATCH_MAX_ITEMS)
+
+
+def _accepted(job: Job) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}"
+    }
+
+
+@router.post("/analyze-record", status_code=202)
 async def analyze_record_endpoint(request: AnalyzeRequest):
     """
-    Analyze a record using fake AI verification engine.
-    
+    Queue analysis of a record using fake AI verification engine.
+    Returns a job id; poll GET /jobs/{job_id} for the result.
+
     Rules:
     - Filenames containing "fake" or "invalid" will be denied
     - All other records will be accepted
     """
-    result = analyze_record(request.dog_id, request.record_id)
+    dog = get_dog(request.dog_id)
+    if not dog:
+        raise HTTPException(status_code=404, detail="Dog not found")
+    if not get_record(request.dog_id, request.record_id):
+        raise HTTPException(status_code=404, detail="Record not found")
+
+    try:
+        job = submit_record_analysis(
+            request.dog_id, request.record_id, dog.handler_id, request.priority
+        )
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    return _accepted(job)
+
+
+@router.post("/documents/{document_id}/process", status_code=202)
+async def process_document_endpoint(
+    document_id: str,
+    request: ProcessDocumentRequest = ProcessDocumentRequest()
+):
+    """
+    Queue OCR, classification, extraction and fraud checks for an uploaded document.
+    Returns a job id; poll GET /jobs/{job_id} for the result.
+    """
+    raw_doc = get_repository().get_raw_document(document_id)
+    if not raw_doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    try:
+        job = submit_document_processing(document_id, raw_doc.handler_id, request.priority)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    return _accepted(job)
+
+
+@router.post("/documents/process-batch")
+async def process_documents_endpoint(request: ProcessDocumentsRequest):
+    """
+    Classify, extract and fraud-check a batch of uploaded documents (a dog's
+    full history, a clinic push) in one call.
     
-    if "error" in result:
-        raise HTTPException(status_code=404, detail=result["error"])
+    Streams one NDJSON line per document as it finishes (not in input order):
+    - {"index": 0, "document_id": "...", "ok": true, "deduplicated": false, "result": {...}}
+    - {"index": 1, "document_id": "...", "ok": false, "error": "Document not found"}
     
-    return result
+    Identical files (same hash) in the batch are analyzed once
+    ("deduplicated": true on the others), and files analyzed before come
+    from the extraction cache ("cached": true). Per-document errors never
+    fail the request.
+    """
+    return StreamingResponse(
+        _process_documents_lines(request.document_ids),
+        media_type="application/x-ndjson"
+    )
+
+
+async def _process_documents_lines(document_ids: List[str]) -> AsyncIterator[bytes]:
+    async for line in process_raw_documents(document_ids):
+        yield (json.dumps(line, default=str) + "\n").encode()
 
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=JOB_LONG_POLL_MAX_SECONDS)
+):
+    """
+    Job status and, once finished, its result or error.
+    With `wait`, long-polls up to that many seconds for the job to finish.
+    """
+    if wait:
+        status = await job_queue.wait_status(job_id, wait)
+    else:
+        status = job_queue.get_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
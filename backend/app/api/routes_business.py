@@ -4,14 +4,27 @@ Business Portal API Routes
 For businesses (airlines, hotels, restaurants, rideshares) to verify dogs.
 CRITICAL: Only returns ADA-safe public information.
 """
-from fastapi import APIRouter, HTTPException, Header
-from typing import Optional
+import json
+from fastapi import APIRouter, HTTPException, Header, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, Iterator, List, Optional
+from ..core.config import BATCH_VERIFY_MAX_ITEMS, BATCH_VERIFY_CHUNK_SIZE
+from ..core.database import get_repository
+from ..models.dog import Dog
+from ..models.handler import Handler
 from ..models.verification import PublicStatusSummary
 from ..services.business_verification_service import BusinessVerificationService
+from ..services.public_status_cache import (
+    public_status_cache,
+    public_status_flight,
+    CachedPublicStatus
+)
 from ..services.dog_service import get_dog
 from ..services.handler_service import get_handler
-from ..services.record_service import get_dog_records
-from ..services.audit_service import log_audit_event
+from ..services.record_service import get_evidence_summary, get_verification_records
+from ..services.record_index import record_index
+from ..services.audit_service import log_audit_event, log_audit_events, build_audit_event
 from ..models.audit import EventType
 
 router = APIRouter(prefix="/business", tags=["business"])
@@ -40,6 +53,30 @@ async def verify_dog(
     - Mismatch flags
     - Internal review status
     """
+    cached = public_status_cache.get(dog_id)
+    if cached is None:
+        # Scanners hitting the same dog at once share one computation
+        cached = await public_status_flight.do(
+            dog_id, lambda: _load_public_status(dog_id)
+        )
+    
+    # Log audit event
+    log_audit_event(
+        event_type=EventType.QR_CODE_SCANNED,
+        actor_id=organization_id or "unknown",
+        actor_type="business",
+        dog_id=dog_id,
+        organization_id=organization_id,
+        metadata={"verification_level": cached.summary.verification_level.value}
+    )
+    
+    return Response(content=cached.body, media_type="application/json")
+
+
+def _load_public_status(dog_id: str) -> CachedPublicStatus:
+    """Compute a dog's public status and cache it (runs in a worker thread)."""
+    generation = public_status_cache.generation(dog_id)
+    
     # Get dog
     dog = get_dog(dog_id)
     if not dog:
@@ -50,24 +87,27 @@ async def verify_dog(
     if not handler:
         raise HTTPException(status_code=404, detail="Handler not found")
     
+    return _build_public_status(dog, handler, generation)
+
+
+def _build_public_status(
+    dog: Dog,
+    handler: Handler,
+    generation: int
+) -> CachedPublicStatus:
+    """Compute and cache the public status for an already-loaded dog and handler."""
+    dog_id = dog.id
+    
     # Get records
-    records = get_dog_records(dog_id)
+    records = get_verification_records(dog_id)
+    evidence = get_evidence_summary(dog_id)
     
     # Get public status (ADA-safe)
     public_status = BusinessVerificationService.get_public_status(
-        dog, handler, records
-    )
-    
-    # Log audit event
-    log_audit_event(
-        event_type=EventType.QR_CODE_SCANNED,
-        actor_id=organization_id or "unknown",
-        actor_type="business",
-        dog_id=dog_id,
-        metadata={"verification_level": public_status.verification_level.value}
+        dog, handler, records, evidence
     )
     
-    return public_status
+    return public_status_cache.put(public_status, generation=generation)
 
 
 @router.post("/verify-scan")
@@ -100,3 +140,121 @@ async def verify_nfc(
     
     return await verify_dog(dog_id, organization_id)
 
+
+
+class BatchVerifyRequest(BaseModel):
+    """Manifest/roster to pre-verify: dog IDs, QR codes or NFC tokens."""
+    tokens: List[str] = Field(..., min_length=1, max_length=BATCH_VERIFY_MAX_ITEMS)
+
+
+@router.post("/verify/batch")
+async def verify_batch(
+    request: BatchVerifyRequest,
+    organization_id: Optional[str] = Header(None, alias="X-Organization-ID")
+):
+    """
+    Verify a whole flight manifest or shift roster in one call.
+    
+    Streams one NDJSON line per token, in input order, as each chunk
+    completes:
+    - {"index": 0, "token": "...", "ok": true, "result": {PublicStatusSummary}}
+    - {"index": 1, "token": "...", "ok": false, "error": "Dog not found"}
+    
+    Per-item errors never fail the request. Same ADA-safe fields as
+    GET /business/verify/{dog_id}.
+    """
+    return StreamingResponse(
+        _verify_batch_lines(request.tokens, organization_id),
+        media_type="application/x-ndjson"
+    )
+
+
+def _verify_batch_lines(
+    tokens: List[str],
+    organization_id: Optional[str]
+) -> Iterator[bytes]:
+    """
+    Resolve, bulk-load and verify tokens chunk by chunk.
+    Runs in Starlette's threadpool; audit events are logged as one batch.
+    """
+    events = []
+    try:
+        for start in range(0, len(tokens), BATCH_VERIFY_CHUNK_SIZE):
+            chunk = tokens[start:start + BATCH_VERIFY_CHUNK_SIZE]
+            resolved = [BusinessVerificationService.resolve_token(t) for t in chunk]
+            statuses, errors = _load_public_statuses([dog_id for dog_id, _ in resolved])
+
+            for index, token, (dog_id, source) in zip(
+                range(start, start + len(chunk)), chunk, resolved
+            ):
+                cached = statuses.get(dog_id)
+                if cached is None:
+                    yield (json.dumps({
+                        "index": index,
+                        "token": token,
+                        "ok": False,
+                        "error": errors.get(dog_id, "Verification failed")
+                    }) + "\n").encode()
+                    continue
+
+                yield b"".join([
+                    json.dumps({"index": index, "token": token, "ok": True})[:-1].encode(),
+                    b', "result": ',
+                    cached.body,
+                    b"}\n"
+                ])
+                events.append(build_audit_event(
+                    event_type=(
+                        EventType.NFC_TAPPED if source == "nfc"
+                        else EventType.QR_CODE_SCANNED
+                    ),
+                    actor_id=organization_id or "unknown",
+                    actor_type="business",
+                    dog_id=dog_id,
+                    organization_id=organization_id,
+                    metadata={
+                        "verification_level": cached.summary.verification_level.value,
+                        "batch": True
+                    }
+                ))
+    finally:
+        # Log whatever was verified, even if the client disconnected mid-stream
+        log_audit_events(events)
+
+
+def _load_public_statuses(
+    dog_ids: List[str]
+) -> tuple[Dict[str, CachedPublicStatus], Dict[str, str]]:
+    """Cached or freshly computed statuses for many dogs, plus per-dog errors."""
+    statuses: Dict[str, CachedPublicStatus] = {}
+    errors: Dict[str, str] = {}
+    to_load = []
+    for dog_id in dict.fromkeys(dog_ids):
+        cached = public_status_cache.get(dog_id)
+        if cached is None:
+            to_load.append(dog_id)
+        else:
+            statuses[dog_id] = cached
+    if not to_load:
+        return statuses, errors
+
+    generations = {dog_id: public_status_cache.generation(dog_id) for dog_id in to_load}
+    repo = get_repository()
+    dogs = repo.get_dogs(to_load)
+    handlers = repo.get_handlers([dog.handler_id for dog in dogs.values()])
+    record_index.preload(list(dogs))
+
+    for dog_id in to_load:
+        dog = dogs.get(dog_id)
+        if dog is None:
+            errors[dog_id] = "Dog not found"
+            continue
+        handler = handlers.get(dog.handler_id)
+        if handler is None:
+            errors[dog_id] = "Handler not found"
+            continue
+        try:
+            statuses[dog_id] = _build_public_status(dog, handler, generations[dog_id])
+        except Exception:
+            errors[dog_id] = "Verification failed"
+    return statuses, errors
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from ..services.dog_service import get_dog, update_dog_verification
+from ..services.record_service import get_dog_records
 
 router = APIRouter(tags=["dogs"])
 
@@ -19,9 +20,9 @@ async def get_dog_status(dog_id: str):
             "id": dog.id,
             "name": dog.name,
             "breed": dog.breed,
-            "service_type": dog.service_type
+            "service_role": dog.service_role
         },
         "verified": dog.verified,
-        "records_count": len(dog.records)
+        "records_count": len(get_dog_records(dog_id))
     }
 
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Header
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
+from ..core.config import UPLOAD_MAX_BYTES
 from ..models.record import Record
+from ..services.blob_store import BlobTooLarge
+from ..services.document_service import store_upload
 from ..services.record_service import create_record, get_dog_records
 from ..services.dog_service import get_dog
 
+# Room for multipart boundaries and the other form fields
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
 router = APIRouter(tags=["records"])
 
 
@@ -11,19 +18,32 @@ router = APIRouter(tags=["records"])
 async def upload_record(
     dog_id: str = Form(...),
     category: str = Form(...),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    content_length: Optional[int] = Header(None)
 ):
     """
     Upload a record for a dog.
     
-    Note: File is not actually saved to disk - this is a fake upload.
+    The file is streamed into the content-addressed blob store (hashed and
+    size-checked chunk by chunk) and recorded as a RawDocument.
+    Files over the upload limit are rejected with 413.
     """
+    # Reject obviously oversized bodies before reading them
+    if content_length and content_length > UPLOAD_MAX_BYTES + _MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {UPLOAD_MAX_BYTES} byte limit")
+    
     # Validate dog exists
     dog = get_dog(dog_id)
     if not dog:
         raise HTTPException(status_code=404, detail=f"Dog with id '{dog_id}' not found")
     
-    # Create record (fake upload - we don't save the file)
+    try:
+        document = await run_in_threadpool(
+            store_upload, dog, file.filename or "unknown", file.content_type, file.file
+        )
+    except BlobTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
     record = create_record(
         dog_id=dog_id,
         filename=file.filename or "unknown",
@@ -41,6 +61,12 @@ async def upload_record(
             "filename": record.filename,
             "category": record.category,
             "status": record.status
+        },
+        "document": {
+            "id": document.id,
+            "file_hash": document.file_hash,
+            "file_size": document.file_size,
+            "mime_type": document.mime_type
         }
     }
 
@@ -59,7 +85,7 @@ async def list_dog_records(dog_id: str):
             "id": dog.id,
             "name": dog.name,
             "breed": dog.breed,
-            "service_type": dog.service_type,
+            "service_role": dog.service_role,
             "verified": dog.verified
         },
         "records": [
@@ -69,6 +95,8 @@ async def list_dog_records(dog_id: str):
                 "category": r.category,
                 "status": r.status,
                 "expires_at": r.expires_at.isoformat() if r.expires_at else None,
+                "expiring_soon": r.expiring_soon,
+                "is_expired": r.is_expired,
                 "analysis_status": r.analysis_status,
                 "risk_score": r.risk_score,
                 "issues": r.issues
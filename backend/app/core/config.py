@@ -1,3 +1,4 @@
+import os
 from typing import List
 
 # CORS settings
@@ -11,3 +12,96 @@ CORS_ORIGINS: List[str] = [
 API_PREFIX: str = "/api"
 API_VERSION: str = "v1"
 
+# Storage settings
+STORAGE_BACKEND: str = os.getenv("DOG_PASSPORT_STORAGE", "memory")  # "memory" | "sqlite"
+SQLITE_PATH: str = os.getenv("DOG_PASSPORT_SQLITE_PATH", "dog_passport.db")
+SQLITE_POOL_SIZE: int = int(os.getenv("DOG_PASSPORT_SQLITE_POOL_SIZE", "8"))
+SQLITE_BUSY_TIMEOUT_SECONDS: float = 5.0
+
+# Record index: how often to check the repository for record writes by other workers
+RECORD_INDEX_SYNC_SECONDS: float = float(os.getenv("DOG_PASSPORT_RECORD_INDEX_SYNC_SECONDS", "0.2"))
+
+# Review queue: how often to check the repository for dog, score and document writes by other workers
+REVIEW_QUEUE_SYNC_SECONDS: float = float(os.getenv("DOG_PASSPORT_REVIEW_QUEUE_SYNC_SECONDS", "1.0"))
+
+# Business verification cache
+PUBLIC_STATUS_CACHE_SIZE: int = int(os.getenv("DOG_PASSPORT_PUBLIC_STATUS_CACHE_SIZE", "10000"))
+PUBLIC_STATUS_CACHE_TTL_SECONDS: float = 300.0
+# How often to check the repository for record, dog and handler writes by other workers
+PUBLIC_STATUS_CACHE_SYNC_SECONDS: float = float(
+    os.getenv("DOG_PASSPORT_PUBLIC_STATUS_CACHE_SYNC_SECONDS", "0.2")
+)
+
+# Audit log writer
+AUDIT_LOG_DIR: str = os.getenv("DOG_PASSPORT_AUDIT_LOG_DIR", "audit_log")
+AUDIT_QUEUE_SIZE: int = 10000
+AUDIT_BATCH_SIZE: int = 500
+AUDIT_FLUSH_INTERVAL_SECONDS: float = 0.5
+AUDIT_SEGMENT_MAX_BYTES: int = 64 * 1024 * 1024
+AUDIT_FSYNC_POLICY: str = os.getenv("DOG_PASSPORT_AUDIT_FSYNC", "batch")  # "batch" | "interval" | "never"
+AUDIT_FSYNC_INTERVAL_SECONDS: float = 1.0
+AUDIT_OVERFLOW_POLICY: str = "drop"  # "drop" | "sync"
+
+# Batch verification
+BATCH_VERIFY_MAX_ITEMS: int = 5000
+BATCH_VERIFY_CHUNK_SIZE: int = 200
+
+# Batch document processing
+DOCUMENT_BATCH_MAX_ITEMS: int = 5000
+DOCUMENT_BATCH_CONCURRENCY: int = int(os.getenv("DOG_PASSPORT_DOCUMENT_BATCH_CONCURRENCY", "8"))
+
+# Extraction cache (document analysis results by file hash)
+EXTRACTION_CACHE_PATH: str = os.getenv("DOG_PASSPORT_EXTRACTION_CACHE_PATH", "extraction_cache.db")
+EXTRACTION_CACHE_MAX_BYTES: int = int(
+    os.getenv("DOG_PASSPORT_EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024))
+)
+
+# Verification rules (hot-reloaded when the file changes)
+VERIFICATION_RULES_PATH: str = os.getenv(
+    "DOG_PASSPORT_RULES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "rules", "verification_rules.json")
+)
+RULES_RELOAD_CHECK_SECONDS: float = 5.0
+
+# Record expiration
+EXPIRING_SOON_DAYS: int = 30  # vaccinations expiring within this many days are "expiring_soon"
+
+# Batch rescoring (whole population)
+BATCH_SCORING_CHUNK_SIZE: int = 10000
+
+# Incremental rescoring on record changes
+RESCORE_DEBOUNCE_SECONDS: float = 2.0  # quiet period before a dirty dog is rescored
+RESCORE_MAX_DELAY_SECONDS: float = 30.0  # rescored by then even if still changing
+RESCORE_BATCH_SIZE: int = 1000
+RESCORE_MAX_ATTEMPTS: int = 5  # a dog whose rescore keeps failing is dropped after this
+RESCORE_RETRY_BASE_SECONDS: float = 2.0
+RESCORE_RETRY_MAX_SECONDS: float = 60.0
+
+# Background jobs (document analysis)
+JOB_WORKERS: int = int(os.getenv("DOG_PASSPORT_JOB_WORKERS", "4"))
+JOB_EXECUTOR: str = os.getenv("DOG_PASSPORT_JOB_EXECUTOR", "thread")  # "thread" | "process"
+JOB_MAX_QUEUED: int = 10000
+JOB_TENANT_MAX_RUNNING: int = 2
+JOB_MAX_ATTEMPTS: int = 3
+JOB_RETRY_BASE_SECONDS: float = 1.0
+JOB_RETRY_MAX_SECONDS: float = 60.0
+JOB_RETAINED: int = 10000
+JOB_LONG_POLL_MAX_SECONDS: float = 30.0
+
+# Uploads and blob storage
+BLOB_STORE_DIR: str = os.getenv("DOG_PASSPORT_BLOB_DIR", "blobs")
+UPLOAD_MAX_BYTES: int = int(os.getenv("DOG_PASSPORT_UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+
+# Near-duplicate document detection (MinHash/LSH)
+MINHASH_NUM_PERM: int = 128
+MINHASH_BANDS: int = 16  # 8 rows per band: candidates from ~0.7 similarity
+MINHASH_SHINGLE_SIZE: int = 5
+NEAR_DUPLICATE_THRESHOLD: float = 0.8
+
+# Photo reuse detection (perceptual hashes)
+PHOTO_ROOT: str = os.getenv("DOG_PASSPORT_PHOTO_ROOT", "../public")  # for relative photo_urls
+PHOTO_FETCH_REMOTE: bool = os.getenv("DOG_PASSPORT_PHOTO_FETCH_REMOTE", "false").lower() == "true"
+PHOTO_MAX_BYTES: int = 10 * 1024 * 1024
+PHOTO_FETCH_TIMEOUT_SECONDS: float = 10.0
+PHOTO_HASH_MAX_DISTANCE: int = 6  # bits out of 64
@@ -1,29 +1,84 @@
 """
-In-memory fake database for development.
-This can be replaced with a real database later.
+Database access for services.
+
+The storage backend is selected by config (STORAGE_BACKEND):
+- "memory": in-process dicts, seeded with sample data (development)
+- "sqlite": WAL-mode SQLite file shared by all workers
 """
+from datetime import datetime
+from typing import Optional
 from ..models.dog import Dog
-from ..models.record import Record
-
-# Initialize with sample data
-FAKE_DB = {
-    "dogs": {
-        "buddy": Dog(
-            id="buddy",
-            name="Buddy",
-            breed="Golden Retriever",
-            service_type="PTSD",
-            records=[],
-            verified=False
-        ),
-        "luna": Dog(
-            id="luna",
-            name="Luna",
-            breed="Labrador Retriever",
-            service_type="mobility",
-            records=[],
-            verified=False
-        ),
-    }
-}
+from ..models.handler import Handler
+from ..models.verification import ServiceRole
+from .config import (
+    STORAGE_BACKEND,
+    SQLITE_PATH,
+    SQLITE_POOL_SIZE,
+    SQLITE_BUSY_TIMEOUT_SECONDS
+)
+from .repository import Repository, InMemoryRepository, SQLiteRepository
+
+_repository: Optional[Repository] = None
+
+
+def _seed(repo: Repository) -> None:
+    """Initialize with sample data (only if the store is empty)."""
+    if repo.get_handler("user-1") is not None:
+        return
+
+    now = datetime.now()
+    repo.save_handler(Handler(
+        id="user-1",
+        email="demo@dogpassport.app",
+        name="Demo Handler",
+        created_at=now,
+        updated_at=now,
+        dog_ids=["buddy", "luna"]
+    ))
+    repo.save_dog(Dog(
+        id="buddy",
+        handler_id="user-1",
+        name="Buddy",
+        breed="Golden Retriever",
+        service_role=ServiceRole.PSYCHIATRIC,
+        created_at=now,
+        updated_at=now
+    ))
+    repo.save_dog(Dog(
+        id="luna",
+        handler_id="user-1",
+        name="Luna",
+        breed="Labrador Retriever",
+        service_role=ServiceRole.MOBILITY,
+        created_at=now,
+        updated_at=now
+    ))
+
+
+def create_repository(backend: str = STORAGE_BACKEND) -> Repository:
+    """Build a repository for the given backend name."""
+    if backend == "sqlite":
+        return SQLiteRepository(
+            SQLITE_PATH,
+            pool_size=SQLITE_POOL_SIZE,
+            busy_timeout=SQLITE_BUSY_TIMEOUT_SECONDS
+        )
+    if backend == "memory":
+        return InMemoryRepository()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def get_repository() -> Repository:
+    """Get the process-wide repository, creating and seeding it on first use."""
+    global _repository
+    if _repository is None:
+        repo = create_repository()
+        _seed(repo)
+        _repository = repo
+    return _repository
+
 
+def set_repository(repo: Repository) -> None:
+    """Replace the process-wide repository (e.g. for scripts or tests)."""
+    global _repository
+    _repository = repo
@@ -0,0 +1,479 @@
+"""
+Background job queue.
+
+Slow work (document classification, extraction, fraud checks) is taken off
+the request path: callers enqueue a job and get its id back immediately,
+then poll (or long-poll) for the result.
+
+- Priorities: higher priority jobs run first; FIFO within a priority.
+- Retries: a job that raises is retried with exponential backoff, up to
+  max_attempts. Handlers raise PermanentJobError for failures that a retry
+  cannot fix (e.g. record not found); ValueError (including pydantic
+  validation errors) and LookupError are deterministic and not retried
+  either. A kind can register an on_failure callback, run once the job has
+  failed for good.
+- Per-tenant caps: at most JOB_TENANT_MAX_RUNNING jobs per tenant run at
+  once; further jobs of that tenant wait without blocking other tenants.
+- Workers are threads. With JOB_EXECUTOR = "process", handlers send their
+  CPU-bound steps to a process pool through run_cpu().
+- Status: every transition is also saved to the repository, so with several
+  uvicorn workers sharing SQLite any worker can report a job's status.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic_core import to_jsonable_python
+
+from .config import (
+    JOB_WORKERS,
+    JOB_EXECUTOR,
+    JOB_MAX_QUEUED,
+    JOB_TENANT_MAX_RUNNING,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BASE_SECONDS,
+    JOB_RETRY_MAX_SECONDS,
+    JOB_RETAINED
+)
+from .database import get_repository
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+RETRYING = "retrying"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+_FINISHED = (SUCCEEDED, FAILED)
+
+# How often a long-poll re-reads the status of another worker's job
+_STATUS_POLL_SECONDS = 0.25
+
+# (job_id, revision, status dict) to save to the repository
+_Snapshot = Tuple[str, int, Dict[str, Any]]
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when the queue is at capacity."""
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for a failure that must not be retried."""
+
+
+class Job:
+    """A unit of background work and its outcome."""
+
+    __slots__ = (
+        "id", "kind", "args", "tenant_id", "priority", "max_attempts",
+        "status", "attempts", "result", "error",
+        "created_at", "started_at", "finished_at", "run_after",
+        "revision", "_waiters"
+    )
+
+    def __init__(
+        self,
+        kind: str,
+        args: Dict[str, Any],
+        tenant_id: str,
+        priority: int,
+        max_attempts: int
+    ):
+        self.id = f"job-{uuid.uuid4().hex[:12]}"
+        self.kind = kind
+        self.args = args
+        self.tenant_id = tenant_id
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.status = QUEUED
+        self.attempts = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.run_after = 0.0  # monotonic clock, for retry backoff
+        self.revision = 0  # bumped on every status change, orders saved snapshots
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """Priority job queue served by a pool of worker threads."""
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        executor: str = JOB_EXECUTOR,  # "thread" | "process"
+        max_queued: int = JOB_MAX_QUEUED,
+        tenant_max_running: int = JOB_TENANT_MAX_RUNNING,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_base: float = JOB_RETRY_BASE_SECONDS,
+        retry_max: float = JOB_RETRY_MAX_SECONDS,
+        retained: int = JOB_RETAINED
+    ):
+        self._workers = workers
+        self._executor = executor
+        self._max_queued = max_queued
+        self._tenant_max_running = tenant_max_running
+        self._max_attempts = max_attempts
+        self._retry_base = retry_base
+        self._retry_max = retry_max
+        self._retained = retained
+        self._handlers: Dict[str, Callable[..., Any]] = {}
+        self._failure_handlers: Dict[str, Callable[..., None]] = {}
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._ready: List[Tuple[int, int, Job]] = []  # (-priority, seq, job)
+        self._delayed: List[Tuple[float, int, Job]] = []  # (run_after, seq, job)
+        self._parked: Dict[str, List[Tuple[int, int, Job]]] = {}  # tenant at cap
+        self._running: Dict[str, int] = {}  # tenant -> running jobs
+        self._pending = 0  # queued + retrying
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+        self.submitted = 0
+        self.rejected = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self._started = 0
+        self._attempts_run = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def register(
+        self,
+        kind: str,
+        handler: Callable[..., Any],
+        on_failure: Optional[Callable[..., None]] = None
+    ) -> None:
+        """
+        Register the handler for a job kind; it is called with the job's args.
+        on_failure, if given, is called with the error and the job's args
+        once the job has failed for good.
+        """
+        self._handlers[kind] = handler
+        if on_failure is not None:
+            self._failure_handlers[kind] = on_failure
+
+    def submit(
+        self,
+        kind: str,
+        args: Dict[str, Any],
+        tenant_id: str,
+        priority: int = 0,
+        max_attempts: Optional[int] = None
+    ) -> Job:
+        """Enqueue a job. Raises JobQueueFull if the queue is at capacity."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(kind, args, tenant_id, priority, max_attempts or self._max_attempts)
+        with self._cond:
+            if self._pending >= self._max_queued:
+                self.rejected += 1
+                raise JobQueueFull(f"Job queue is full ({self._max_queued} pending)")
+            self._jobs[job.id] = job
+            self._pending += 1
+            self.submitted += 1
+            snapshot = self._snapshot(job)
+            self._push_ready(job)
+            trimmed = self._trim()
+            self._cond.notify()
+        # Saved before returning, so the id can be polled on any worker
+        self._persist(snapshot)
+        if trimmed:
+            self._forget(trimmed)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A job accepted by this process."""
+        return self._jobs.get(job_id)
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job's status, whichever worker accepted it."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return get_repository().get_job_status(job_id)
+
+    async def wait_status(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Long-poll a job's status, whichever worker accepted it."""
+        if job_id in self._jobs:
+            job = await self.wait(job_id, timeout)
+            return job.to_dict() if job is not None else None
+        deadline = time.monotonic() + timeout
+        while True:
+            status = await asyncio.to_thread(get_repository().get_job_status, job_id)
+            remaining = deadline - time.monotonic()
+            if status is None or status["status"] in _FINISHED or remaining <= 0:
+                return status
+            await asyncio.sleep(min(_STATUS_POLL_SECONDS, remaining))
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Long-poll: return the job once finished, or as-is after the timeout."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._cond:
+            if job.finished:
+                return job
+            job._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                if (loop, future) in job._waiters:
+                    job._waiters.remove((loop, future))
+        return job
+
+    @property
+    def cpu_executor(self) -> Optional[Executor]:
+        """The process pool when configured (None: the caller's default executor)."""
+        return self._process_pool
+
+    def run_cpu(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a CPU-bound, picklable function: in the process pool when
+        configured, otherwise inline on the worker thread.
+        """
+        if self._process_pool is not None:
+            return self._process_pool.submit(fn, *args).result()
+        return fn(*args)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        if self._executor == "process":
+            self._process_pool = ProcessPoolExecutor(max_workers=self._workers)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            for i in range(self._workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the workers after their current job; queued jobs are left."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    # Status persistence
+
+    def _snapshot(self, job: Job) -> _Snapshot:
+        """Record a status change (called with self._cond held)."""
+        job.revision += 1
+        return job.id, job.revision, to_jsonable_python(job.to_dict(), fallback=str)
+
+    def _persist(self, snapshot: _Snapshot) -> None:
+        try:
+            get_repository().save_job_status(*snapshot)
+        except Exception:
+            logger.exception("Failed to save status of job %s", snapshot[0])
+
+    def _forget(self, job_ids: List[str]) -> None:
+        try:
+            get_repository().delete_job_statuses(job_ids)
+        except Exception:
+            logger.exception("Failed to delete %d job statuses", len(job_ids))
+
+    # Scheduling (all called with self._cond held)
+
+    def _push_ready(self, job: Job) -> None:
+        item = (-job.priority, next(self._seq), job)
+        if self._running.get(job.tenant_id, 0) >= self._tenant_max_running:
+            self._parked.setdefault(job.tenant_id, []).append(item)
+        else:
+            heapq.heappush(self._ready, item)
+
+    def _promote_delayed(self, now: float) -> None:
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, job = heapq.heappop(self._delayed)
+            self._push_ready(job)
+
+    def _take(self) -> Optional[Job]:
+        """Pop the most urgent job whose tenant is under its cap."""
+        while self._ready:
+            item = heapq.heappop(self._ready)
+            job = item[2]
+            if self._running.get(job.tenant_id, 0) >= self._tenant_max_running:
+                self._parked.setdefault(job.tenant_id, []).append(item)
+                continue
+            self._running[job.tenant_id] = self._running.get(job.tenant_id, 0) + 1
+            self._pending -= 1
+            return job
+        return None
+
+    def _release(self, tenant_id: str) -> None:
+        """A tenant's job finished: free its slot and unpark its waiting jobs."""
+        remaining = self._running[tenant_id] - 1
+        if remaining:
+            self._running[tenant_id] = remaining
+        else:
+            del self._running[tenant_id]
+        for item in self._parked.pop(tenant_id, []):
+            heapq.heappush(self._ready, item)
+        self._cond.notify_all()
+
+    def _trim(self) -> List[str]:
+        """Forget the oldest finished jobs beyond the retention limit. Returns their ids."""
+        trimmed = []
+        while len(self._jobs) > self._retained:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.finished:
+                break
+            self._jobs.popitem(last=False)
+            trimmed.append(oldest.id)
+        return trimmed
+
+    # Workers
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        return
+                    now = time.monotonic()
+                    self._promote_delayed(now)
+                    job = self._take()
+                    if job is not None:
+                        break
+                    timeout = self._delayed[0][0] - now if self._delayed else None
+                    self._cond.wait(timeout)
+                job.status = RUNNING
+                job.attempts += 1
+                job.started_at = datetime.now()
+                if job.attempts == 1:
+                    self._started += 1
+                    self._wait_seconds += (job.started_at - job.created_at).total_seconds()
+                snapshot = self._snapshot(job)
+            self._persist(snapshot)
+            self._execute(job)
+
+    def _execute(self, job: Job) -> None:
+        started = time.monotonic()
+        result, error, retry = None, None, False
+        try:
+            result = self._handlers[job.kind](**job.args)
+        except PermanentJobError as e:
+            error = str(e)
+        except (ValueError, LookupError) as e:
+            # Deterministic: the same args fail the same way on a retry
+            logger.exception("Job %s (%s) failed permanently", job.id, job.kind)
+            error = f"{type(e).__name__}: {e}"
+        except Exception as e:
+            logger.exception("Job %s (%s) failed on attempt %d", job.id, job.kind, job.attempts)
+            error = f"{type(e).__name__}: {e}"
+            retry = job.attempts < job.max_attempts
+
+        waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        with self._cond:
+            self._run_seconds += time.monotonic() - started
+            self._attempts_run += 1
+            self._release(job.tenant_id)
+            job.error = error
+            if retry:
+                delay = min(self._retry_base * 2 ** (job.attempts - 1), self._retry_max)
+                job.status = RETRYING
+                job.run_after = time.monotonic() + delay
+                heapq.heappush(self._delayed, (job.run_after, next(self._seq), job))
+                self._pending += 1
+                self.retried += 1
+            else:
+                job.result = result
+                job.status = FAILED if error else SUCCEEDED
+                job.finished_at = datetime.now()
+                if error:
+                    self.failed += 1
+                else:
+                    self.succeeded += 1
+                waiters, job._waiters = job._waiters, []
+            snapshot = self._snapshot(job)
+        self._persist(snapshot)
+        if job.status == FAILED and job.kind in self._failure_handlers:
+            try:
+                self._failure_handlers[job.kind](job.error, **job.args)
+            except Exception:
+                logger.exception("Failure handler for job %s (%s) failed", job.id, job.kind)
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "workers": len(self._threads),
+                "executor": self._executor,
+                "queue_depth": len(self._ready) + sum(len(p) for p in self._parked.values()),
+                "delayed": len(self._delayed),
+                "parked_by_tenant": {t: len(p) for t, p in self._parked.items()},
+                "running": sum(self._running.values()),
+                "running_by_tenant": dict(self._running),
+                "capacity": self._max_queued,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "retried": self.retried,
+                "avg_wait_seconds": (
+                    self._wait_seconds / self._started if self._started else 0.0
+                ),
+                "avg_run_seconds": (
+                    self._run_seconds / self._attempts_run if self._attempts_run else 0.0
+                ),
+            }
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+# Process-wide queue (started/stopped with the app)
+job_queue = JobQueue()
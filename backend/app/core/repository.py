@@ -0,0 +1,1439 @@
+"""
+Storage repositories.
+
+Services never touch storage directly - they go through a Repository.
+Two implementations are provided:
+- InMemoryRepository: dict-backed, for development and single-process runs
+- SQLiteRepository: WAL-mode SQLite, safe to share across uvicorn workers
+"""
+import json
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from ..models.audit import AuditEvent
+from ..models.document import NormalizedRecord, RawDocument
+from ..models.dog import Dog
+from ..models.handler import Handler
+from ..models.record import Record
+from ..models.verification import InternalVerificationScores, VerificationHistory
+
+# Records can be either the legacy Record or a NormalizedRecord
+AnyRecord = Union[Record, NormalizedRecord]
+
+_RECORD_MODELS = {
+    "legacy": Record,
+    "normalized": NormalizedRecord,
+}
+
+
+# Audit events are ordered (and paginated) by (timestamp, id)
+AuditKey = Tuple[datetime, str]
+
+# (metric, granularity, bucket start, dimension key) -> count
+RollupKey = Tuple[str, str, datetime, str]
+
+# (file_hash, dog_id, handler_id) - who has uploaded a given file
+HashOwner = Tuple[str, str, str]
+
+# Change feeds (Repository.changes_since) and the key each save bumps
+RECORD_CHANGES = "records"      # dog_id of a saved record
+DOG_CHANGES = "dogs"            # id of a saved dog
+HANDLER_CHANGES = "handlers"    # id of a saved handler
+SCORE_CHANGES = "scores"        # dog_id of saved internal scores
+DOCUMENT_CHANGES = "documents"  # dog_id of a saved raw document
+
+
+def _record_kind(record: AnyRecord) -> str:
+    return "normalized" if isinstance(record, NormalizedRecord) else "legacy"
+
+
+def _ts(value: datetime) -> str:
+    """Fixed-width timestamp text so string order matches time order."""
+    return value.isoformat(timespec="microseconds")
+
+
+class Repository(ABC):
+    """Storage interface used by all services."""
+
+    # Dogs
+    @abstractmethod
+    def get_dog(self, dog_id: str) -> Optional[Dog]: ...
+
+    @abstractmethod
+    def save_dog(self, dog: Dog) -> None: ...
+
+    @abstractmethod
+    def list_dogs(self) -> List[Dog]: ...
+
+    def get_dogs(self, dog_ids: List[str]) -> Dict[str, Dog]:
+        """Bulk lookup; missing ids are omitted."""
+        dogs = (self.get_dog(i) for i in dog_ids)
+        return {dog.id: dog for dog in dogs if dog is not None}
+
+    @abstractmethod
+    def find_dogs_by_handler(self, handler_id: str) -> List[Dog]: ...
+
+    @abstractmethod
+    def find_dogs_by_microchip(self, microchip: str) -> List[Dog]: ...
+
+    # Handlers
+    @abstractmethod
+    def get_handler(self, handler_id: str) -> Optional[Handler]: ...
+
+    @abstractmethod
+    def save_handler(self, handler: Handler) -> None: ...
+
+    def get_handlers(self, handler_ids: List[str]) -> Dict[str, Handler]:
+        """Bulk lookup; missing ids are omitted."""
+        handlers = (self.get_handler(i) for i in handler_ids)
+        return {h.id: h for h in handlers if h is not None}
+
+    # Records (legacy Record or NormalizedRecord)
+    @abstractmethod
+    def get_record(self, record_id: str) -> Optional[AnyRecord]: ...
+
+    @abstractmethod
+    def save_record(self, record: AnyRecord) -> None: ...
+
+    @abstractmethod
+    def list_records(self, dog_id: str) -> List[AnyRecord]: ...
+
+    def list_records_for_dogs(self, dog_ids: List[str]) -> Dict[str, List[AnyRecord]]:
+        """Bulk record listing, keyed by dog_id."""
+        return {dog_id: self.list_records(dog_id) for dog_id in dog_ids}
+
+    # Change feeds
+    @abstractmethod
+    def changes_since(self, feed: str, seq: Optional[int]) -> Tuple[int, List[str]]:
+        """
+        Latest sequence number of a change feed (RECORD_CHANGES, ...), and the
+        keys saved (by any process) after `seq`. With seq None, only the sequence.
+        """
+
+    # Raw documents
+    @abstractmethod
+    def get_raw_document(self, document_id: str) -> Optional[RawDocument]: ...
+
+    @abstractmethod
+    def save_raw_document(self, document: RawDocument) -> None: ...
+
+    @abstractmethod
+    def find_documents_by_hash(self, file_hash: str) -> List[RawDocument]: ...
+
+    @abstractmethod
+    def find_documents_by_dog(self, dog_id: str) -> List[RawDocument]: ...
+
+    @abstractmethod
+    def list_raw_documents(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 500
+    ) -> List[RawDocument]:
+        """Documents ordered by id, strictly after `after_id` if given."""
+
+    # Document hash index
+    @abstractmethod
+    def add_document_hash_owners(self, owners: List[HashOwner]) -> int:
+        """Index (file_hash, dog_id, handler_id) rows, ignoring known ones. Returns the number added."""
+
+    @abstractmethod
+    def get_document_hash_owners(self, file_hash: str) -> List[Tuple[str, str]]:
+        """(dog_id, handler_id) pairs that have uploaded the file."""
+
+    @abstractmethod
+    def list_shared_document_hashes(
+        self,
+        min_dogs: int = 2,
+        after: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Tuple[str, int, int]]:
+        """(file_hash, distinct dogs, distinct handlers) for hashes shared by at least min_dogs dogs, ordered by hash."""
+
+    # Near-duplicate signatures
+    @abstractmethod
+    def save_document_signature(
+        self,
+        document_id: str,
+        dog_id: str,
+        handler_id: str,
+        signature: bytes
+    ) -> None: ...
+
+    @abstractmethod
+    def list_document_signatures(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, str, str, bytes]]:
+        """(document_id, dog_id, handler_id, signature) ordered by document_id."""
+
+    # Photo hashes
+    @abstractmethod
+    def save_photo_hash(
+        self,
+        dog_id: str,
+        handler_id: str,
+        photo_url: str,
+        ahash: int,
+        dhash: int
+    ) -> None: ...
+
+    @abstractmethod
+    def delete_photo_hash(self, dog_id: str) -> None: ...
+
+    @abstractmethod
+    def list_photo_hashes(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, str, str, int, int]]:
+        """(dog_id, handler_id, photo_url, aHash, dHash) ordered by dog_id."""
+
+    @abstractmethod
+    def save_photo_hash_failure(self, dog_id: str, photo_url: str) -> None:
+        """Record that a dog's photo_url could not be hashed."""
+
+    @abstractmethod
+    def delete_photo_hash_failure(self, dog_id: str) -> None: ...
+
+    @abstractmethod
+    def list_photo_hash_failures(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, str]]:
+        """(dog_id, photo_url) ordered by dog_id."""
+
+    # Blob references
+    @abstractmethod
+    def adjust_blob_refcount(self, file_hash: str, delta: int) -> int:
+        """Add delta to a blob's reference count. Returns the new count."""
+
+    # Job statuses (shared so any worker can answer GET /jobs/{id})
+    @abstractmethod
+    def save_job_status(self, job_id: str, revision: int, status: Dict[str, Any]) -> None:
+        """Store a job's JSON-safe status unless a later revision is stored."""
+
+    @abstractmethod
+    def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def delete_job_statuses(self, job_ids: List[str]) -> None: ...
+
+    # Verification scores
+    @abstractmethod
+    def save_internal_scores(self, scores: List[InternalVerificationScores]) -> None:
+        """Store each dog's latest scores, replacing earlier ones."""
+
+    @abstractmethod
+    def get_internal_scores(self, dog_id: str) -> Optional[InternalVerificationScores]: ...
+
+    @abstractmethod
+    def append_verification_history(self, entries: List[VerificationHistory]) -> None: ...
+
+    @abstractmethod
+    def list_verification_history(self, dog_id: str) -> List[VerificationHistory]:
+        """A dog's level changes, oldest first."""
+
+    # Audit events
+    @abstractmethod
+    def append_audit_events(self, events: List[AuditEvent]) -> List[AuditEvent]:
+        """Store events, ignoring ids already stored. Returns the newly stored ones."""
+
+    @abstractmethod
+    def list_audit_events(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[AuditEvent]: ...
+
+    @abstractmethod
+    def query_audit_events(
+        self,
+        dog_id: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        event_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        before: Optional[AuditKey] = None,
+        limit: int = 100
+    ) -> List[AuditEvent]:
+        """Matching events, newest first, strictly older than `before` if given."""
+
+    @abstractmethod
+    def increment_audit_rollups(self, deltas: Dict[RollupKey, int]) -> None: ...
+
+    @abstractmethod
+    def get_audit_rollups(
+        self,
+        metric: str,
+        granularity: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        key: Optional[str] = None
+    ) -> List[Tuple[datetime, str, int]]:
+        """(bucket, key, count) rows, oldest bucket first."""
+
+
+class InMemoryRepository(Repository):
+    """
+    Dict-backed repository with secondary indexes.
+    State is lost on restart and is not shared between processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._dogs: Dict[str, Dog] = {}
+        self._handlers: Dict[str, Handler] = {}
+        self._records: Dict[str, AnyRecord] = {}
+        self._change_seqs: Dict[str, int] = {}  # feed -> latest seq
+        self._change_versions: Dict[str, Dict[str, int]] = {}  # feed -> key -> seq of last save
+        self._raw_documents: Dict[str, RawDocument] = {}
+        self._internal_scores: Dict[str, InternalVerificationScores] = {}
+        self._job_statuses: Dict[str, Tuple[int, Dict[str, Any]]] = {}  # id -> (revision, status)
+        self._verification_history: Dict[str, List[VerificationHistory]] = {}
+        self._audit_events: Dict[str, AuditEvent] = {}
+        self._audit_rollups: Dict[Tuple[str, str], Dict[Tuple[datetime, str], int]] = {}
+
+        # Secondary indexes
+        self._dogs_by_handler: Dict[str, Set[str]] = {}
+        self._dogs_by_microchip: Dict[str, Set[str]] = {}
+        self._records_by_dog: Dict[str, Dict[str, None]] = {}  # insertion-ordered
+        self._documents_by_hash: Dict[str, Set[str]] = {}
+        self._documents_by_dog: Dict[str, Set[str]] = {}
+        self._hash_owners: Dict[str, Set[Tuple[str, str]]] = {}
+        self._document_signatures: Dict[str, Tuple[str, str, bytes]] = {}
+        self._photo_hashes: Dict[str, Tuple[str, str, int, int]] = {}
+        self._photo_hash_failures: Dict[str, str] = {}
+        self._blob_refcounts: Dict[str, int] = {}
+        self._audit_keys: List[AuditKey] = []
+        self._audit_by_dog: Dict[str, List[AuditKey]] = {}
+        self._audit_by_org: Dict[str, List[AuditKey]] = {}
+        self._audit_by_type: Dict[str, List[AuditKey]] = {}
+
+    # Dogs
+    def get_dog(self, dog_id: str) -> Optional[Dog]:
+        return self._dogs.get(dog_id)
+
+    def save_dog(self, dog: Dog) -> None:
+        with self._lock:
+            previous = self._dogs.get(dog.id)
+            if previous is not None:
+                self._dogs_by_handler.get(previous.handler_id, set()).discard(dog.id)
+                if previous.microchip:
+                    self._dogs_by_microchip.get(previous.microchip, set()).discard(dog.id)
+            self._dogs[dog.id] = dog
+            self._dogs_by_handler.setdefault(dog.handler_id, set()).add(dog.id)
+            if dog.microchip:
+                self._dogs_by_microchip.setdefault(dog.microchip, set()).add(dog.id)
+            self._bump_changes(DOG_CHANGES, [dog.id])
+
+    def list_dogs(self) -> List[Dog]:
+        return list(self._dogs.values())
+
+    def find_dogs_by_handler(self, handler_id: str) -> List[Dog]:
+        return [self._dogs[i] for i in self._dogs_by_handler.get(handler_id, ())]
+
+    def find_dogs_by_microchip(self, microchip: str) -> List[Dog]:
+        return [self._dogs[i] for i in self._dogs_by_microchip.get(microchip, ())]
+
+    # Handlers
+    def get_handler(self, handler_id: str) -> Optional[Handler]:
+        return self._handlers.get(handler_id)
+
+    def save_handler(self, handler: Handler) -> None:
+        with self._lock:
+            self._handlers[handler.id] = handler
+            self._bump_changes(HANDLER_CHANGES, [handler.id])
+
+    # Records
+    def get_record(self, record_id: str) -> Optional[AnyRecord]:
+        return self._records.get(record_id)
+
+    def save_record(self, record: AnyRecord) -> None:
+        with self._lock:
+            previous = self._records.get(record.id)
+            self._records[record.id] = record
+            self._records_by_dog.setdefault(record.dog_id, {})[record.id] = None
+            changed = [record.dog_id]
+            if previous is not None and previous.dog_id != record.dog_id:
+                self._records_by_dog.get(previous.dog_id, {}).pop(record.id, None)
+                changed.append(previous.dog_id)
+            self._bump_changes(RECORD_CHANGES, changed)
+
+    def list_records(self, dog_id: str) -> List[AnyRecord]:
+        return [self._records[i] for i in self._records_by_dog.get(dog_id, ())]
+
+    # Change feeds
+    def _bump_changes(self, feed: str, keys: List[str]) -> None:
+        """Call with self._lock held."""
+        seq = self._change_seqs.get(feed, 0) + 1
+        self._change_seqs[feed] = seq
+        versions = self._change_versions.setdefault(feed, {})
+        for key in keys:
+            versions[key] = seq
+
+    def changes_since(self, feed: str, seq: Optional[int]) -> Tuple[int, List[str]]:
+        current = self._change_seqs.get(feed, 0)
+        if seq is None or seq >= current:
+            return current, []
+        with self._lock:
+            versions = self._change_versions.get(feed, {})
+            return current, [k for k, s in versions.items() if s > seq]
+
+    # Raw documents
+    def get_raw_document(self, document_id: str) -> Optional[RawDocument]:
+        return self._raw_documents.get(document_id)
+
+    def save_raw_document(self, document: RawDocument) -> None:
+        with self._lock:
+            previous = self._raw_documents.get(document.id)
+            if previous is not None:
+                self._documents_by_hash.get(previous.file_hash, set()).discard(document.id)
+                self._documents_by_dog.get(previous.dog_id, set()).discard(document.id)
+            self._raw_documents[document.id] = document
+            self._documents_by_hash.setdefault(document.file_hash, set()).add(document.id)
+            self._documents_by_dog.setdefault(document.dog_id, set()).add(document.id)
+            self._bump_changes(DOCUMENT_CHANGES, [document.dog_id])
+
+    def find_documents_by_hash(self, file_hash: str) -> List[RawDocument]:
+        return [
+            self._raw_documents[i]
+            for i in self._documents_by_hash.get(file_hash, ())
+        ]
+
+    def find_documents_by_dog(self, dog_id: str) -> List[RawDocument]:
+        return [
+            self._raw_documents[i]
+            for i in sorted(self._documents_by_dog.get(dog_id, ()))
+        ]
+
+    def list_raw_documents(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 500
+    ) -> List[RawDocument]:
+        with self._lock:
+            ids = sorted(
+                i for i in self._raw_documents
+                if after_id is None or i > after_id
+            )[:limit]
+            return [self._raw_documents[i] for i in ids]
+
+    # Document hash index
+    def add_document_hash_owners(self, owners: List[HashOwner]) -> int:
+        added = 0
+        with self._lock:
+            for file_hash, dog_id, handler_id in owners:
+                known = self._hash_owners.setdefault(file_hash, set())
+                if (dog_id, handler_id) not in known:
+                    known.add((dog_id, handler_id))
+                    added += 1
+        return added
+
+    def get_document_hash_owners(self, file_hash: str) -> List[Tuple[str, str]]:
+        return sorted(self._hash_owners.get(file_hash, ()))
+
+    def list_shared_document_hashes(
+        self,
+        min_dogs: int = 2,
+        after: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Tuple[str, int, int]]:
+        rows = []
+        with self._lock:
+            for file_hash in sorted(self._hash_owners):
+                if after is not None and file_hash <= after:
+                    continue
+                owners = self._hash_owners[file_hash]
+                dogs = len({dog_id for dog_id, _ in owners})
+                if dogs >= min_dogs:
+                    rows.append((file_hash, dogs, len({h for _, h in owners})))
+                    if len(rows) == limit:
+                        break
+        return rows
+
+    # Near-duplicate signatures
+    def save_document_signature(
+        self,
+        document_id: str,
+        dog_id: str,
+        handler_id: str,
+        signature: bytes
+    ) -> None:
+        with self._lock:
+            self._document_signatures[document_id] = (dog_id, handler_id, signature)
+
+    def list_document_signatures(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, str, str, bytes]]:
+        with self._lock:
+            ids = sorted(
+                i for i in self._document_signatures
+                if after_id is None or i > after_id
+            )[:limit]
+            return [(i, *self._document_signatures[i]) for i in ids]
+
+    # Photo hashes
+    def save_photo_hash(
+        self,
+        dog_id: str,
+        handler_id: str,
+        photo_url: str,
+        ahash: int,
+        dhash: int
+    ) -> None:
+        with self._lock:
+            self._photo_hashes[dog_id] = (handler_id, photo_url, ahash, dhash)
+
+    def delete_photo_hash(self, dog_id: str) -> None:
+        with self._lock:
+            self._photo_hashes.pop(dog_id, None)
+
+    def list_photo_hashes(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, str, str, int, int]]:
+        with self._lock:
+            ids = sorted(
+                i for i in self._photo_hashes
+                if after_id is None or i > after_id
+            )[:limit]
+            return [(i, *self._photo_hashes[i]) for i in ids]
+
+    def save_photo_hash_failure(self, dog_id: str, photo_url: str) -> None:
+        with self._lock:
+            self._photo_hash_failures[dog_id] = photo_url
+
+    def delete_photo_hash_failure(self, dog_id: str) -> None:
+        with self._lock:
+            self._photo_hash_failures.pop(dog_id, None)
+
+    def list_photo_hash_failures(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, str]]:
+        with self._lock:
+            ids = sorted(
+                i for i in self._photo_hash_failures
+                if after_id is None or i > after_id
+            )[:limit]
+            return [(i, self._photo_hash_failures[i]) for i in ids]
+
+    # Blob references
+    def adjust_blob_refcount(self, file_hash: str, delta: int) -> int:
+        with self._lock:
+            count = self._blob_refcounts.get(file_hash, 0) + delta
+            if count > 0:
+                self._blob_refcounts[file_hash] = count
+            else:
+                self._blob_refcounts.pop(file_hash, None)
+            return count
+
+    # Job statuses
+    def save_job_status(self, job_id: str, revision: int, status: Dict[str, Any]) -> None:
+        with self._lock:
+            stored = self._job_statuses.get(job_id)
+            if stored is None or stored[0] < revision:
+                self._job_statuses[job_id] = (revision, status)
+
+    def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        stored = self._job_statuses.get(job_id)
+        return stored[1] if stored else None
+
+    def delete_job_statuses(self, job_ids: List[str]) -> None:
+        with self._lock:
+            for job_id in job_ids:
+                self._job_statuses.pop(job_id, None)
+
+    # Verification scores
+    def save_internal_scores(self, scores: List[InternalVerificationScores]) -> None:
+        with self._lock:
+            for s in scores:
+                self._internal_scores[s.dog_id] = s
+            self._bump_changes(SCORE_CHANGES, [s.dog_id for s in scores])
+
+    def get_internal_scores(self, dog_id: str) -> Optional[InternalVerificationScores]:
+        return self._internal_scores.get(dog_id)
+
+    def append_verification_history(self, entries: List[VerificationHistory]) -> None:
+        with self._lock:
+            for e in entries:
+                self._verification_history.setdefault(e.dog_id, []).append(e)
+
+    def list_verification_history(self, dog_id: str) -> List[VerificationHistory]:
+        with self._lock:
+            return sorted(
+                self._verification_history.get(dog_id, []),
+                key=lambda e: (e.changed_at, e.id)
+            )
+
+    # Audit events
+    def append_audit_events(self, events: List[AuditEvent]) -> List[AuditEvent]:
+        stored = []
+        with self._lock:
+            for e in events:
+                if e.id in self._audit_events:
+                    continue
+                self._audit_events[e.id] = e
+                key = (e.timestamp, e.id)
+                # Events arrive nearly in time order, so insort lands at the tail
+                insort(self._audit_keys, key)
+                if e.dog_id:
+                    insort(self._audit_by_dog.setdefault(e.dog_id, []), key)
+                if e.organization_id:
+                    insort(self._audit_by_org.setdefault(e.organization_id, []), key)
+                insort(self._audit_by_type.setdefault(e.event_type.value, []), key)
+                stored.append(e)
+        return stored
+
+    def list_audit_events(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[AuditEvent]:
+        lo = 0 if since is None else bisect_left(self._audit_keys, (since, ""))
+        hi = (
+            len(self._audit_keys) if until is None
+            else bisect_left(self._audit_keys, (until, ""))
+        )
+        return [self._audit_events[k[1]] for k in self._audit_keys[lo:hi]]
+
+    def query_audit_events(
+        self,
+        dog_id: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        event_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        before: Optional[AuditKey] = None,
+        limit: int = 100
+    ) -> List[AuditEvent]:
+        # Walk the most selective index; check remaining filters per event
+        candidates = [self._audit_keys]
+        if dog_id is not None:
+            candidates.append(self._audit_by_dog.get(dog_id, []))
+        if organization_id is not None:
+            candidates.append(self._audit_by_org.get(organization_id, []))
+        if event_type is not None:
+            candidates.append(self._audit_by_type.get(event_type, []))
+        keys = min(candidates, key=len)
+
+        hi = len(keys)
+        if until is not None:
+            hi = min(hi, bisect_left(keys, (until, "")))
+        if before is not None:
+            hi = min(hi, bisect_left(keys, before))
+
+        results = []
+        for i in range(hi - 1, -1, -1):
+            if since is not None and keys[i][0] < since:
+                break
+            e = self._audit_events[keys[i][1]]
+            if (
+                (dog_id is None or e.dog_id == dog_id)
+                and (organization_id is None or e.organization_id == organization_id)
+                and (event_type is None or e.event_type.value == event_type)
+            ):
+                results.append(e)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def increment_audit_rollups(self, deltas: Dict[RollupKey, int]) -> None:
+        with self._lock:
+            for (metric, granularity, bucket, key), delta in deltas.items():
+                counters = self._audit_rollups.setdefault((metric, granularity), {})
+                counters[(bucket, key)] = counters.get((bucket, key), 0) + delta
+
+    def get_audit_rollups(
+        self,
+        metric: str,
+        granularity: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        key: Optional[str] = None
+    ) -> List[Tuple[datetime, str, int]]:
+        counters = self._audit_rollups.get((metric, granularity), {})
+        return sorted(
+            (bucket, k, count)
+            for (bucket, k), count in counters.items()
+            if (since is None or bucket >= since)
+            and (until is None or bucket < until)
+            and (key is None or k == key)
+        )
+
+
+# SQLite schema. Model payloads are stored as JSON; columns that are
+# queried on are broken out so they can be indexed.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dogs (
+    id TEXT PRIMARY KEY,
+    handler_id TEXT NOT NULL,
+    microchip TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dogs_handler_id ON dogs(handler_id);
+CREATE INDEX IF NOT EXISTS idx_dogs_microchip ON dogs(microchip);
+
+CREATE TABLE IF NOT EXISTS handlers (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS records (
+    id TEXT PRIMARY KEY,
+    dog_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_dog_id ON records(dog_id);
+
+-- Change feeds: bumped in the same transaction as each watched save, so
+-- per-worker caches can pick up what other workers wrote
+CREATE TABLE IF NOT EXISTS change_versions (
+    feed TEXT NOT NULL,
+    key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (feed, key)
+);
+CREATE INDEX IF NOT EXISTS idx_change_versions_seq ON change_versions(feed, seq);
+
+CREATE TABLE IF NOT EXISTS raw_documents (
+    id TEXT PRIMARY KEY,
+    dog_id TEXT NOT NULL,
+    handler_id TEXT NOT NULL,
+    file_hash TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_raw_documents_dog_id ON raw_documents(dog_id);
+CREATE INDEX IF NOT EXISTS idx_raw_documents_handler_id ON raw_documents(handler_id);
+CREATE INDEX IF NOT EXISTS idx_raw_documents_file_hash ON raw_documents(file_hash);
+
+CREATE TABLE IF NOT EXISTS document_hash_owners (
+    file_hash TEXT NOT NULL,
+    dog_id TEXT NOT NULL,
+    handler_id TEXT NOT NULL,
+    PRIMARY KEY (file_hash, dog_id, handler_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS document_signatures (
+    document_id TEXT PRIMARY KEY,
+    dog_id TEXT NOT NULL,
+    handler_id TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS photo_hashes (
+    dog_id TEXT PRIMARY KEY,
+    handler_id TEXT NOT NULL,
+    photo_url TEXT NOT NULL,
+    ahash TEXT NOT NULL,  -- 64-bit hashes as hex (INTEGER is signed)
+    dhash TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS photo_hash_failures (
+    dog_id TEXT PRIMARY KEY,
+    photo_url TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS blob_refs (
+    file_hash TEXT PRIMARY KEY,
+    refcount INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS job_statuses (
+    id TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS internal_scores (
+    dog_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS verification_history (
+    id TEXT PRIMARY KEY,
+    dog_id TEXT NOT NULL,
+    changed_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_verification_history_dog_id
+    ON verification_history(dog_id, changed_at);
+
+CREATE TABLE IF NOT EXISTS audit_events (
+    id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    dog_id TEXT,
+    organization_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audit_events_timestamp ON audit_events(timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_events_dog_id ON audit_events(dog_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_events_organization_id ON audit_events(organization_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_events_event_type ON audit_events(event_type, timestamp);
+
+CREATE TABLE IF NOT EXISTS audit_rollups (
+    metric TEXT NOT NULL,
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (metric, granularity, bucket, key)
+);
+"""
+
+# Statements are module constants so every pooled connection's
+# statement cache reuses the same prepared statement.
+_SQL_GET_DOG = "SELECT data FROM dogs WHERE id = ?"
+_SQL_SAVE_DOG = (
+    "INSERT INTO dogs (id, handler_id, microchip, data) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET handler_id = excluded.handler_id, "
+    "microchip = excluded.microchip, data = excluded.data"
+)
+_SQL_LIST_DOGS = "SELECT data FROM dogs ORDER BY id"
+_SQL_DOGS_BY_HANDLER = "SELECT data FROM dogs WHERE handler_id = ?"
+_SQL_DOGS_BY_MICROCHIP = "SELECT data FROM dogs WHERE microchip = ?"
+_SQL_GET_HANDLER = "SELECT data FROM handlers WHERE id = ?"
+_SQL_SAVE_HANDLER = (
+    "INSERT INTO handlers (id, data) VALUES (?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET data = excluded.data"
+)
+_SQL_GET_RECORD = "SELECT kind, data FROM records WHERE id = ?"
+_SQL_SAVE_RECORD = (
+    "INSERT INTO records (id, dog_id, kind, data) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET dog_id = excluded.dog_id, "
+    "kind = excluded.kind, data = excluded.data"
+)
+_SQL_LIST_RECORDS = "SELECT kind, data FROM records WHERE dog_id = ? ORDER BY rowid"
+_SQL_GET_RECORD_DOG = "SELECT dog_id FROM records WHERE id = ?"
+
+# Change feeds; the WHERE clause also stops SQLite parsing ON CONFLICT as
+# part of the SELECT
+_SQL_BUMP_CHANGE = (
+    "INSERT INTO change_versions (feed, key, seq) "
+    "SELECT ?1, ?2, COALESCE(MAX(seq), 0) + 1 FROM change_versions WHERE feed = ?1 "
+    "ON CONFLICT(feed, key) DO UPDATE SET seq = excluded.seq"
+)
+_SQL_CHANGE_SEQ = "SELECT COALESCE(MAX(seq), 0) FROM change_versions WHERE feed = ?"
+_SQL_CHANGES = "SELECT key, seq FROM change_versions WHERE feed = ? AND seq > ?"
+
+# Bulk lookups bind at most this many ids per statement
+_SQL_IN_CHUNK = 500
+_SQL_GET_RAW_DOCUMENT = "SELECT data FROM raw_documents WHERE id = ?"
+_SQL_SAVE_RAW_DOCUMENT = (
+    "INSERT INTO raw_documents (id, dog_id, handler_id, file_hash, data) "
+    "VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET dog_id = excluded.dog_id, "
+    "handler_id = excluded.handler_id, file_hash = excluded.file_hash, "
+    "data = excluded.data"
+)
+_SQL_DOCUMENTS_BY_HASH = "SELECT data FROM raw_documents WHERE file_hash = ?"
+_SQL_DOCUMENTS_BY_DOG = "SELECT data FROM raw_documents WHERE dog_id = ? ORDER BY id"
+_SQL_LIST_RAW_DOCUMENTS = "SELECT data FROM raw_documents ORDER BY id LIMIT ?"
+_SQL_LIST_RAW_DOCUMENTS_AFTER = (
+    "SELECT data FROM raw_documents WHERE id > ? ORDER BY id LIMIT ?"
+)
+_SQL_ADD_HASH_OWNER = (
+    "INSERT OR IGNORE INTO document_hash_owners (file_hash, dog_id, handler_id) "
+    "VALUES (?, ?, ?)"
+)
+_SQL_GET_HASH_OWNERS = (
+    "SELECT dog_id, handler_id FROM document_hash_owners "
+    "WHERE file_hash = ? ORDER BY dog_id, handler_id"
+)
+_SQL_SHARED_HASHES = (
+    "SELECT file_hash, COUNT(DISTINCT dog_id), COUNT(DISTINCT handler_id) "
+    "FROM document_hash_owners WHERE file_hash > ? "
+    "GROUP BY file_hash HAVING COUNT(DISTINCT dog_id) >= ? "
+    "ORDER BY file_hash LIMIT ?"
+)
+_SQL_SAVE_DOCUMENT_SIGNATURE = (
+    "INSERT INTO document_signatures (document_id, dog_id, handler_id, signature) "
+    "VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(document_id) DO UPDATE SET dog_id = excluded.dog_id, "
+    "handler_id = excluded.handler_id, signature = excluded.signature"
+)
+_SQL_LIST_DOCUMENT_SIGNATURES = (
+    "SELECT document_id, dog_id, handler_id, signature FROM document_signatures "
+    "WHERE document_id > ? ORDER BY document_id LIMIT ?"
+)
+_SQL_SAVE_PHOTO_HASH = (
+    "INSERT INTO photo_hashes (dog_id, handler_id, photo_url, ahash, dhash) "
+    "VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(dog_id) DO UPDATE SET handler_id = excluded.handler_id, "
+    "photo_url = excluded.photo_url, ahash = excluded.ahash, dhash = excluded.dhash"
+)
+_SQL_DELETE_PHOTO_HASH = "DELETE FROM photo_hashes WHERE dog_id = ?"
+_SQL_LIST_PHOTO_HASHES = (
+    "SELECT dog_id, handler_id, photo_url, ahash, dhash FROM photo_hashes "
+    "WHERE dog_id > ? ORDER BY dog_id LIMIT ?"
+)
+_SQL_SAVE_PHOTO_HASH_FAILURE = (
+    "INSERT INTO photo_hash_failures (dog_id, photo_url) VALUES (?, ?) "
+    "ON CONFLICT(dog_id) DO UPDATE SET photo_url = excluded.photo_url"
+)
+_SQL_DELETE_PHOTO_HASH_FAILURE = "DELETE FROM photo_hash_failures WHERE dog_id = ?"
+_SQL_LIST_PHOTO_HASH_FAILURES = (
+    "SELECT dog_id, photo_url FROM photo_hash_failures "
+    "WHERE dog_id > ? ORDER BY dog_id LIMIT ?"
+)
+_SQL_ADJUST_BLOB_REFCOUNT = (
+    "INSERT INTO blob_refs (file_hash, refcount) VALUES (?, ?) "
+    "ON CONFLICT(file_hash) DO UPDATE SET refcount = refcount + excluded.refcount"
+)
+_SQL_GET_BLOB_REFCOUNT = "SELECT refcount FROM blob_refs WHERE file_hash = ?"
+_SQL_DELETE_BLOB_REFCOUNT = "DELETE FROM blob_refs WHERE file_hash = ? AND refcount <= 0"
+_SQL_SAVE_JOB_STATUS = (
+    "INSERT INTO job_statuses (id, revision, data) VALUES (?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET revision = excluded.revision, data = excluded.data "
+    "WHERE excluded.revision > job_statuses.revision"
+)
+_SQL_GET_JOB_STATUS = "SELECT data FROM job_statuses WHERE id = ?"
+_SQL_SAVE_INTERNAL_SCORES = (
+    "INSERT INTO internal_scores (dog_id, data) VALUES (?, ?) "
+    "ON CONFLICT(dog_id) DO UPDATE SET data = excluded.data"
+)
+_SQL_GET_INTERNAL_SCORES = "SELECT data FROM internal_scores WHERE dog_id = ?"
+_SQL_APPEND_VERIFICATION_HISTORY = (
+    "INSERT OR IGNORE INTO verification_history (id, dog_id, changed_at, data) "
+    "VALUES (?, ?, ?, ?)"
+)
+_SQL_LIST_VERIFICATION_HISTORY = (
+    "SELECT data FROM verification_history WHERE dog_id = ? ORDER BY changed_at, id"
+)
+_SQL_APPEND_AUDIT_EVENT = (
+    "INSERT OR IGNORE INTO audit_events "
+    "(id, timestamp, event_type, dog_id, organization_id, data) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SQL_INCREMENT_ROLLUP = (
+    "INSERT INTO audit_rollups (metric, granularity, bucket, key, count) "
+    "VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(metric, granularity, bucket, key) "
+    "DO UPDATE SET count = count + excluded.count"
+)
+
+
+class SQLiteRepository(Repository):
+    """
+    SQLite-backed repository in WAL mode.
+
+    WAL lets readers in every uvicorn worker proceed while one writer
+    commits, so several workers can share a single database file.
+    Connections are pooled per process.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        pool_size: int = 8,
+        busy_timeout: float = 5.0
+    ):
+        self._path = path
+        self._busy_timeout = busy_timeout
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=pool_size)
+        self._created = 0
+        self._pool_size = pool_size
+        self._pool_lock = threading.Lock()
+
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._path,
+            timeout=self._busy_timeout,
+            check_same_thread=False,
+            cached_statements=256,
+            isolation_level=None,  # autocommit; explicit BEGIN for batches
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection, opening a new one while under the limit."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                can_create = self._created < self._pool_size
+                if can_create:
+                    self._created += 1
+            conn = self._connect() if can_create else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        """Close all idle pooled connections."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
+
+    def _fetch_one(self, sql: str, params: tuple) -> Optional[tuple]:
+        with self._connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def _fetch_all(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._connection() as conn:
+            conn.execute(sql, params)
+
+    @contextmanager
+    def _changing(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction for saves that bump a change feed (_bump_changes)."""
+        with self._connection() as conn:
+            # IMMEDIATE: version bumps are serialized with the save
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _bump_changes(conn: sqlite3.Connection, feed: str, keys: List[str]) -> None:
+        conn.executemany(_SQL_BUMP_CHANGE, [(feed, key) for key in keys])
+
+    # Dogs
+    def get_dog(self, dog_id: str) -> Optional[Dog]:
+        row = self._fetch_one(_SQL_GET_DOG, (dog_id,))
+        return Dog.model_validate_json(row[0]) if row else None
+
+    def save_dog(self, dog: Dog) -> None:
+        with self._changing() as conn:
+            conn.execute(
+                _SQL_SAVE_DOG,
+                (dog.id, dog.handler_id, dog.microchip, dog.model_dump_json())
+            )
+            self._bump_changes(conn, DOG_CHANGES, [dog.id])
+
+    def list_dogs(self) -> List[Dog]:
+        return [Dog.model_validate_json(r[0]) for r in self._fetch_all(_SQL_LIST_DOGS)]
+
+    def find_dogs_by_handler(self, handler_id: str) -> List[Dog]:
+        rows = self._fetch_all(_SQL_DOGS_BY_HANDLER, (handler_id,))
+        return [Dog.model_validate_json(r[0]) for r in rows]
+
+    def find_dogs_by_microchip(self, microchip: str) -> List[Dog]:
+        rows = self._fetch_all(_SQL_DOGS_BY_MICROCHIP, (microchip,))
+        return [Dog.model_validate_json(r[0]) for r in rows]
+
+    def _fetch_in(self, sql: str, ids: List[str]) -> List[tuple]:
+        """Run `sql` (with one {} placeholder list) over ids in chunks."""
+        rows: List[tuple] = []
+        unique = list(dict.fromkeys(ids))
+        for start in range(0, len(unique), _SQL_IN_CHUNK):
+            chunk = unique[start:start + _SQL_IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(self._fetch_all(sql.format(placeholders), tuple(chunk)))
+        return rows
+
+    def get_dogs(self, dog_ids: List[str]) -> Dict[str, Dog]:
+        rows = self._fetch_in("SELECT data FROM dogs WHERE id IN ({})", dog_ids)
+        dogs = (Dog.model_validate_json(r[0]) for r in rows)
+        return {dog.id: dog for dog in dogs}
+
+    # Handlers
+    def get_handler(self, handler_id: str) -> Optional[Handler]:
+        row = self._fetch_one(_SQL_GET_HANDLER, (handler_id,))
+        return Handler.model_validate_json(row[0]) if row else None
+
+    def save_handler(self, handler: Handler) -> None:
+        with self._changing() as conn:
+            conn.execute(_SQL_SAVE_HANDLER, (handler.id, handler.model_dump_json()))
+            self._bump_changes(conn, HANDLER_CHANGES, [handler.id])
+
+    def get_handlers(self, handler_ids: List[str]) -> Dict[str, Handler]:
+        rows = self._fetch_in("SELECT data FROM handlers WHERE id IN ({})", handler_ids)
+        handlers = (Handler.model_validate_json(r[0]) for r in rows)
+        return {h.id: h for h in handlers}
+
+    # Records
+    def get_record(self, record_id: str) -> Optional[AnyRecord]:
+        row = self._fetch_one(_SQL_GET_RECORD, (record_id,))
+        return _RECORD_MODELS[row[0]].model_validate_json(row[1]) if row else None
+
+    def save_record(self, record: AnyRecord) -> None:
+        with self._changing() as conn:
+            row = conn.execute(_SQL_GET_RECORD_DOG, (record.id,)).fetchone()
+            conn.execute(
+                _SQL_SAVE_RECORD,
+                (record.id, record.dog_id, _record_kind(record), record.model_dump_json())
+            )
+            changed = [record.dog_id]
+            if row is not None and row[0] != record.dog_id:
+                changed.append(row[0])
+            self._bump_changes(conn, RECORD_CHANGES, changed)
+
+    def list_records(self, dog_id: str) -> List[AnyRecord]:
+        rows = self._fetch_all(_SQL_LIST_RECORDS, (dog_id,))
+        return [_RECORD_MODELS[kind].model_validate_json(data) for kind, data in rows]
+
+    def list_records_for_dogs(self, dog_ids: List[str]) -> Dict[str, List[AnyRecord]]:
+        records: Dict[str, List[AnyRecord]] = {dog_id: [] for dog_id in dog_ids}
+        rows = self._fetch_in(
+            "SELECT dog_id, kind, data FROM records WHERE dog_id IN ({}) ORDER BY rowid",
+            dog_ids
+        )
+        for dog_id, kind, data in rows:
+            records[dog_id].append(_RECORD_MODELS[kind].model_validate_json(data))
+        return records
+
+    # Change feeds
+    def changes_since(self, feed: str, seq: Optional[int]) -> Tuple[int, List[str]]:
+        if seq is None:
+            return self._fetch_one(_SQL_CHANGE_SEQ, (feed,))[0], []
+        rows = self._fetch_all(_SQL_CHANGES, (feed, seq))
+        return max((s for _, s in rows), default=seq), [key for key, _ in rows]
+
+    # Raw documents
+    def get_raw_document(self, document_id: str) -> Optional[RawDocument]:
+        row = self._fetch_one(_SQL_GET_RAW_DOCUMENT, (document_id,))
+        return RawDocument.model_validate_json(row[0]) if row else None
+
+    def save_raw_document(self, document: RawDocument) -> None:
+        with self._changing() as conn:
+            conn.execute(
+                _SQL_SAVE_RAW_DOCUMENT,
+                (
+                    document.id,
+                    document.dog_id,
+                    document.handler_id,
+                    document.file_hash,
+                    document.model_dump_json()
+                )
+            )
+            self._bump_changes(conn, DOCUMENT_CHANGES, [document.dog_id])
+
+    def find_documents_by_hash(self, file_hash: str) -> List[RawDocument]:
+        rows = self._fetch_all(_SQL_DOCUMENTS_BY_HASH, (file_hash,))
+        return [RawDocument.model_validate_json(r[0]) for r in rows]
+
+    def find_documents_by_dog(self, dog_id: str) -> List[RawDocument]:
+        rows = self._fetch_all(_SQL_DOCUMENTS_BY_DOG, (dog_id,))
+        return [RawDocument.model_validate_json(r[0]) for r in rows]
+
+    def list_raw_documents(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 500
+    ) -> List[RawDocument]:
+        if after_id is None:
+            rows = self._fetch_all(_SQL_LIST_RAW_DOCUMENTS, (limit,))
+        else:
+            rows = self._fetch_all(_SQL_LIST_RAW_DOCUMENTS_AFTER, (after_id, limit))
+        return [RawDocument.model_validate_json(r[0]) for r in rows]
+
+    # Document hash index
+    def add_document_hash_owners(self, owners: List[HashOwner]) -> int:
+        if not owners:
+            return 0
+        with self._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                before = conn.total_changes
+                conn.executemany(_SQL_ADD_HASH_OWNER, owners)
+                added = conn.total_changes - before
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def get_document_hash_owners(self, file_hash: str) -> List[Tuple[str, str]]:
+        return [tuple(r) for r in self._fetch_all(_SQL_GET_HASH_OWNERS, (file_hash,))]
+
+    def list_shared_document_hashes(
+        self,
+        min_dogs: int = 2,
+        after: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Tuple[str, int, int]]:
+        return [
+            tuple(r)
+            for r in self._fetch_all(_SQL_SHARED_HASHES, (after or "", min_dogs, limit))
+        ]
+
+    # Near-duplicate signatures
+    def save_document_signature(
+        self,
+        document_id: str,
+        dog_id: str,
+        handler_id: str,
+        signature: bytes
+    ) -> None:
+        self._execute(
+            _SQL_SAVE_DOCUMENT_SIGNATURE, (document_id, dog_id, handler_id, signature)
+        )
+
+    def list_document_signatures(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, str, str, bytes]]:
+        return [
+            tuple(r)
+            for r in self._fetch_all(_SQL_LIST_DOCUMENT_SIGNATURES, (after_id or "", limit))
+        ]
+
+    # Photo hashes
+    def save_photo_hash(
+        self,
+        dog_id: str,
+        handler_id: str,
+        photo_url: str,
+        ahash: int,
+        dhash: int
+    ) -> None:
+        self._execute(
+            _SQL_SAVE_PHOTO_HASH,
+            (dog_id, handler_id, photo_url, f"{ahash:016x}", f"{dhash:016x}")
+        )
+
+    def delete_photo_hash(self, dog_id: str) -> None:
+        self._execute(_SQL_DELETE_PHOTO_HASH, (dog_id,))
+
+    def list_photo_hashes(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, str, str, int, int]]:
+        return [
+            (dog_id, handler_id, photo_url, int(ahash, 16), int(dhash, 16))
+            for dog_id, handler_id, photo_url, ahash, dhash
+            in self._fetch_all(_SQL_LIST_PHOTO_HASHES, (after_id or "", limit))
+        ]
+
+    def save_photo_hash_failure(self, dog_id: str, photo_url: str) -> None:
+        self._execute(_SQL_SAVE_PHOTO_HASH_FAILURE, (dog_id, photo_url))
+
+    def delete_photo_hash_failure(self, dog_id: str) -> None:
+        self._execute(_SQL_DELETE_PHOTO_HASH_FAILURE, (dog_id,))
+
+    def list_photo_hash_failures(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, str]]:
+        return self._fetch_all(_SQL_LIST_PHOTO_HASH_FAILURES, (after_id or "", limit))
+
+    # Blob references
+    def adjust_blob_refcount(self, file_hash: str, delta: int) -> int:
+        with self._connection() as conn:
+            # IMMEDIATE: take the write lock before reading the new count
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(_SQL_ADJUST_BLOB_REFCOUNT, (file_hash, delta))
+                count = conn.execute(_SQL_GET_BLOB_REFCOUNT, (file_hash,)).fetchone()[0]
+                conn.execute(_SQL_DELETE_BLOB_REFCOUNT, (file_hash,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return count
+
+    # Job statuses
+    def save_job_status(self, job_id: str, revision: int, status: Dict[str, Any]) -> None:
+        self._execute(_SQL_SAVE_JOB_STATUS, (job_id, revision, json.dumps(status)))
+
+    def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._fetch_one(_SQL_GET_JOB_STATUS, (job_id,))
+        return json.loads(row[0]) if row else None
+
+    def delete_job_statuses(self, job_ids: List[str]) -> None:
+        for start in range(0, len(job_ids), _SQL_IN_CHUNK):
+            chunk = job_ids[start:start + _SQL_IN_CHUNK]
+            self._execute(
+                "DELETE FROM job_statuses WHERE id IN ({})".format(",".join("?" * len(chunk))),
+                tuple(chunk)
+            )
+
+    # Verification scores
+    def _execute_many(self, sql: str, rows: List[tuple]) -> None:
+        if not rows:
+            return
+        with self._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(sql, rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def save_internal_scores(self, scores: List[InternalVerificationScores]) -> None:
+        if not scores:
+            return
+        with self._changing() as conn:
+            conn.executemany(
+                _SQL_SAVE_INTERNAL_SCORES,
+                [(s.dog_id, s.model_dump_json()) for s in scores]
+            )
+            self._bump_changes(conn, SCORE_CHANGES, [s.dog_id for s in scores])
+
+    def get_internal_scores(self, dog_id: str) -> Optional[InternalVerificationScores]:
+        row = self._fetch_one(_SQL_GET_INTERNAL_SCORES, (dog_id,))
+        return InternalVerificationScores.model_validate_json(row[0]) if row else None
+
+    def append_verification_history(self, entries: List[VerificationHistory]) -> None:
+        self._execute_many(
+            _SQL_APPEND_VERIFICATION_HISTORY,
+            [(e.id, e.dog_id, _ts(e.changed_at), e.model_dump_json()) for e in entries]
+        )
+
+    def list_verification_history(self, dog_id: str) -> List[VerificationHistory]:
+        rows = self._fetch_all(_SQL_LIST_VERIFICATION_HISTORY, (dog_id,))
+        return [VerificationHistory.model_validate_json(r[0]) for r in rows]
+
+    # Audit events
+    def append_audit_events(self, events: List[AuditEvent]) -> List[AuditEvent]:
+        if not events:
+            return []
+        stored = []
+        with self._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                for e in events:
+                    cursor = conn.execute(
+                        _SQL_APPEND_AUDIT_EVENT,
+                        (
+                            e.id,
+                            _ts(e.timestamp),
+                            e.event_type.value,
+                            e.dog_id,
+                            e.organization_id,
+                            e.model_dump_json()
+                        )
+                    )
+                    if cursor.rowcount:
+                        stored.append(e)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return stored
+
+    def list_audit_events(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[AuditEvent]:
+        sql = "SELECT data FROM audit_events"
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_ts(since))
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(_ts(until))
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp, id"
+        return [
+            AuditEvent.model_validate_json(r[0])
+            for r in self._fetch_all(sql, tuple(params))
+        ]
+
+    def query_audit_events(
+        self,
+        dog_id: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        event_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        before: Optional[AuditKey] = None,
+        limit: int = 100
+    ) -> List[AuditEvent]:
+        clauses, params = [], []
+        for column, value in (
+            ("dog_id", dog_id),
+            ("organization_id", organization_id),
+            ("event_type", event_type),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_ts(since))
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(_ts(until))
+        if before is not None:
+            # Keyset pagination on (timestamp, id)
+            clauses.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+            params.extend([_ts(before[0]), _ts(before[0]), before[1]])
+        sql = "SELECT data FROM audit_events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit)
+        return [
+            AuditEvent.model_validate_json(r[0])
+            for r in self._fetch_all(sql, tuple(params))
+        ]
+
+    def increment_audit_rollups(self, deltas: Dict[RollupKey, int]) -> None:
+        if not deltas:
+            return
+        rows = [
+            (metric, granularity, _ts(bucket), key, delta)
+            for (metric, granularity, bucket, key), delta in deltas.items()
+        ]
+        with self._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(_SQL_INCREMENT_ROLLUP, rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def get_audit_rollups(
+        self,
+        metric: str,
+        granularity: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        key: Optional[str] = None
+    ) -> List[Tuple[datetime, str, int]]:
+        sql = "SELECT bucket, key, count FROM audit_rollups WHERE metric = ? AND granularity = ?"
+        params: list = [metric, granularity]
+        if since is not None:
+            sql += " AND bucket >= ?"
+            params.append(_ts(since))
+        if until is not None:
+            sql += " AND bucket < ?"
+            params.append(_ts(until))
+        if key is not None:
+            sql += " AND key = ?"
+            params.append(key)
+        sql += " ORDER BY bucket, key"
+        return [
+            (datetime.fromisoformat(bucket), k, count)
+            for bucket, k, count in self._fetch_all(sql, tuple(params))
+        ]
@@ -8,6 +8,15 @@ from .api import (
     routes_business,
     routes_admin
 )
+from .core.job_queue import job_queue
+from .services.audit_writer import audit_writer
+from .services.review_queue_service import review_queue
+from .services.near_duplicate_index import near_duplicate_index
+from .services.photo_hash_index import photo_hash_index
+from .services.dog_service import queue_missing_photo_hashes
+from .services.fraud_graph import fraud_graph
+from .services.rescore_scheduler import rescore_scheduler
+from .services.expiration_scheduler import expiration_scheduler
 
 app = FastAPI(
     title="Dog Passport API",
@@ -37,6 +46,30 @@ app.include_router(routes_business.router)
 app.include_router(routes_admin.router)
 
 
+@app.on_event("startup")
+async def startup():
+    """Start background workers and build materialized views."""
+    audit_writer.start()
+    near_duplicate_index.rebuild()
+    photo_hash_index.rebuild()
+    review_queue.rebuild()  # after photo_hash_index: photo matches are flags
+    fraud_graph.rebuild()
+    rescore_scheduler.start()
+    expiration_scheduler.start()
+    expiration_scheduler.rebuild()  # applies transitions missed while down
+    job_queue.start()
+    queue_missing_photo_hashes()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush and stop background workers."""
+    job_queue.stop()
+    expiration_scheduler.stop()
+    rescore_scheduler.stop()
+    audit_writer.stop()
+
+
 @app.get("/")
 async def root():
     """Root endpoint - API health check."""
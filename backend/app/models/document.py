@@ -65,6 +65,9 @@ class RawDocument(BaseModel):
     confidence_score: Optional[float] = None
     processing_error: Optional[str] = None
     
+    # Fraud checks (INTERNAL ONLY - never returned by public APIs)
+    fraud_flags: List[str] = Field(default_factory=list)
+    
     # Link to normalized record (if processed)
     normalized_record_id: Optional[str] = None
 
@@ -104,8 +107,9 @@ class NormalizedRecord(BaseModel):
     trainer_name: Optional[str] = None
     trainer_verified_at: Optional[datetime] = None
     
-    # Status
+    # Status (expiry flags are maintained by the expiration scheduler)
     is_active: bool = True
+    expiring_soon: bool = False
     is_expired: bool = False
     
     # Metadata
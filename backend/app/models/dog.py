@@ -26,9 +26,11 @@ class Dog(BaseModel):
     
     # Service role
     service_role: ServiceRole
+    jurisdiction: Optional[str] = None  # e.g. "US-CA"; selects verification rule overrides
     
     # Verification (public-facing)
     verification_level: VerificationLevel = VerificationLevel.YELLOW
+    verified: bool = False  # legacy rule: accepted vaccination + training/vet_visit
     
     # Health metadata
     hypoallergenic_rating: Optional[str] = None  # "high" | "moderate" | "standard"
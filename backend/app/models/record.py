@@ -10,6 +10,9 @@ class Record(BaseModel):
     category: str  # e.g., "vaccination", "training", "vet_visit", "travel"
     status: str = "uploaded"  # "uploaded" | "analyzed"
     expires_at: Optional[date] = None
+    # Maintained by the expiration scheduler
+    expiring_soon: bool = False
+    is_expired: bool = False
     analysis_status: Optional[str] = None  # "accepted" | "denied"
     risk_score: Optional[float] = None
     issues: Optional[List[str]] = None
@@ -23,6 +26,8 @@ class Record(BaseModel):
                 "category": "vaccination",
                 "status": "uploaded",
                 "expires_at": "2025-12-31",
+                "expiring_soon": False,
+                "is_expired": False,
                 "analysis_status": None,
                 "risk_score": None,
                 "issues": None
@@ -1,6 +1,23 @@
-from typing import Dict, Any
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List
+from ..core.database import get_repository
+from ..core.job_queue import Job, PermanentJobError, job_queue
+from ..models.document import DocumentStatus, RawDocument
 from ..services.record_service import update_record, get_record
 from ..services.dog_service import update_dog_verification
+from ..services.document_ai_service import DocumentAIService
+from ..services.document_flags import flag_document
+from ..services.document_hash_index import index_document, get_hash_owners
+from ..services.near_duplicate_index import near_duplicate_index
+from ..services.fraud_graph import NEAR_DUPLICATE, fraud_graph
+from ..services.review_queue_service import review_queue
+
+# Job kinds
+ANALYZE_RECORD_JOB = "analyze_record"
+PROCESS_DOCUMENT_JOB = "process_document"
+
+logger = logging.getLogger(__name__)
 
 
 def analyze_record(dog_id: str, record_id: str) -> Dict[str, Any]:
@@ -78,3 +95,195 @@ def analyze_record(dog_id: str, record_id: str) -> Dict[str, Any]:
         }
     }
 
+
+
+def submit_record_analysis(
+    dog_id: str,
+    record_id: str,
+    handler_id: str,
+    priority: int = 0
+) -> Job:
+    """Enqueue analyze_record; the handler is the tenant for concurrency caps."""
+    return job_queue.submit(
+        ANALYZE_RECORD_JOB,
+        {"dog_id": dog_id, "record_id": record_id},
+        tenant_id=handler_id,
+        priority=priority
+    )
+
+
+def submit_document_processing(
+    document_id: str,
+    handler_id: str,
+    priority: int = 0
+) -> Job:
+    """Enqueue OCR/classification/extraction and fraud checks for a raw document."""
+    return job_queue.submit(
+        PROCESS_DOCUMENT_JOB,
+        {"document_id": document_id},
+        tenant_id=handler_id,
+        priority=priority
+    )
+
+
+def _run_record_analysis(dog_id: str, record_id: str) -> Dict[str, Any]:
+    result = analyze_record(dog_id, record_id)
+    if "error" in result:
+        raise PermanentJobError(result["error"])
+    return result
+
+
+def process_raw_document(document_id: str) -> Dict[str, Any]:
+    """
+    Classify and extract a raw document, then check it for reuse.
+    Documents with fraud flags go to manual review; the flags themselves
+    are INTERNAL and never part of the result.
+    """
+    repo = get_repository()
+    raw_doc = repo.get_raw_document(document_id)
+    if raw_doc is None:
+        raise PermanentJobError("Document not found")
+    
+    raw_doc.status = DocumentStatus.PROCESSING
+    repo.save_raw_document(raw_doc)
+    
+    content = DocumentAIService.cached_content(raw_doc)
+    if content is None:
+        content = job_queue.run_cpu(DocumentAIService.analyze_content, raw_doc)
+        DocumentAIService.store_content(raw_doc, content)
+    return _apply_analysis(raw_doc, DocumentAIService.finish_analysis(raw_doc, content))
+
+
+def _apply_analysis(raw_doc: RawDocument, analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the fraud checks for an analyzed document and save its outcome."""
+    repo = get_repository()
+    # Idempotent; covers documents stored before the index existed
+    index_document(raw_doc)
+    near_duplicates = near_duplicate_index.add_document(raw_doc, analysis["extracted_data"])
+    fraud_graph.link_dogs(raw_doc.dog_id, [d.dog_id for d in near_duplicates], NEAR_DUPLICATE)
+    affected_dogs = flag_document(
+        raw_doc, get_hash_owners(raw_doc.file_hash), near_duplicates
+    )
+    
+    raw_doc.detected_type = analysis["detected_type"]
+    raw_doc.confidence_score = analysis["confidence_score"]
+    raw_doc.status = DocumentStatus.MANUAL_REVIEW if raw_doc.fraud_flags else analysis["status"]
+    repo.save_raw_document(raw_doc)
+    # Both sides of every match get the document flags in the review queue
+    for dog_id in sorted(affected_dogs):
+        review_queue.refresh_dog(dog_id)
+    
+    return {
+        "document_id": raw_doc.id,
+        "status": raw_doc.status,
+        "detected_type": analysis["detected_type"],
+        "wallet_category": analysis["wallet_category"],
+        "extracted_data": analysis["extracted_data"],
+        "confidence_score": analysis["confidence_score"]
+    }
+
+
+def _load_documents(document_ids: List[str]) -> Dict[str, RawDocument]:
+    """Load a batch's documents (statuses are set as each one starts)."""
+    repo = get_repository()
+    raw_docs = {}
+    for document_id in dict.fromkeys(document_ids):
+        raw_doc = repo.get_raw_document(document_id)
+        if raw_doc is not None:
+            raw_docs[document_id] = raw_doc
+    return raw_docs
+
+
+def _mark_processing(raw_docs: List[RawDocument]) -> None:
+    repo = get_repository()
+    for raw_doc in raw_docs:
+        raw_doc.status = DocumentStatus.PROCESSING
+        repo.save_raw_document(raw_doc)
+
+
+def _reset_documents(raw_docs: List[RawDocument], statuses: Dict[str, DocumentStatus]) -> None:
+    """Put documents whose processing never finished back to their previous status."""
+    repo = get_repository()
+    for raw_doc in raw_docs:
+        raw_doc.status = statuses[raw_doc.id]
+        repo.save_raw_document(raw_doc)
+
+
+def _fail_document(raw_doc: RawDocument, error: str) -> None:
+    raw_doc.status = DocumentStatus.FAILED
+    raw_doc.processing_error = error
+    get_repository().save_raw_document(raw_doc)
+
+
+def _document_processing_failed(error: str, document_id: str) -> None:
+    """Last attempt of a process_document job failed: don't leave it PROCESSING."""
+    raw_doc = get_repository().get_raw_document(document_id)
+    if raw_doc is not None and raw_doc.status == DocumentStatus.PROCESSING:
+        _fail_document(raw_doc, error)
+
+
+async def process_raw_documents(document_ids: List[str]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Process a batch of raw documents in the request, yielding one result
+    per document ID (input order not kept; see "index").
+    Classification and extraction run concurrently (bounded) on the CPU
+    executor, once per distinct file; fraud checks then run per document.
+    """
+    raw_docs = await asyncio.to_thread(_load_documents, document_ids)
+    for index, document_id in enumerate(document_ids):
+        if document_id not in raw_docs:
+            yield {
+                "index": index,
+                "document_id": document_id,
+                "ok": False,
+                "error": "Document not found"
+            }
+
+    # Repeated IDs are processed once and reported at their first index
+    first_index: Dict[str, int] = {}
+    for index, document_id in enumerate(document_ids):
+        first_index.setdefault(document_id, index)
+    batch = list(raw_docs.values())
+    # Documents marked PROCESSING and not finished yet -> status before the batch
+    unfinished: Dict[str, DocumentStatus] = {}
+
+    def start(indices: List[int]) -> None:
+        started = [batch[i] for i in indices]
+        for raw_doc in started:
+            unfinished[raw_doc.id] = raw_doc.status
+        _mark_processing(started)
+
+    try:
+        async for item in DocumentAIService.process_documents(
+            batch, executor=job_queue.cpu_executor, on_start=start
+        ):
+            raw_doc = batch[item.index]
+            line: Dict[str, Any] = {
+                "index": first_index[raw_doc.id],
+                "document_id": raw_doc.id,
+                "deduplicated": item.deduplicated,
+                "cached": item.cached
+            }
+            error = item.error
+            if item.analysis is not None:
+                try:
+                    result = await asyncio.to_thread(_apply_analysis, raw_doc, item.analysis)
+                    line.update(ok=True, result=result)
+                except Exception as e:
+                    logger.exception("Fraud checks failed for document %s", raw_doc.id)
+                    error = f"{type(e).__name__}: {e}"
+            if "result" not in line:
+                await asyncio.to_thread(_fail_document, raw_doc, error)
+                line.update(ok=False, error="Processing failed")
+            unfinished.pop(raw_doc.id, None)
+            yield line
+    finally:
+        # The client disconnected mid-batch: nothing will finish these
+        if unfinished:
+            _reset_documents([raw_docs[i] for i in unfinished], unfinished)
+
+
+job_queue.register(ANALYZE_RECORD_JOB, _run_record_analysis)
+job_queue.register(
+    PROCESS_DOCUMENT_JOB, process_raw_document, on_failure=_document_processing_failed
+)
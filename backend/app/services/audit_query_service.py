@@ -0,0 +1,134 @@
+"""
+Audit Query Service
+
+Ingests audit batches into the store and serves admin queries.
+- Events are filtered through the store's secondary indexes
+  (dog_id, organization_id, event_type, timestamp) with cursor pagination.
+- Per-hour and per-day counters are incremented at ingest, so dashboards
+  read pre-aggregated rollups and never scan raw events.
+"""
+import base64
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ..core.database import get_repository
+from ..core.repository import AuditKey, RollupKey
+from ..models.audit import AuditEvent, EventType
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+
+# Rollup metrics
+SCANS_PER_ORG = "scans_per_org"
+DENIALS_PER_DOG = "denials_per_dog"
+ROLLUP_METRICS = (SCANS_PER_ORG, DENIALS_PER_DOG)
+
+_SCAN_EVENTS = {EventType.QR_CODE_SCANNED, EventType.NFC_TAPPED}
+
+
+def stored_time(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    A query bound in the convention of stored event timestamps: naive local
+    time (datetime.now()). Timezone-aware bounds are converted; naive ones
+    are taken as local time already.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Start of the hour/day bucket containing the timestamp."""
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def rollup_deltas(events: List[AuditEvent]) -> Dict[RollupKey, int]:
+    """Counter increments contributed by a batch of events."""
+    deltas: Counter = Counter()
+    for e in events:
+        if e.event_type in _SCAN_EVENTS:
+            metric, key = SCANS_PER_ORG, e.organization_id or e.actor_id
+        elif e.event_type == EventType.ACCESS_DENIED and e.dog_id:
+            metric, key = DENIALS_PER_DOG, e.dog_id
+        else:
+            continue
+        for granularity in ROLLUP_GRANULARITIES:
+            deltas[(metric, granularity, bucket_start(e.timestamp, granularity), key)] += 1
+    return dict(deltas)
+
+
+def ingest_audit_events(events: List[AuditEvent]) -> int:
+    """
+    Store a batch and update rollups for the events that were new.
+    Safe to call again with the same events (e.g. segment replay).
+    """
+    repo = get_repository()
+    stored = repo.append_audit_events(events)
+    repo.increment_audit_rollups(rollup_deltas(stored))
+    return len(stored)
+
+
+def encode_cursor(key: AuditKey) -> str:
+    raw = f"{key[0].isoformat(timespec='microseconds')}|{key[1]}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> AuditKey:
+    """Decode a cursor; raises ValueError if it is malformed."""
+    try:
+        timestamp, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return stored_time(datetime.fromisoformat(timestamp)), event_id
+    except (UnicodeDecodeError, ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def query_audit_events(
+    dog_id: Optional[str] = None,
+    organization_id: Optional[str] = None,
+    event_type: Optional[EventType] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100
+) -> Tuple[List[AuditEvent], Optional[str]]:
+    """One page of matching events (newest first) and the cursor for the next page."""
+    events = get_repository().query_audit_events(
+        dog_id=dog_id,
+        organization_id=organization_id,
+        event_type=event_type.value if event_type else None,
+        since=stored_time(since),
+        until=stored_time(until),
+        before=decode_cursor(cursor) if cursor else None,
+        limit=limit
+    )
+    next_cursor = None
+    if len(events) == limit:
+        last = events[-1]
+        next_cursor = encode_cursor((last.timestamp, last.id))
+    return events, next_cursor
+
+
+def get_rollups(
+    metric: str,
+    granularity: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    key: Optional[str] = None
+) -> List[Dict[str, object]]:
+    """Pre-aggregated counters for a metric."""
+    if metric not in ROLLUP_METRICS:
+        raise ValueError(f"Unknown metric: {metric}")
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    since, until = stored_time(since), stored_time(until)
+    if since is not None:
+        since = bucket_start(since, granularity)
+    rows = get_repository().get_audit_rollups(metric, granularity, since, until, key)
+    return [
+        {"bucket": bucket, "key": k, "count": count}
+        for bucket, k, count in rows
+    ]
@@ -1,10 +1,12 @@
 """Audit service - log events."""
+import uuid
+from typing import List
 from ..models.audit import AuditEvent, EventType
 from datetime import datetime
-from ..core.database import FAKE_DB
+from .audit_writer import audit_writer
 
 
-def log_audit_event(
+def build_audit_event(
     event_type: EventType,
     actor_id: str,
     actor_type: str,
@@ -14,11 +16,9 @@ def log_audit_event(
     metadata: dict = None,
     success: bool = True,
     error_message: str = None
-):
-    """Log an audit event."""
-    import uuid
-    
-    event = AuditEvent(
+) -> AuditEvent:
+    """Build an audit event without logging it."""
+    return AuditEvent(
         id=str(uuid.uuid4()),
         event_type=event_type,
         timestamp=datetime.now(),
@@ -31,11 +31,37 @@ def log_audit_event(
         success=success,
         error_message=error_message
     )
+
+
+def log_audit_event(
+    event_type: EventType,
+    actor_id: str,
+    actor_type: str,
+    dog_id: str = None,
+    record_id: str = None,
+    organization_id: str = None,
+    metadata: dict = None,
+    success: bool = True,
+    error_message: str = None
+):
+    """Log an audit event (queued; written in the background)."""
+    event = build_audit_event(
+        event_type=event_type,
+        actor_id=actor_id,
+        actor_type=actor_type,
+        dog_id=dog_id,
+        record_id=record_id,
+        organization_id=organization_id,
+        metadata=metadata,
+        success=success,
+        error_message=error_message
+    )
     
-    # Store in fake DB (would be real DB in production)
-    if "audit_events" not in FAKE_DB:
-        FAKE_DB["audit_events"] = []
-    FAKE_DB["audit_events"].append(event)
+    audit_writer.submit(event)
     
     return event
 
+
+def log_audit_events(events: List[AuditEvent]) -> bool:
+    """Queue several pre-built audit events to be written as one batch."""
+    return audit_writer.submit_many(events)
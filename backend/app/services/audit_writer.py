@@ -0,0 +1,279 @@
+"""
+Audit Writer
+
+Takes audit writes off the request path. Requests put events on a bounded
+in-process queue; a background thread drains it in batches to rotating,
+append-only NDJSON segment files and then hands the batch to the query
+layer (the repository).
+
+- Backpressure: when the queue is full the event is either dropped or
+  written synchronously, depending on the overflow policy. Both are counted.
+  Events submitted while the flusher is not running are written synchronously;
+  synchronous writes go to the same segments, so they are replayed too.
+- Durability: segments are fsynced after every batch ("batch"), at most
+  once per interval ("interval"), or left to the OS ("never").
+- Recovery: on startup, segments are replayed into the query layer.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from ..core.config import (
+    AUDIT_LOG_DIR,
+    AUDIT_QUEUE_SIZE,
+    AUDIT_BATCH_SIZE,
+    AUDIT_FLUSH_INTERVAL_SECONDS,
+    AUDIT_SEGMENT_MAX_BYTES,
+    AUDIT_FSYNC_POLICY,
+    AUDIT_FSYNC_INTERVAL_SECONDS,
+    AUDIT_OVERFLOW_POLICY
+)
+from ..models.audit import AuditEvent
+from .audit_query_service import ingest_audit_events
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_PREFIX = "audit-"
+_SEGMENT_SUFFIX = ".ndjson"
+
+
+class AuditWriter:
+    """Batched, append-only audit event writer."""
+
+    def __init__(
+        self,
+        directory: str = AUDIT_LOG_DIR,
+        queue_size: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL_SECONDS,
+        segment_max_bytes: int = AUDIT_SEGMENT_MAX_BYTES,
+        fsync_policy: str = AUDIT_FSYNC_POLICY,  # "batch" | "interval" | "never"
+        fsync_interval: float = AUDIT_FSYNC_INTERVAL_SECONDS,
+        overflow_policy: str = AUDIT_OVERFLOW_POLICY,  # "drop" | "sync"
+    ):
+        self._directory = directory
+        # Items are lists of events submitted together
+        self._queue: "queue.Queue[List[AuditEvent]]" = queue.Queue(maxsize=queue_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._segment_max_bytes = segment_max_bytes
+        self._fsync_policy = fsync_policy
+        self._fsync_interval = fsync_interval
+        self._overflow_policy = overflow_policy
+        self._sinks: List[Callable[[List[AuditEvent]], None]] = [ingest_audit_events]
+
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._file = None
+        # Guards the segment file; the flusher and synchronous writers share it
+        self._lock = threading.Lock()
+        self._segment_seq = 0
+        self._last_fsync = 0.0
+        # Segment names carry start time and pid so workers sharing a
+        # directory never append to each other's files.
+        self._segment_stem = f"{_SEGMENT_PREFIX}{int(time.time())}-{os.getpid()}"
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.overflowed_sync = 0
+        self.write_errors = 0
+        self.segments_rotated = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_sink(self, sink: Callable[[List[AuditEvent]], None]) -> None:
+        """Register an extra consumer of flushed (and replayed) batches."""
+        self._sinks.append(sink)
+
+    def submit(self, event: AuditEvent) -> bool:
+        """
+        Queue an event without blocking.
+        Returns False if the event could not be queued.
+        """
+        return self.submit_many([event])
+
+    def submit_many(self, events: List[AuditEvent]) -> bool:
+        """
+        Queue several events as one unit without blocking; they are written
+        together in a single batch. Returns False if they were dropped.
+        """
+        if not events:
+            return True
+        if not self.running:
+            self._flush(events)
+            return True
+        try:
+            self._queue.put_nowait(events)
+            self.enqueued += len(events)
+            return True
+        except queue.Full:
+            if self._overflow_policy == "sync":
+                self.overflowed_sync += len(events)
+                self._flush(events)
+                return True
+            self.dropped += len(events)
+            return False
+
+    def start(self) -> None:
+        """Replay existing segments, then start the background flusher."""
+        if self.running:
+            return
+        os.makedirs(self._directory, exist_ok=True)
+        self.replay()
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="audit-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush remaining events and stop the flusher."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Still draining; it closes the segment itself when done
+            logger.warning("Audit writer did not stop within %.1fs", timeout)
+            return
+        self._thread = None
+        self._close_segment()
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+            elif self._fsync_policy == "interval":
+                with self._lock:
+                    self._sync()
+        self._close_segment()
+
+    def _close_segment(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._sync(force=True)
+                self._file.close()
+                self._file = None
+
+    def _next_batch(self) -> List[AuditEvent]:
+        """Wait up to the flush interval for the first events, then drain."""
+        try:
+            batch = list(self._queue.get(timeout=self._flush_interval))
+        except queue.Empty:
+            return []
+        while len(batch) < self._batch_size:
+            try:
+                batch.extend(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: List[AuditEvent]) -> None:
+        try:
+            payload = b"".join(
+                e.model_dump_json().encode() + b"\n" for e in batch
+            )
+            with self._lock:
+                segment = self._segment_for(len(payload))
+                segment.write(payload)
+                segment.flush()
+                self._sync(force=self._fsync_policy == "batch")
+        except OSError:
+            self.write_errors += 1
+            logger.exception("Failed to write audit batch of %d events", len(batch))
+        self._deliver(batch)
+        self.written += len(batch)
+        self.batches += 1
+
+    def _deliver(self, batch: List[AuditEvent]) -> None:
+        for sink in self._sinks:
+            try:
+                sink(batch)
+            except Exception:
+                logger.exception("Audit sink failed for batch of %d events", len(batch))
+
+    def _segment_for(self, incoming_bytes: int):
+        """Current segment file, rotating first if it would grow past the limit."""
+        if self._file is not None and (
+            self._file.tell() + incoming_bytes > self._segment_max_bytes
+        ):
+            self._sync(force=True)
+            self._file.close()
+            self._file = None
+            self.segments_rotated += 1
+        if self._file is None:
+            os.makedirs(self._directory, exist_ok=True)
+            self._segment_seq += 1
+            name = f"{self._segment_stem}-{self._segment_seq:06d}{_SEGMENT_SUFFIX}"
+            self._file = open(os.path.join(self._directory, name), "ab")
+        return self._file
+
+    def _sync(self, force: bool = False) -> None:
+        if self._file is None or self._fsync_policy == "never":
+            return
+        now = time.monotonic()
+        if force or now - self._last_fsync >= self._fsync_interval:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def _segment_paths(self) -> List[str]:
+        if not os.path.isdir(self._directory):
+            return []
+        return sorted(
+            os.path.join(self._directory, name)
+            for name in os.listdir(self._directory)
+            if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX)
+        )
+
+    def iter_segment_events(self) -> Iterator[AuditEvent]:
+        """Read every event in every segment, oldest segment first."""
+        for path in self._segment_paths():
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        yield AuditEvent.model_validate_json(line)
+                    except ValueError:
+                        # Torn final line from a crash mid-write
+                        logger.warning("Skipping unreadable audit line in %s", path)
+
+    def replay(self) -> int:
+        """Feed all segment events to the sinks. Returns the number replayed."""
+        count = 0
+        batch: List[AuditEvent] = []
+        for event in self.iter_segment_events():
+            batch.append(event)
+            if len(batch) >= self._batch_size:
+                self._deliver(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._deliver(batch)
+            count += len(batch)
+        return count
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "overflowed_sync": self.overflowed_sync,
+            "write_errors": self.write_errors,
+            "segments_rotated": self.segments_rotated,
+        }
+
+
+# Process-wide writer (started/stopped with the app)
+audit_writer = AuditWriter()
@@ -0,0 +1,473 @@
+"""
+Batch Scoring
+
+Rescores many dogs at once (threshold or breed table changes) with the
+same results as VerificationEngine.compute_internal_scores and
+determine_verification_level, dog for dog.
+- Dogs and their records (VerificationRecords) are laid out column-wise in NumPy
+  arrays (breed/role indices, weights; per-record dog index, document
+  type and wallet category codes, verification flags, record year).
+- Per-dog evidence is aggregated with bincount into (dog x code) count
+  matrices, and each score is a handful of vectorized passes over them.
+- Scores are accumulated in the per-dog path's order, so the floats match
+  bit for bit.
+- Verification levels come from the same compiled rule tables as the
+  per-dog path (rule_engine), evaluated column-wise per distinct table.
+
+The population is processed in chunks of dogs with one bulk record read
+per chunk. INTERNAL ONLY - scores are never exposed to businesses.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+import numpy as np
+
+from ..core.config import BATCH_SCORING_CHUNK_SIZE
+from ..core.database import get_repository
+from ..core.job_queue import Job, job_queue
+from ..models.breed import BREED_DATABASE
+from ..models.document import DocumentType, WalletCategory
+from ..models.dog import Dog
+from ..models.verification import (
+    InternalVerificationScores,
+    ServiceRole,
+    VerificationHistory,
+    VerificationLevel
+)
+from .evidence_summary import EvidenceFlag, bit_key_flag, document_types_matching
+from .verification_record import LEGACY_CATEGORIES, VerificationRecord, to_verification_records
+from .public_status_cache import public_status_cache
+from .review_queue_service import review_queue
+from .rule_engine import RuleColumns, rule_engine
+
+logger = logging.getLogger(__name__)
+
+RESCORE_JOB = "rescore_all_dogs"
+
+_DOC_TYPES = list(DocumentType)
+_DOC_CODE = {t: i for i, t in enumerate(_DOC_TYPES)}
+_WALLET_CODE = {c: i for i, c in enumerate(WalletCategory)}
+_ROLES = list(ServiceRole)
+_ROLE_CODE = {r: i for i, r in enumerate(_ROLES)}
+_LEGACY_CODE = {c: i for i, c in enumerate(LEGACY_CATEGORIES)}
+_SCREENING_TYPES = [_DOC_CODE[t] for t in document_types_matching(("screening",))]
+
+_LEVELS = list(VerificationLevel)
+_LEVEL_CODE = {level: i for i, level in enumerate(_LEVELS)}
+
+
+def _type_mask(doc_types) -> np.ndarray:
+    mask = np.zeros(len(_DOC_TYPES), dtype=np.int64)
+    for t in doc_types:
+        mask[_DOC_CODE[t]] = 1
+    return mask
+
+
+class _BreedTables:
+    """Breed database as arrays; the last row stands for unknown breeds."""
+
+    def __init__(self):
+        names = list(BREED_DATABASE)
+        self.index = {name: i for i, name in enumerate(names)}
+        unknown = len(names)
+        self.unknown = unknown
+        self.known = np.zeros(unknown + 1, dtype=bool)
+        self.known[:unknown] = True
+        self.compatibility = np.full((unknown + 1, len(_ROLES)), 0.5)
+        self.role_fit = np.zeros((unknown + 1, len(_ROLES)), dtype=bool)
+        self.recommended_count = np.zeros(unknown + 1, dtype=np.int64)
+        # Document types counted toward the breed's recommended screenings
+        self.recommended_types = np.zeros((unknown + 1, len(_DOC_TYPES)), dtype=np.int64)
+        # Top 2 recommended screenings: types that satisfy each one
+        self.top_screenings: List[List[Optional[str]]] = []
+        self.top_types = np.zeros((2, unknown + 1, len(_DOC_TYPES)), dtype=np.int64)
+
+        for i, name in enumerate(names):
+            info = BREED_DATABASE[name]
+            for j, role in enumerate(_ROLES):
+                if role in info.ideal_service_roles:
+                    self.compatibility[i, j] = 1.0
+                    self.role_fit[i, j] = True
+                elif role in info.suitable_service_roles:
+                    self.compatibility[i, j] = 0.8
+                    self.role_fit[i, j] = True
+                else:
+                    self.compatibility[i, j] = 0.6
+            recommended = info.recommended_screenings
+            self.recommended_count[i] = len(recommended)
+            self.recommended_types[i] = _type_mask(document_types_matching(tuple(recommended)))
+            top = list(recommended[:2])
+            for k, screening in enumerate(top):
+                self.top_types[k, i] = _type_mask(
+                    t for t in _DOC_TYPES if screening in t.value
+                )
+            self.top_screenings.append(top + [None] * (2 - len(top)))
+        self.top_screenings.append([None, None])
+
+    def breed_codes(self, dogs: Sequence[Dog]) -> np.ndarray:
+        return np.fromiter(
+            (self.index.get(d.breed, self.unknown) for d in dogs),
+            dtype=np.int64,
+            count=len(dogs)
+        )
+
+
+class BatchScores:
+    """Scores and verification levels for a batch of dogs, as arrays."""
+
+    def __init__(
+        self,
+        dogs: Sequence[Dog],
+        service_eligibility: np.ndarray,
+        training: np.ndarray,
+        health: np.ndarray,
+        compatibility: np.ndarray,
+        levels: np.ndarray,
+        requires_review: np.ndarray,
+        mismatch_flags: List[List[str]],
+        computed_at: datetime
+    ):
+        self.dogs = dogs
+        self.service_eligibility = service_eligibility
+        self.training = training
+        self.health = health
+        self.compatibility = compatibility
+        self.levels = levels
+        self.requires_review = requires_review
+        self.mismatch_flags = mismatch_flags
+        self.computed_at = computed_at
+
+    def __len__(self) -> int:
+        return len(self.dogs)
+
+    def level(self, i: int) -> VerificationLevel:
+        return _LEVELS[self.levels[i]]
+
+    def internal_scores(self, i: int) -> InternalVerificationScores:
+        """The i-th dog's scores, as compute_internal_scores returns them."""
+        flags = self.mismatch_flags[i]
+        requires_review = bool(self.requires_review[i])
+        review_reason = None
+        if requires_review:
+            review_reason = "; ".join(flags) if flags else "Low scores require review"
+        return InternalVerificationScores(
+            dog_id=self.dogs[i].id,
+            service_eligibility_score=float(self.service_eligibility[i]),
+            training_evidence_score=float(self.training[i]),
+            health_completeness_score=float(self.health[i]),
+            task_breed_compatibility_score=float(self.compatibility[i]),
+            fraud_flags=[],
+            mismatch_flags=list(flags),
+            requires_human_review=requires_review,
+            review_reason=review_reason,
+            last_updated=self.computed_at,
+            updated_by="system"
+        )
+
+    def level_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.levels, minlength=len(_LEVELS))
+        return {level.value: int(counts[i]) for i, level in enumerate(_LEVELS)}
+
+
+def _record_columns(
+    records_by_dog: Sequence[Sequence[VerificationRecord]]
+) -> Tuple[np.ndarray, ...]:
+    """
+    (dog index, doc type, wallet category, legacy category, active, accepted,
+    vet, trainer, expiring soon, year) per record. Codes are -1 where a
+    record's schema has no such field.
+    """
+    total = sum(len(records) for records in records_by_dog)
+    dog_idx = np.empty(total, dtype=np.int64)
+    doc_type = np.full(total, -1, dtype=np.int64)
+    wallet = np.full(total, -1, dtype=np.int64)
+    legacy = np.full(total, -1, dtype=np.int64)
+    active = np.empty(total, dtype=bool)
+    accepted = np.empty(total, dtype=bool)
+    vet = np.empty(total, dtype=bool)
+    trainer = np.empty(total, dtype=bool)
+    expiring = np.empty(total, dtype=bool)
+    year = np.zeros(total, dtype=np.int64)
+    j = 0
+    for i, records in enumerate(records_by_dog):
+        for r in records:
+            dog_idx[j] = i
+            if r.normalized:
+                doc_type[j] = _DOC_CODE[r.document_type]
+                wallet[j] = _WALLET_CODE[r.wallet_category]
+                year[j] = r.record_date.year
+            else:
+                legacy[j] = _LEGACY_CODE.get(r.category, -1)
+            active[j] = r.active
+            accepted[j] = r.accepted
+            vet[j] = r.vet_verified
+            trainer[j] = r.trainer_verified
+            expiring[j] = r.expiring_soon
+            j += 1
+    return dog_idx, doc_type, wallet, legacy, active, accepted, vet, trainer, expiring, year
+
+
+def _count_by_dog(dog_idx: np.ndarray, codes: np.ndarray, n: int, width: int) -> np.ndarray:
+    """(n, width) matrix counting records per dog and code."""
+    return np.bincount(dog_idx * width + codes, minlength=n * width).reshape(n, width)
+
+
+def _any_by_dog(dog_idx: np.ndarray, n: int) -> np.ndarray:
+    return np.bincount(dog_idx, minlength=n) > 0
+
+
+class _EvidenceColumns(RuleColumns):
+    """Rule inputs for a batch: evidence bits from the record columns, and scores."""
+
+    def __init__(
+        self,
+        n: int,
+        records: Tuple[np.ndarray, ...],
+        scores: Dict[str, np.ndarray],
+        requires_review: np.ndarray
+    ):
+        self.size = n
+        dog_idx, doc_type, wallet, legacy, active, accepted, vet, trainer, expiring, _ = records
+        self._dog_idx = dog_idx
+        self._doc_type = doc_type
+        self._wallet = wallet
+        self._legacy = legacy
+        # Record-level flags, as EvidenceSummary sets them
+        self._flags = {
+            EvidenceFlag.PRESENT: np.ones(len(dog_idx), dtype=bool),
+            EvidenceFlag.ACTIVE: active,
+            EvidenceFlag.ACCEPTED: accepted,
+            EvidenceFlag.VET_VERIFIED: vet,
+            EvidenceFlag.TRAINER_VERIFIED: trainer,
+            EvidenceFlag.VET_VERIFIED_ACTIVE: vet & active,
+            EvidenceFlag.TRAINER_VERIFIED_ACTIVE: trainer & active,
+            EvidenceFlag.EXPIRING_SOON: expiring & active,
+        }
+        self._scores = scores
+        self._requires_review = requires_review
+        self._bits: Dict[int, np.ndarray] = {}
+
+    def bit(self, bit: int) -> np.ndarray:
+        column = self._bits.get(bit)
+        if column is None:
+            key, flag = bit_key_flag(bit)
+            if isinstance(key, DocumentType):
+                matches = self._doc_type == _DOC_CODE[key]
+            elif isinstance(key, WalletCategory):
+                matches = self._wallet == _WALLET_CODE[key]
+            else:
+                matches = self._legacy == _LEGACY_CODE[key]
+            column = _any_by_dog(self._dog_idx[matches & self._flags[flag]], self.size)
+            self._bits[bit] = column
+        return column
+
+    def score(self, name: str) -> np.ndarray:
+        return self._scores[name]
+
+    def requires_review(self) -> np.ndarray:
+        return self._requires_review
+
+
+def _decide_levels(dogs: Sequence[Dog], cols: _EvidenceColumns) -> np.ndarray:
+    """Level codes from the verification_level rules, per distinct rule table."""
+    rules = rule_engine.rules()
+    groups: Dict[int, Tuple[Any, List[int]]] = {}
+    for i, dog in enumerate(dogs):
+        table = rules.table_for("verification_level", dog)
+        groups.setdefault(id(table), (table, []))[1].append(i)
+
+    levels = np.empty(len(dogs), dtype=np.int64)
+    for table, members in groups.values():
+        rows = table.decide_columns(cols)[members]
+        row_levels = np.array([_LEVEL_CODE[result] for _, _, result in table.rows])
+        levels[members] = row_levels[rows]
+        counts = np.bincount(rows, minlength=len(table.rows))
+        rule_engine.count_hits(
+            "verification_level",
+            {rule_id: int(c) for (rule_id, _, _), c in zip(table.rows, counts) if c}
+        )
+    return levels
+
+
+def score_batch(
+    dogs: Sequence[Dog],
+    records_by_dog: Sequence[Sequence[VerificationRecord]],
+    now: Optional[datetime] = None
+) -> BatchScores:
+    """
+    Score dogs[i] against records_by_dog[i], matching the per-dog
+    VerificationEngine path. Legacy records only count toward rules on
+    legacy evidence; they carry no scores.
+    """
+    now = now or datetime.now()
+    tables = _BreedTables()
+    n = len(dogs)
+    records = _record_columns(records_by_dog)
+    dog_idx, doc_type, wallet, _, active, _, vet, trainer, _, year = records
+    normalized = doc_type >= 0
+
+    breed = tables.breed_codes(dogs)
+    role = np.fromiter((_ROLE_CODE[d.service_role] for d in dogs), dtype=np.int64, count=n)
+    weight = np.fromiter(
+        (d.weight if d.weight is not None else np.nan for d in dogs),
+        dtype=np.float64,
+        count=n
+    )
+
+    # Evidence: ACTIVE counts per document type
+    typed = active & normalized
+    active_types = _count_by_dog(dog_idx[typed], doc_type[typed], n, len(_DOC_TYPES))
+    has_type = active_types > 0
+    any_vet = _any_by_dog(dog_idx[vet], n)
+    has_rabies = has_type[:, _DOC_CODE[DocumentType.RABIES_CERTIFICATE]]
+    has_dhpp = has_type[:, _DOC_CODE[DocumentType.DHPP]]
+
+    # Service eligibility
+    service = np.zeros(n)
+    service += np.where(has_rabies, 0.3, 0.0)
+    service += np.where(has_type[:, _DOC_CODE[DocumentType.SERVICE_TASK_ATTESTATION]], 0.3, 0.0)
+    service += np.where(has_type[:, _DOC_CODE[DocumentType.PUBLIC_ACCESS_TEST]], 0.2, 0.0)
+    service += np.where(has_type[:, _SCREENING_TYPES].any(axis=1), 0.2, 0.0)
+    service = np.minimum(service, 1.0)
+
+    # Training evidence
+    in_training = wallet == _WALLET_CODE[WalletCategory.TRAINING_VERIFICATION]
+    has_training_records = _any_by_dog(dog_idx[in_training], n)
+    trainer_verified = _any_by_dog(dog_idx[in_training & trainer], n)
+    recent = _any_by_dog(dog_idx[in_training & (year >= now.year - 2)], n)
+    training = np.full(n, 0.5)
+    training += np.where(trainer_verified, 0.3, 0.0)
+    training += np.where(recent, 0.2, 0.0)
+    training = np.where(has_training_records, np.minimum(training, 1.0), 0.0)
+
+    # Health completeness
+    health = np.zeros(n)
+    health += np.where(has_rabies, 0.3, 0.0)
+    health += np.where(has_dhpp, 0.2, 0.0)
+    completed = (active_types * tables.recommended_types[breed]).sum(axis=1)
+    recommended = tables.recommended_count[breed]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        screening_share = 0.3 * (completed / recommended)
+    health += np.where(recommended > 0, screening_share, 0.0)
+    health += np.where(any_vet, 0.2, 0.0)
+    health = np.minimum(health, 1.0)
+
+    compatibility = tables.compatibility[breed, role]
+
+    # Mismatch flags
+    small_for_mobility = (
+        (role == _ROLE_CODE[ServiceRole.MOBILITY]) & (weight != 0) & (weight < 50)
+    )
+    breed_mismatch = tables.known[breed] & ~tables.role_fit[breed, role]
+    missing_top = [
+        tables.known[breed] & (tables.recommended_count[breed] > k)
+        & ((active_types * tables.top_types[k][breed]).sum(axis=1) == 0)
+        for k in range(2)
+    ]
+    flagged = small_for_mobility | breed_mismatch | missing_top[0] | missing_top[1]
+
+    mismatch_flags: List[List[str]] = [[] for _ in range(n)]
+    for i in np.flatnonzero(flagged):
+        dog = dogs[i]
+        flags = mismatch_flags[i]
+        if small_for_mobility[i]:
+            flags.append(
+                f"Small size ({dog.weight} lbs) for mobility task - requires additional documentation"
+            )
+        if breed_mismatch[i]:
+            flags.append(
+                f"Breed-task mismatch: {dog.breed} not typically used for {dog.service_role.value}"
+            )
+        for k in range(2):
+            if missing_top[k][i]:
+                screening = tables.top_screenings[breed[i]][k]
+                flags.append(f"Missing recommended screening: {screening} for {dog.breed}")
+
+    requires_review = flagged | (service < 0.7) | (training < 0.7)
+
+    # Verification level
+    cols = _EvidenceColumns(
+        n,
+        records,
+        {
+            "service_eligibility": service,
+            "training_evidence": training,
+            "health_completeness": health,
+            "task_breed_compatibility": compatibility,
+        },
+        requires_review
+    )
+    levels = _decide_levels(dogs, cols)
+
+    return BatchScores(
+        dogs, service, training, health, compatibility, levels,
+        requires_review, mismatch_flags, now
+    )
+
+
+def iter_population(chunk_size: int = BATCH_SCORING_CHUNK_SIZE) -> Iterator[BatchScores]:
+    """Score every dog, one chunk of dogs (and one bulk record read) at a time."""
+    repo = get_repository()
+    dogs = repo.list_dogs()
+    now = datetime.now()
+    for start in range(0, len(dogs), chunk_size):
+        chunk = dogs[start:start + chunk_size]
+        bulk = repo.list_records_for_dogs([d.id for d in chunk])
+        records = [to_verification_records(bulk.get(d.id, [])) for d in chunk]
+        yield score_batch(chunk, records, now)
+
+
+def apply_batch(batch: BatchScores, reason: str) -> int:
+    """
+    Store a batch's scores, save changed verification levels with a
+    VerificationHistory entry each, and update the review queue.
+    Returns the number of level changes.
+    """
+    repo = get_repository()
+    scores = [batch.internal_scores(i) for i in range(len(batch))]
+    repo.save_internal_scores(scores)
+    history = []
+    for i, dog in enumerate(batch.dogs):
+        level = batch.level(i)
+        if level != dog.verification_level:
+            # Re-read so a concurrent profile edit is not overwritten
+            dog = repo.get_dog(dog.id) or dog
+            history.append(VerificationHistory(
+                id=f"vh-{uuid4()}",
+                dog_id=dog.id,
+                from_level=dog.verification_level,
+                to_level=level,
+                reason=reason,
+                changed_by="system",
+                changed_at=batch.computed_at
+            ))
+            dog = dog.model_copy(
+                update={"verification_level": level, "updated_at": batch.computed_at}
+            )
+            repo.save_dog(dog)
+            public_status_cache.on_dog_saved(dog)
+        review_queue.apply_scores(dog, scores[i])
+    repo.append_verification_history(history)
+    return len(history)
+
+
+def rescore_all(chunk_size: int = BATCH_SCORING_CHUNK_SIZE) -> Dict[str, Any]:
+    """Rescore the whole population and apply the results (job handler)."""
+    scored = changed = 0
+    levels = {level.value: 0 for level in _LEVELS}
+    for batch in iter_population(chunk_size):
+        changed += apply_batch(batch, "Population rescore")
+        for level, count in batch.level_counts().items():
+            levels[level] += count
+        scored += len(batch)
+    logger.info("Rescored %d dogs, %d level changes", scored, changed)
+    return {"dogs_scored": scored, "levels_changed": changed, "levels": levels}
+
+
+def submit_rescore_all() -> Job:
+    return job_queue.submit(RESCORE_JOB, {}, tenant_id="admin")
+
+
+job_queue.register(RESCORE_JOB, rescore_all)
@@ -0,0 +1,117 @@
+"""
+Blob Store
+
+Content-addressed local storage for uploaded files.
+- Files are streamed in fixed-size chunks; SHA-256 and size are computed
+  as bytes arrive and the size limit is enforced mid-stream.
+- Each blob lives at <root>/<h[0:2]>/<h[2:4]>/<sha256>, written to a temp
+  file, fsynced and renamed into place, so readers never see partial files.
+- Identical content is stored once. References (one per RawDocument) are
+  counted in the repository; a blob is deleted when its last reference goes.
+"""
+import hashlib
+import os
+import uuid
+from typing import BinaryIO, NamedTuple, Optional
+
+from ..core.config import BLOB_STORE_DIR, UPLOAD_CHUNK_BYTES, UPLOAD_MAX_BYTES
+from ..core.database import get_repository
+
+_TMP_DIR = "tmp"
+
+
+class BlobTooLarge(Exception):
+    """Raised when a stream exceeds the size limit."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File exceeds the {max_bytes} byte limit")
+        self.max_bytes = max_bytes
+
+
+class StoredBlob(NamedTuple):
+    file_hash: str
+    size: int
+    created: bool  # False if identical content was already stored
+
+
+class BlobStore:
+    """Sharded, hash-named blob files with atomic writes."""
+
+    def __init__(
+        self,
+        root: str = BLOB_STORE_DIR,
+        chunk_bytes: int = UPLOAD_CHUNK_BYTES,
+        max_bytes: int = UPLOAD_MAX_BYTES
+    ):
+        self._root = root
+        self._chunk_bytes = chunk_bytes
+        self._max_bytes = max_bytes
+
+    def path_for(self, file_hash: str) -> str:
+        return os.path.join(self._root, file_hash[:2], file_hash[2:4], file_hash)
+
+    def url_for(self, file_hash: str) -> str:
+        return f"blob://sha256/{file_hash}"
+
+    def exists(self, file_hash: str) -> bool:
+        return os.path.exists(self.path_for(file_hash))
+
+    def put_stream(self, stream: BinaryIO, max_bytes: Optional[int] = None) -> StoredBlob:
+        """
+        Copy a stream into the store chunk by chunk.
+        Raises BlobTooLarge (leaving nothing behind) past the size limit.
+        """
+        limit = self._max_bytes if max_bytes is None else max_bytes
+        tmp_dir = os.path.join(self._root, _TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, f"{os.getpid()}-{uuid.uuid4().hex}")
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, "wb") as out:
+                while True:
+                    chunk = stream.read(self._chunk_bytes)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > limit:
+                        raise BlobTooLarge(limit)
+                    digest.update(chunk)
+                    out.write(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+
+            file_hash = digest.hexdigest()
+            final_path = self.path_for(file_hash)
+            created = not os.path.exists(final_path)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            # Atomic on POSIX. Renaming over an existing copy (same content)
+            # also keeps the blob present if a release() raced with us.
+            os.replace(tmp_path, final_path)
+            return StoredBlob(file_hash, size, created)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def open(self, file_hash: str) -> BinaryIO:
+        return open(self.path_for(file_hash), "rb")
+
+    def add_reference(self, file_hash: str) -> int:
+        """Count one more document using the blob. Returns the new count."""
+        return get_repository().adjust_blob_refcount(file_hash, 1)
+
+    def release(self, file_hash: str) -> int:
+        """Drop a reference, deleting the blob with its last one. Returns the new count."""
+        remaining = get_repository().adjust_blob_refcount(file_hash, -1)
+        if remaining <= 0:
+            try:
+                os.remove(self.path_for(file_hash))
+            except FileNotFoundError:
+                pass
+        return remaining
+
+
+# Process-wide store
+blob_store = BlobStore()
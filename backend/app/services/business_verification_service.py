@@ -4,11 +4,14 @@ Business Verification Service
 Public-facing service for businesses to verify dogs.
 CRITICAL: Only returns ADA-safe information - NO internal scores, NO breed warnings.
 """
-from typing import Optional
+from typing import List, Optional, Tuple
 from ..models.verification import PublicStatusSummary
 from ..models.dog import Dog
-from ..models.document import NormalizedRecord, WalletCategory
+from ..models.document import WalletCategory
 from ..models.handler import Handler
+from .evidence_summary import EvidenceFlag, EvidenceSummary
+from .rule_engine import rule_engine
+from .verification_record import VerificationRecord
 
 
 class BusinessVerificationService:
@@ -21,7 +24,8 @@ class BusinessVerificationService:
     def get_public_status(
         dog: Dog,
         handler: Handler,
-        records: list  # Can be NormalizedRecord or legacy Record
+        records: List[VerificationRecord],
+        evidence: Optional[EvidenceSummary] = None
     ) -> PublicStatusSummary:
         """
         Get ADA-safe public status summary for business verification.
@@ -29,51 +33,20 @@ class BusinessVerificationService:
         This is what businesses see when they scan a QR code.
         NO internal scores, NO breed warnings, NO fraud flags.
         """
+        if evidence is None:
+            evidence = EvidenceSummary.from_records(records)
+
         # Compute vaccination status
         vaccination_status = BusinessVerificationService._compute_vaccination_status(
-            records
+            records, evidence
         )
         
-        # Check training verification (handle both NormalizedRecord and legacy Record)
-        training_verified = False
-        if records:
-            # Try NormalizedRecord format
-            if hasattr(records[0], 'wallet_category'):
-                training_verified = any(
-                    hasattr(r, 'wallet_category') and
-                    r.wallet_category == WalletCategory.TRAINING_VERIFICATION
-                    and getattr(r, 'trainer_verified', False)
-                    and getattr(r, 'is_active', True)
-                    for r in records
-                )
-            # Try legacy Record format
-            elif hasattr(records[0], 'category'):
-                training_verified = any(
-                    r.category == "training" and
-                    getattr(r, 'analysis_status', None) == "accepted"
-                    for r in records
-                )
-        
-        # Check vet verification
-        vet_verified = False
-        if records:
-            if hasattr(records[0], 'vet_verified'):
-                vet_verified = any(
-                    getattr(r, 'vet_verified', False) and
-                    getattr(r, 'is_active', True)
-                    for r in records
-                )
-        
-        # Check public access test
-        public_access_passed = False
-        if records:
-            if hasattr(records[0], 'document_type'):
-                public_access_passed = any(
-                    hasattr(r, 'document_type') and
-                    getattr(r.document_type, 'value', '') == "public_access_test"
-                    and getattr(r, 'is_active', True)
-                    for r in records
-                )
+        # Training, vet and public access checks are verification rules
+        training_verified = rule_engine.decide("training_verified", dog, evidence.mask)
+        vet_verified = rule_engine.decide("vet_verified", dog, evidence.mask)
+        public_access_passed = rule_engine.decide(
+            "public_access_test_passed", dog, evidence.mask
+        )
         
         # Behavior status (would be updated from recent scans/incidents)
         behavior_status = "calm"  # Would be computed from recent audit events
@@ -101,76 +74,55 @@ class BusinessVerificationService:
         )
     
     @staticmethod
-    def _compute_vaccination_status(records: list) -> str:
-        """Compute vaccination status from records."""
-        from datetime import date
-        
-        if not records:
-            return "expired"
-        
-        # Handle NormalizedRecord format
-        if hasattr(records[0], 'wallet_category'):
-            vaccination_records = [
-                r for r in records
-                if hasattr(r, 'wallet_category') and
-                r.wallet_category == WalletCategory.VACCINATIONS
-                and getattr(r, 'is_active', True)
-            ]
-        # Handle legacy Record format
-        elif hasattr(records[0], 'category'):
-            vaccination_records = [
-                r for r in records
-                if r.category == "vaccination"
-                and getattr(r, 'analysis_status', None) != "denied"
-            ]
-        else:
-            vaccination_records = []
-        
-        if not vaccination_records:
+    def resolve_token(token: str) -> Tuple[str, str]:
+        """
+        Map a scanned token to (dog_id, source).
+        Source is "qr", "nfc" or "dog_id" (a plain dog ID).
+        """
+        # In production, QR codes and NFC tokens would be looked up
+        if token.startswith("nfc_"):
+            return token[len("nfc_"):], "nfc"
+        if token.startswith("/qr/"):
+            return token[len("/qr/"):], "qr"
+        if token.startswith("qr_"):
+            return token[len("qr_"):], "qr"
+        return token, "dog_id"
+    
+    @staticmethod
+    def _compute_vaccination_status(
+        records: List[VerificationRecord],
+        evidence: Optional[EvidenceSummary] = None
+    ) -> str:
+        """
+        Compute vaccination status from records.
+        Expiry comes from the records' flags (expiration scheduler), not dates.
+        """
+        if evidence is None:
+            evidence = EvidenceSummary.from_records(records)
+
+        # Unexpired active NormalizedRecord vaccinations or non-denied legacy vaccinations
+        has_vaccinations = (
+            evidence.has(WalletCategory.VACCINATIONS)
+            or evidence.has("vaccination")
+        )
+        if not has_vaccinations:
             return "expired"
         
         # Check if any are expiring soon (within 30 days)
-        today = date.today()
-        expiring_soon = any(
-            r.expiration_date
-            and (r.expiration_date - today).days <= 30
-            for r in vaccination_records
-        )
-        
-        if expiring_soon:
+        if (
+            evidence.has(WalletCategory.VACCINATIONS, EvidenceFlag.EXPIRING_SOON)
+            or evidence.has("vaccination", EvidenceFlag.EXPIRING_SOON)
+        ):
             return "expiring_soon"
         
-        # Check if any are expired
-        expired = any(
-            r.expiration_date
-            and r.expiration_date < today
-            for r in vaccination_records
-        )
-        
-        if expired:
-            return "expired"
-        
         return "current"
     
     @staticmethod
-    def _extract_tasks_description(records: list) -> str:
+    def _extract_tasks_description(records: List[VerificationRecord]) -> str:
         """Extract task description from training records."""
-        if not records:
-            return "Service dog tasks"
-        
-        # Handle NormalizedRecord format
-        if hasattr(records[0], 'wallet_category'):
-            training_records = [
-                r for r in records
-                if hasattr(r, 'wallet_category') and
-                r.wallet_category == WalletCategory.TRAINING_VERIFICATION
-            ]
-            
-            for record in training_records:
-                if hasattr(record, 'extracted_data'):
-                    tasks = record.extracted_data.get("tasks_certified", [])
-                    if tasks:
-                        return ", ".join(tasks)
+        for record in records:
+            if record.wallet_category == WalletCategory.TRAINING_VERIFICATION and record.tasks:
+                return ", ".join(record.tasks)
         
         return "Service dog tasks"
 
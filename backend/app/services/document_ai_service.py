@@ -4,8 +4,15 @@ Document AI Processing Service
 Handles OCR, classification, and extraction from uploaded documents.
 This is where the "Vet Wallet AI" lives.
 """
-from typing import Dict, Any, Optional
+import asyncio
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
 from datetime import datetime
+from ..core.config import DOCUMENT_BATCH_CONCURRENCY
 from ..models.document import (
     RawDocument,
     NormalizedRecord,
@@ -13,6 +20,39 @@ from ..models.document import (
     WalletCategory,
     DocumentStatus
 )
+from .blob_store import blob_store
+from .document_classifier import Classification, document_classifier
+from .extraction_cache import extraction_cache
+from .field_extractor import field_extractor
+from .pdf_text import PdfError, iter_pdf_text
+
+logger = logging.getLogger(__name__)
+
+# Bump when classification or extraction changes, so cached results miss
+EXTRACTOR_VERSION = "5"
+
+# Classification reads the start of the first page with text
+_CLASSIFY_MAX_CHARS = 20000
+
+_SCREENING_TYPES = frozenset({
+    DocumentType.HIP_SCREENING,
+    DocumentType.ELBOW_SCREENING,
+    DocumentType.EYE_SCREENING,
+    DocumentType.CARDIAC_SCREENING
+})
+_TRAINING_TYPES = frozenset({
+    DocumentType.SERVICE_TASK_ATTESTATION,
+    DocumentType.TRAINING_CERTIFICATE,
+    DocumentType.PUBLIC_ACCESS_TEST
+})
+
+
+class BatchAnalysis(NamedTuple):
+    index: int  # position in the batch
+    analysis: Optional[Dict[str, Any]]
+    error: Optional[str]
+    deduplicated: bool  # reused the analysis of an identical file in the batch
+    cached: bool  # came from the extraction cache
 
 
 class DocumentAIService:
@@ -23,74 +63,198 @@ class DocumentAIService:
     
     @staticmethod
     async def process_document(raw_doc: RawDocument) -> Dict[str, Any]:
+        """
+        Process a raw document without blocking the event loop.
+        Prefer enqueueing a "process_document" job (analysis_service).
+        """
+        return await asyncio.to_thread(DocumentAIService.analyze, raw_doc)
+    
+    @staticmethod
+    async def process_documents(
+        raw_docs: Sequence[RawDocument],
+        concurrency: int = DOCUMENT_BATCH_CONCURRENCY,
+        executor: Optional[Executor] = None,
+        on_start: Optional[Callable[[List[int]], None]] = None
+    ) -> AsyncIterator[BatchAnalysis]:
+        """
+        Process a batch of raw documents, yielding results as they finish.
+        
+        Documents with the same file_hash share one content analysis (text
+        scores and fields); files analyzed before are served from the
+        extraction cache. Filename scoring and checks run per document.
+        At most `concurrency` analyses run at once, on `executor` (a process
+        pool for CPU-bound work; default: the loop's thread pool).
+        `on_start(indices)` runs (in a thread) as the analysis shared by
+        those batch positions starts.
+        A failed analysis is reported per document and never ends the batch.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+        by_hash: Dict[str, List[int]] = {}
+        for i, raw_doc in enumerate(raw_docs):
+            by_hash.setdefault(raw_doc.file_hash, []).append(i)
+        
+        async def run(indices: List[int]):
+            raw_doc = raw_docs[indices[0]]
+            async with semaphore:
+                if on_start is not None:
+                    await asyncio.to_thread(on_start, indices)
+                content = await asyncio.to_thread(DocumentAIService.cached_content, raw_doc)
+                if content is not None:
+                    return indices, content, None, True
+                try:
+                    content = await loop.run_in_executor(
+                        executor, DocumentAIService.analyze_content, raw_doc
+                    )
+                except Exception as e:
+                    return indices, None, f"{type(e).__name__}: {e}", False
+                await asyncio.to_thread(DocumentAIService.store_content, raw_doc, content)
+            return indices, content, None, False
+        
+        tasks = [asyncio.ensure_future(run(indices)) for indices in by_hash.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, content, error, cached = await next_done
+                for n, i in enumerate(indices):
+                    analysis = None
+                    if content is not None:
+                        # Filename-dependent scoring is redone per document
+                        analysis = DocumentAIService.finish_analysis(raw_docs[i], content)
+                    yield BatchAnalysis(i, analysis, error, n > 0, cached)
+        finally:
+            # The consumer stopped early (e.g. client disconnected)
+            for task in tasks:
+                task.cancel()
+    
+    @staticmethod
+    def cached_content(raw_doc: RawDocument) -> Optional[Dict[str, Any]]:
+        """Content analysis of an identical file processed before (extraction cache), if any."""
+        return extraction_cache.get(raw_doc.file_hash, EXTRACTOR_VERSION)
+    
+    @staticmethod
+    def store_content(raw_doc: RawDocument, content: Dict[str, Any]) -> None:
+        """Cache a content analysis for later uploads of the same file."""
+        extraction_cache.put(raw_doc.file_hash, EXTRACTOR_VERSION, content)
+    
+    @staticmethod
+    def analyze(raw_doc: RawDocument, text: str = "") -> Dict[str, Any]:
         """
         Process a raw document:
-        1. OCR/extract text
+        1. Read its text (PDF text layer, else OCR), page by page
         2. Classify document type
         3. Extract structured fields
         4. Suggest wallet category
         5. Return confidence score
-        """
-        # Fake processing - in production this would:
-        # - Call OCR service (Tesseract, AWS Textract, etc.)
-        # - Use ML model for classification
-        # - Use NLP/LLM for field extraction
-        
-        # Simulate processing delay
-        import asyncio
-        await asyncio.sleep(0.1)
         
-        # Fake classification based on filename
+        Pass `text` to analyze already-extracted text instead of the stored file.
+        CPU-bound and synchronous: runs on job workers (or a process pool).
+        """
+        return DocumentAIService.finish_analysis(
+            raw_doc, DocumentAIService.analyze_content(raw_doc, text)
+        )
+    
+    @staticmethod
+    def analyze_content(raw_doc: RawDocument, text: str = "") -> Dict[str, Any]:
+        """
+        The expensive part of an analysis, which depends only on the file
+        content (so it is cached and shared by file hash): keyword scores of
+        the text and the extracted fields.
+        """
+        pages = iter([text]) if text else DocumentAIService.extract_text(raw_doc)
+        # Classify on the first page with text; fields stream from every page
+        first_page = next((page for page in pages if page.strip()), "")
+        text_scores = document_classifier.scores("", first_page[:_CLASSIFY_MAX_CHARS])
+        fields = field_extractor.extract(itertools.chain([first_page], pages))
+        return {
+            "text_scores": {t.value: score for t, score in text_scores.items()},
+            "fields": fields,
+        }
+    
+    @staticmethod
+    def finish_analysis(raw_doc: RawDocument, content: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        A document's analysis from its content analysis: adds the filename
+        to classification and applies the filename checks. Cheap; runs per
+        document even when the content analysis is shared.
+        """
         filename_lower = raw_doc.filename.lower()
         
-        detected_type = DocumentAIService._classify_document(filename_lower)
-        wallet_category = DocumentAIService._suggest_wallet_category(detected_type)
-        extracted_data = DocumentAIService._extract_fields(filename_lower, detected_type)
+        classification = DocumentAIService._classify_document(
+            raw_doc.filename, content["text_scores"]
+        )
+        detected_type = classification.document_type
+        extracted_data = DocumentAIService._extract_fields(
+            filename_lower, detected_type, content["fields"]
+        )
         
-        # Confidence score (fake)
-        confidence = 0.85 if "fake" not in filename_lower else 0.45
+        confidence = classification.confidence
+        if "fake" in filename_lower:
+            confidence = min(confidence, 0.45)
         
+        return DocumentAIService._result(
+            detected_type,
+            extracted_data,
+            confidence,
+            [
+                {"document_type": t, "score": round(score, 4)}
+                for t, score in classification.runner_ups
+            ]
+        )
+    
+    @staticmethod
+    def extract_text(raw_doc: RawDocument) -> Iterator[str]:
+        """
+        Page texts of the stored file: the PDF text layer when it has one
+        (streamed from the memory-mapped blob), otherwise OCR.
+        """
+        path = blob_store.path_for(raw_doc.file_hash)
+        has_text = False
+        if os.path.exists(path):
+            try:
+                for page in iter_pdf_text(path):
+                    has_text = has_text or bool(page.strip())
+                    yield page
+            except PdfError as e:
+                logger.debug("No text layer in %s: %s", raw_doc.id, e)
+            except OSError:
+                logger.warning("Could not read blob for %s", raw_doc.id, exc_info=True)
+        if not has_text:
+            yield from DocumentAIService._ocr_pages(raw_doc)
+    
+    @staticmethod
+    def _ocr_pages(raw_doc: RawDocument) -> Iterator[str]:
+        """OCR page texts (fake: no text)."""
+        # In production this would call an OCR service (Tesseract,
+        # AWS Textract, etc.) on the page images.
+        
+        # Simulate processing delay
+        time.sleep(0.1)
+        return iter(())
+    
+    @staticmethod
+    def _result(
+        detected_type: DocumentType,
+        extracted_data: Dict[str, Any],
+        confidence: float,
+        type_candidates: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
         return {
             "detected_type": detected_type,
-            "wallet_category": wallet_category,
+            "wallet_category": DocumentAIService._suggest_wallet_category(detected_type),
             "extracted_data": extracted_data,
             "confidence_score": confidence,
+            "type_candidates": type_candidates,
             "status": DocumentStatus.PROCESSED if confidence > 0.7 else DocumentStatus.MANUAL_REVIEW
         }
     
     @staticmethod
-    def _classify_document(filename: str) -> DocumentType:
-        """Classify document type from filename/content."""
-        filename_lower = filename.lower()
-        
-        if "rabies" in filename_lower:
-            return DocumentType.RABIES_CERTIFICATE
-        elif "dhpp" in filename_lower or "dhlpp" in filename_lower:
-            return DocumentType.DHPP
-        elif "hip" in filename_lower and "screen" in filename_lower:
-            return DocumentType.HIP_SCREENING
-        elif "elbow" in filename_lower:
-            return DocumentType.ELBOW_SCREENING
-        elif "eye" in filename_lower or "ophthal" in filename_lower:
-            return DocumentType.EYE_SCREENING
-        elif "cardiac" in filename_lower or "heart" in filename_lower:
-            return DocumentType.CARDIAC_SCREENING
-        elif "wellness" in filename_lower or "annual" in filename_lower:
-            return DocumentType.WELLNESS_EXAM
-        elif "task" in filename_lower and "attest" in filename_lower:
-            return DocumentType.SERVICE_TASK_ATTESTATION
-        elif "train" in filename_lower and "cert" in filename_lower:
-            return DocumentType.TRAINING_CERTIFICATE
-        elif "public" in filename_lower and "access" in filename_lower:
-            return DocumentType.PUBLIC_ACCESS_TEST
-        elif "health" in filename_lower and "cert" in filename_lower:
-            return DocumentType.HEALTH_CERTIFICATE
-        elif "surgery" in filename_lower:
-            return DocumentType.SURGERY_REPORT
-        elif "prescription" in filename_lower or "rx" in filename_lower:
-            return DocumentType.PRESCRIPTION
-        else:
-            return DocumentType.OTHER
+    def _classify_document(filename: str, text_scores: Dict[str, float]) -> Classification:
+        """Classify document type from the filename and the text's keyword scores."""
+        scores = document_classifier.scores(filename)
+        for doc_type, score in text_scores.items():
+            doc_type = DocumentType(doc_type)
+            scores[doc_type] = scores.get(doc_type, 0.0) + score
+        return document_classifier.decide(scores)
     
     @staticmethod
     def _suggest_wallet_category(doc_type: DocumentType) -> WalletCategory:
@@ -124,34 +288,20 @@ class DocumentAIService:
             return WalletCategory.IDENTITY_OWNERSHIP
     
     @staticmethod
-    def _extract_fields(filename: str, doc_type: DocumentType) -> Dict[str, Any]:
-        """Extract structured fields from document (fake extraction)."""
-        # In production, this would use NLP/LLM to extract:
-        # - Dates
-        # - Vet/clinic names
-        # - Vaccine names
-        # - Results/grades
-        # - etc.
-        
+    def _extract_fields(
+        filename: str,
+        doc_type: DocumentType,
+        fields: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """The document's extracted data: text fields (compiled field extractor) that fit its type."""
         extracted = {
             "source_filename": filename
         }
-        
-        # Fake extraction based on document type
-        if doc_type == DocumentType.RABIES_CERTIFICATE:
-            extracted.update({
-                "vaccine_name": "Rabies",
-                "date_administered": "2024-03-15",  # Would extract from OCR
-                "expiration_date": "2026-03-15",
-                "vet_name": "Dr. Example",
-                "clinic": "Example Animal Hospital"
-            })
-        elif doc_type == DocumentType.SERVICE_TASK_ATTESTATION:
-            extracted.update({
-                "trainer_name": "Example Training Institute",
-                "date_completed": "2024-06-01",
-                "tasks_certified": ["PTSD alert", "Grounding techniques"]
-            })
-        
+        fields = dict(fields)
+        # A "grade" or "tasks" line only means something on these documents
+        if doc_type not in _SCREENING_TYPES:
+            fields.pop("screening_grade", None)
+        if doc_type not in _TRAINING_TYPES:
+            fields.pop("tasks_certified", None)
+        extracted.update(fields)
         return extracted
-
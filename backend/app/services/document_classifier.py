@@ -0,0 +1,183 @@
+"""
+Document Classifier
+
+Classifies uploaded documents by keywords in the filename and OCR text.
+- Every DocumentType's weighted keywords are compiled once into a single
+  Aho-Corasick automaton (a full transition table, so matching is one
+  dict lookup per character), and filename plus text are scanned in one
+  pass.
+- Each distinct keyword counts once per source (filename, text) toward
+  every type it supports; short keywords must match whole words.
+- The top type must reach MIN_SCORE, otherwise the document is OTHER.
+  Confidence grows with the top score and shrinks with competing types
+  that also reached MIN_SCORE; weaker partial matches are reported as
+  runner-ups only.
+
+Fast enough for batch backfills (thousands of documents per second).
+"""
+import math
+from collections import deque
+from typing import Dict, List, NamedTuple, Sequence, Set, Tuple
+
+from ..models.document import DocumentType
+
+# Keyword -> weight per type. Text is lowercased and separators
+# ("_", "-", ".", ...) become spaces before matching.
+KEYWORDS: Dict[DocumentType, Dict[str, float]] = {
+    DocumentType.RABIES_CERTIFICATE: {"rabies": 1.0, "rabvac": 1.0, "imrab": 1.0},
+    DocumentType.DHPP: {
+        "dhpp": 1.0, "dhlpp": 1.0, "da2pp": 1.0, "distemper": 0.6, "parvo": 0.6,
+    },
+    DocumentType.HIP_SCREENING: {
+        "hip screen": 1.0, "hip dysplasia": 1.0, "pennhip": 1.0,
+        "hip": 0.5, "hips": 0.5, "screen": 0.3, "ofa": 0.3,
+    },
+    DocumentType.ELBOW_SCREENING: {"elbow": 1.0, "screen": 0.3, "ofa": 0.3},
+    DocumentType.EYE_SCREENING: {
+        "eye": 1.0, "eyes": 1.0, "ophthal": 1.0, "caer": 0.8, "cataract": 0.6, "screen": 0.3,
+    },
+    DocumentType.CARDIAC_SCREENING: {
+        "cardiac": 1.0, "heart": 1.0, "echocardio": 0.6, "murmur": 0.4, "screen": 0.3,
+    },
+    DocumentType.WELLNESS_EXAM: {
+        "wellness": 1.0, "annual": 1.0, "checkup": 0.8, "physical exam": 0.6,
+    },
+    DocumentType.SERVICE_TASK_ATTESTATION: {
+        "task": 0.5, "tasks": 0.5, "attest": 0.5, "service task": 0.5,
+    },
+    DocumentType.TRAINING_CERTIFICATE: {"train": 0.6, "cert": 0.4},
+    DocumentType.PUBLIC_ACCESS_TEST: {
+        "public access": 1.0, "public": 0.5, "access": 0.5, "cgc": 0.4, "canine good citizen": 0.6,
+    },
+    DocumentType.HEALTH_CERTIFICATE: {"health": 0.6, "cert": 0.4, "cvi": 0.6, "aphis": 0.6},
+    DocumentType.SURGERY_REPORT: {"surgery": 1.0, "surgical": 1.0, "spay": 0.6, "neuter": 0.6},
+    DocumentType.PRESCRIPTION: {"prescription": 1.0, "rx": 1.0, "dispensed": 0.5},
+}
+
+MIN_SCORE = 1.0
+# Keywords this short only match whole words ("rx", but not "proxy")
+_WHOLE_WORD_MAX_LEN = 3
+# Confidence of an OTHER document with no keyword evidence at all
+_OTHER_CONFIDENCE = 0.85
+_SATURATION = 2.0
+
+_SEPARATORS = str.maketrans({c: " " for c in "_-./\\,;:()[]{}'\"\t\r\n"})
+
+
+class Classification(NamedTuple):
+    document_type: DocumentType
+    confidence: float
+    runner_ups: List[Tuple[DocumentType, float]]  # (type, score), best first
+    scores: Dict[DocumentType, float]
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over a fixed keyword list."""
+
+    def __init__(self, keywords: Sequence[str]):
+        self.keywords = list(keywords)
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for i, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(i)
+
+        # Breadth-first: fail links, merged outputs and the full transition table
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])]
+        delta.extend({} for _ in range(len(goto) - 1))
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                queue.append(nxt)
+        self._delta = delta
+        self._outputs: List[Tuple[int, ...]] = [tuple(o) for o in outputs]
+
+    def scan(self, text: str) -> List[Tuple[int, int]]:
+        """(keyword index, end position) of every match, in text order."""
+        delta, outputs = self._delta, self._outputs
+        matches = []
+        state = 0
+        for end, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                matches.extend((k, end) for k in outputs[state])
+        return matches
+
+
+class DocumentClassifier:
+    """Weighted keyword classifier over a compiled automaton."""
+
+    def __init__(self, keywords: Dict[DocumentType, Dict[str, float]] = KEYWORDS):
+        words = sorted({w for weights in keywords.values() for w in weights})
+        self._automaton = KeywordAutomaton(words)
+        self._lengths = [len(w) for w in words]
+        self._whole_word = [len(w) <= _WHOLE_WORD_MAX_LEN for w in words]
+        # keyword index -> (type, weight) pairs it supports
+        self._supports: List[List[Tuple[DocumentType, float]]] = [[] for _ in words]
+        index = {w: i for i, w in enumerate(words)}
+        for doc_type, weights in keywords.items():
+            for word, weight in weights.items():
+                self._supports[index[word]].append((doc_type, weight))
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return text.lower().translate(_SEPARATORS)
+
+    def scores(self, filename: str, text: str = "") -> Dict[DocumentType, float]:
+        """Weighted keyword score per document type (types with any match)."""
+        name = self._normalize(filename)
+        combined = f" {name} \n {self._normalize(text)} " if text else f" {name} "
+        split = len(name) + 2  # positions past this are in the text
+        hits: Set[Tuple[int, bool]] = set()
+        for k, end in self._automaton.scan(combined):
+            if self._whole_word[k]:
+                start = end - self._lengths[k] + 1
+                if combined[start - 1].isalnum() or combined[end + 1].isalnum():
+                    continue
+            hits.add((k, end > split))
+
+        scores: Dict[DocumentType, float] = {}
+        for k, _ in hits:
+            for doc_type, weight in self._supports[k]:
+                scores[doc_type] = scores.get(doc_type, 0.0) + weight
+        return scores
+
+    def classify(self, filename: str, text: str = "") -> Classification:
+        """Best document type for a filename and (optional) OCR text."""
+        return self.decide(self.scores(filename, text))
+
+    def decide(self, scores: Dict[DocumentType, float]) -> Classification:
+        """
+        Classification from keyword scores. Scores of the filename and the
+        text add up (keywords count once per source), so they can be
+        computed separately and summed.
+        """
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0].value))
+        top_type, top = ranked[0] if ranked else (DocumentType.OTHER, 0.0)
+        if top < MIN_SCORE:
+            return Classification(
+                DocumentType.OTHER,
+                round(_OTHER_CONFIDENCE * math.exp(-_SATURATION * top), 4),
+                ranked,
+                scores
+            )
+        contender = next((s for _, s in ranked[1:] if s >= MIN_SCORE), 0.0)
+        confidence = (1 - math.exp(-_SATURATION * top)) * top / (top + contender)
+        return Classification(top_type, round(confidence, 4), ranked[1:], scores)
+
+
+# Compiled once per process
+document_classifier = DocumentClassifier()
@@ -0,0 +1,68 @@
+"""
+Document Fraud Flags
+
+Stores the fraud flags of a document (reused file, near-duplicate of
+another dog's document, suspicious filename) on the RawDocument. A match
+involves two dogs, so the other dog's matching documents are flagged too.
+The review queue merges a dog's document flags with its consistency flags.
+
+INTERNAL ONLY - never exposed to businesses or public APIs.
+"""
+from typing import Iterable, List, Set, Tuple
+
+from ..core.database import get_repository
+from ..models.document import RawDocument
+from .fraud_detection_service import FraudDetectionService
+from .near_duplicate_index import NearDuplicate
+
+# Flags put on the other side of a match
+REUSED_BY_OTHER_DOG = "Another dog uploaded the same file - possible reuse"
+COPIED_BY_OTHER_DOG = "Another dog uploaded a near-identical document - possible edited copy"
+
+
+def flag_document(
+    raw_doc: RawDocument,
+    hash_owners: Iterable[Tuple[str, str]],
+    near_duplicates: Iterable[NearDuplicate] = ()
+) -> Set[str]:
+    """
+    Set the document's fraud flags (the caller saves it) and flag the other
+    dogs' matching documents. Returns the ids of every dog involved.
+    """
+    hash_owners = list(hash_owners)
+    near_duplicates = list(near_duplicates)
+    raw_doc.fraud_flags = FraudDetectionService.check_document_fraud(
+        raw_doc, hash_owners, near_duplicates
+    )
+
+    repo = get_repository()
+    affected = {raw_doc.dog_id}
+    if any(dog_id != raw_doc.dog_id for dog_id, _ in hash_owners):
+        for other in repo.find_documents_by_hash(raw_doc.file_hash):
+            if other.dog_id != raw_doc.dog_id:
+                _add_flag(other, REUSED_BY_OTHER_DOG)
+                affected.add(other.dog_id)
+    for match in near_duplicates:
+        if match.dog_id == raw_doc.dog_id:
+            continue
+        other = repo.get_raw_document(match.document_id)
+        if other is not None:
+            _add_flag(other, COPIED_BY_OTHER_DOG)
+        affected.add(match.dog_id)
+    return affected
+
+
+def _add_flag(document: RawDocument, flag: str) -> None:
+    if flag not in document.fraud_flags:
+        document.fraud_flags = document.fraud_flags + [flag]
+        get_repository().save_raw_document(document)
+
+
+def dog_document_flags(dog_id: str) -> List[str]:
+    """Distinct fraud flags across a dog's documents."""
+    flags: List[str] = []
+    for document in get_repository().find_documents_by_dog(dog_id):
+        for flag in document.fraud_flags:
+            if flag not in flags:
+                flags.append(flag)
+    return flags
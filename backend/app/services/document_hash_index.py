@@ -0,0 +1,86 @@
+"""
+Document Hash Index
+
+Persistent file_hash -> {(dog_id, handler_id)} index for duplicate-document
+detection. Fraud checks look up one hash instead of scanning documents.
+- Documents are indexed at ingestion (document_service)
+- Historical documents are indexed by a backfill job
+- Per-hash counts of distinct dogs and handlers for the admin portal
+
+INTERNAL ONLY - never exposed to businesses or public APIs.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from ..core.database import get_repository
+from ..core.job_queue import Job, job_queue
+from ..models.document import RawDocument
+from .fraud_graph import fraud_graph
+
+BACKFILL_JOB = "backfill_document_hash_index"
+BACKFILL_BATCH_SIZE = 500
+
+
+def index_document(document: RawDocument) -> None:
+    """Record that the document's dog and handler have uploaded its file."""
+    get_repository().add_document_hash_owners(
+        [(document.file_hash, document.dog_id, document.handler_id)]
+    )
+    fraud_graph.add_document(document.file_hash, document.dog_id, document.handler_id)
+
+
+def get_hash_owners(file_hash: str) -> List[Tuple[str, str]]:
+    """(dog_id, handler_id) pairs that have uploaded the file."""
+    return get_repository().get_document_hash_owners(file_hash)
+
+
+def get_hash_stats(file_hash: str) -> Dict[str, Any]:
+    owners = get_hash_owners(file_hash)
+    return {
+        "file_hash": file_hash,
+        "dog_count": len({dog_id for dog_id, _ in owners}),
+        "handler_count": len({handler_id for _, handler_id in owners}),
+        "owners": [
+            {"dog_id": dog_id, "handler_id": handler_id}
+            for dog_id, handler_id in owners
+        ]
+    }
+
+
+def list_shared_hashes(
+    min_dogs: int = 2,
+    cursor: Optional[str] = None,
+    limit: int = 100
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Hashes shared by at least min_dogs dogs, ordered by hash, and the next cursor."""
+    rows = get_repository().list_shared_document_hashes(min_dogs, cursor, limit)
+    items = [
+        {"file_hash": file_hash, "dog_count": dogs, "handler_count": handlers}
+        for file_hash, dogs, handlers in rows
+    ]
+    next_cursor = rows[-1][0] if len(rows) == limit else None
+    return items, next_cursor
+
+
+def backfill(batch_size: int = BACKFILL_BATCH_SIZE) -> Dict[str, int]:
+    """Index every stored document, one page at a time. Safe to re-run."""
+    repo = get_repository()
+    scanned = added = 0
+    after_id = None
+    while True:
+        documents = repo.list_raw_documents(after_id, batch_size)
+        if not documents:
+            break
+        added += repo.add_document_hash_owners(
+            [(d.file_hash, d.dog_id, d.handler_id) for d in documents]
+        )
+        for d in documents:
+            fraud_graph.add_document(d.file_hash, d.dog_id, d.handler_id)
+        scanned += len(documents)
+        after_id = documents[-1].id
+    return {"documents_scanned": scanned, "owners_added": added}
+
+
+def submit_backfill() -> Job:
+    return job_queue.submit(BACKFILL_JOB, {}, tenant_id="admin")
+
+
+job_queue.register(BACKFILL_JOB, backfill)
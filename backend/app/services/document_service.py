@@ -0,0 +1,57 @@
+"""
+Document Service
+
+Ingests uploaded files as RawDocuments backed by the blob store.
+"""
+from datetime import datetime
+from typing import BinaryIO, Optional
+from uuid import uuid4
+from ..core.database import get_repository
+from ..models.document import RawDocument
+from ..models.dog import Dog
+from .blob_store import blob_store
+from .document_flags import flag_document
+from .document_hash_index import get_hash_owners, index_document
+from .review_queue_service import review_queue
+
+
+def store_upload(
+    dog: Dog,
+    filename: str,
+    mime_type: Optional[str],
+    stream: BinaryIO,
+    uploaded_by: str = "handler"
+) -> RawDocument:
+    """
+    Stream a file into the blob store and record it as a RawDocument.
+    Blocking (disk I/O); call from a worker thread.
+    Raises BlobTooLarge if the file is over the upload limit.
+    A file already uploaded for another dog is flagged right away;
+    content checks run later in the processing job.
+    """
+    blob = blob_store.put_stream(stream)
+
+    document = RawDocument(
+        id=f"doc-{uuid4()}",
+        dog_id=dog.id,
+        handler_id=dog.handler_id,
+        filename=filename,
+        file_url=blob_store.url_for(blob.file_hash),
+        file_hash=blob.file_hash,
+        file_size=blob.size,
+        mime_type=mime_type or "application/octet-stream",
+        uploaded_at=datetime.now(),
+        uploaded_by=uploaded_by
+    )
+    repo = get_repository()
+    repo.save_raw_document(document)
+    blob_store.add_reference(blob.file_hash)
+    index_document(document)
+
+    affected_dogs = flag_document(document, get_hash_owners(blob.file_hash))
+    if document.fraud_flags:
+        repo.save_raw_document(document)
+        for dog_id in sorted(affected_dogs):
+            review_queue.refresh_dog(dog_id)
+
+    return document
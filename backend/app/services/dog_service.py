@@ -1,37 +1,93 @@
-from typing import Optional
+import logging
+from typing import Any, Dict, Optional
 from ..models.dog import Dog
-from ..core.database import FAKE_DB
+from ..core.database import get_repository
+from ..core.job_queue import JobQueueFull, PermanentJobError, job_queue
+from .fraud_graph import PHOTO, fraud_graph
+from .photo_hash_index import photo_hash_index
+from .public_status_cache import public_status_cache
+from .record_service import get_evidence_summary
+from .rescore_scheduler import rescore_scheduler
+from .rule_engine import rule_engine
+from .review_queue_service import review_queue
+
+logger = logging.getLogger(__name__)
+
+HASH_PHOTO_JOB = "hash_dog_photo"
 
 
 def get_dog(dog_id: str) -> Optional[Dog]:
-    """Get a dog by ID from the fake database."""
-    return FAKE_DB["dogs"].get(dog_id)
+    """Get a dog by ID from the repository."""
+    return get_repository().get_dog(dog_id)
+
+
+def save_dog(dog: Dog) -> Dog:
+    """Persist a dog."""
+    get_repository().save_dog(dog)
+    public_status_cache.on_dog_saved(dog)
+    rescore_scheduler.mark_dirty(dog.id)
+    # Dogs sharing the old or new microchip gain or lose the duplicate flag
+    review_queue.refresh_microchip_peers(dog)
+    fraud_graph.add_dog(dog)
+    if photo_hash_index.needs_hash(dog):
+        _queue_photo_hash(dog)
+    return dog
+
+
+def _queue_photo_hash(dog: Dog) -> None:
+    try:
+        job_queue.submit(HASH_PHOTO_JOB, {"dog_id": dog.id}, tenant_id=dog.handler_id)
+    except JobQueueFull:
+        # Picked up again on the next save or restart
+        logger.warning("Job queue full; photo hash for dog %s deferred", dog.id)
+
+
+def _hash_dog_photo(dog_id: str) -> Dict[str, Any]:
+    """Hash a dog's photo and refresh the flags of every dog it matches (job handler)."""
+    dog = get_repository().get_dog(dog_id)
+    if dog is None:
+        raise PermanentJobError("Dog not found")
+    # Dogs matched by the old photo may lose their flag
+    affected = {dog_id} | {m.dog_id for m in photo_hash_index.matches_for_dog(dog_id)}
+    try:
+        matches = photo_hash_index.hash_dog_photo(dog)
+        affected.update(m.dog_id for m in matches)
+        fraud_graph.link_dogs(dog_id, [m.dog_id for m in matches], PHOTO)
+    finally:
+        for dog_to_refresh in sorted(affected):
+            review_queue.refresh_dog(dog_to_refresh)
+    return {"dog_id": dog_id, "hashed": bool(dog.photo_url), "matches": len(matches)}
+
+
+def queue_missing_photo_hashes() -> int:
+    """Queue hashing for dogs whose photo was never hashed (startup). Returns the number queued."""
+    queued = 0
+    for dog in get_repository().list_dogs():
+        if dog.photo_url and photo_hash_index.needs_hash(dog):
+            _queue_photo_hash(dog)
+            queued += 1
+    return queued
 
 
 def update_dog_verification(dog_id: str) -> Optional[Dog]:
     """Update a dog's verification status based on their records."""
-    dog = get_dog(dog_id)
+    repo = get_repository()
+    dog = repo.get_dog(dog_id)
     if not dog:
         return None
-    
-    # Verification rule: dog is verified if it has:
+
+    # Verification rule ("legacy_verified"): dog is verified if it has:
     # - at least one "vaccination" record with analysis_status == "accepted"
     # - AND at least one "training" or "vet_visit" record with analysis_status == "accepted"
-    
-    has_vaccination = any(
-        r.category == "vaccination" and r.analysis_status == "accepted"
-        for r in dog.records
-    )
-    
-    has_training_or_vet = any(
-        r.category in ["training", "vet_visit"] and r.analysis_status == "accepted"
-        for r in dog.records
-    )
-    
-    dog.verified = has_vaccination and has_training_or_vet
-    
+
+    evidence = get_evidence_summary(dog_id)
+
+    dog.verified = rule_engine.decide("legacy_verified", dog, evidence.mask)
+
     # Update in database
-    FAKE_DB["dogs"][dog_id] = dog
-    
+    save_dog(dog)
+
     return dog
 
+
+job_queue.register(HASH_PHOTO_JOB, _hash_dog_photo)
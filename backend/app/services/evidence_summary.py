@@ -0,0 +1,164 @@
+"""
+Evidence Summary
+
+Per-dog bitset describing what evidence exists in the wallet, so
+verification decisions don't rescan the record list.
+
+Each record contributes bits for its evidence keys (document type, wallet
+category, or legacy category) x flags (present, active, vet verified, ...).
+Per-bit counts make removal exact: a bit is set while at least one record
+contributes it. Expiry is read from the records' is_expired/expiring_soon
+flags (maintained by the expiration scheduler), never from dates.
+Records are read as VerificationRecords, whatever schema they are stored in.
+"""
+from enum import IntEnum
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from ..models.document import DocumentType, WalletCategory
+from .verification_record import LEGACY_CATEGORIES, VerificationRecord
+
+
+class EvidenceFlag(IntEnum):
+    """Per-record properties tracked for each evidence key."""
+    PRESENT = 0
+    ACTIVE = 1  # NormalizedRecord.is_active / legacy record not denied; not expired
+    ACCEPTED = 2  # legacy analysis_status == "accepted"
+    VET_VERIFIED = 3
+    TRAINER_VERIFIED = 4
+    VET_VERIFIED_ACTIVE = 5
+    TRAINER_VERIFIED_ACTIVE = 6
+    EXPIRING_SOON = 7  # active and expiring within EXPIRING_SOON_DAYS
+
+
+_NUM_FLAGS = len(EvidenceFlag)
+_EVIDENCE_KEYS: List[object] = [
+    *DocumentType,
+    *WalletCategory,
+    *LEGACY_CATEGORIES,
+]
+# Enum members hash like their string values, so keys are resolved by type first
+_KEY_INDEX: Dict[Tuple[type, object], int] = {
+    (type(key), key): i for i, key in enumerate(_EVIDENCE_KEYS)
+}
+_NUM_BITS = len(_EVIDENCE_KEYS) * _NUM_FLAGS
+
+
+def evidence_bit(key, flag: EvidenceFlag) -> int:
+    """Bit position for an evidence key and flag."""
+    return _KEY_INDEX[(type(key), key)] * _NUM_FLAGS + flag
+
+
+def bit_key_flag(bit: int) -> Tuple[object, EvidenceFlag]:
+    """Evidence key and flag of a bit position."""
+    return _EVIDENCE_KEYS[bit // _NUM_FLAGS], EvidenceFlag(bit % _NUM_FLAGS)
+
+
+def evidence_mask(keys: Iterable, flag: EvidenceFlag) -> int:
+    """Mask with the given flag set for every key."""
+    mask = 0
+    for key in keys:
+        mask |= 1 << evidence_bit(key, flag)
+    return mask
+
+
+@lru_cache(maxsize=None)
+def document_types_matching(fragments: Tuple[str, ...]) -> Tuple[DocumentType, ...]:
+    """Document types whose value contains any of the given fragments."""
+    return tuple(
+        t for t in DocumentType
+        if any(fragment in t.value for fragment in fragments)
+    )
+
+
+def _record_contribution(record: VerificationRecord) -> int:
+    """Bits a record sets."""
+    if record.normalized:
+        keys: Tuple[object, ...] = (record.document_type, record.wallet_category)
+    elif record.category in LEGACY_CATEGORIES:
+        keys = (record.category,)
+    else:
+        return 0
+
+    flags = [EvidenceFlag.PRESENT]
+    if record.active:
+        flags.append(EvidenceFlag.ACTIVE)
+        if record.expiring_soon:
+            flags.append(EvidenceFlag.EXPIRING_SOON)
+    if record.accepted:
+        flags.append(EvidenceFlag.ACCEPTED)
+    if record.vet_verified:
+        flags.append(EvidenceFlag.VET_VERIFIED)
+        if record.active:
+            flags.append(EvidenceFlag.VET_VERIFIED_ACTIVE)
+    if record.trainer_verified:
+        flags.append(EvidenceFlag.TRAINER_VERIFIED)
+        if record.active:
+            flags.append(EvidenceFlag.TRAINER_VERIFIED_ACTIVE)
+
+    bits = 0
+    for key in keys:
+        for flag in flags:
+            bits |= 1 << evidence_bit(key, flag)
+    return bits
+
+
+class EvidenceSummary:
+    """Incrementally maintained evidence bitset for one dog."""
+
+    def __init__(self):
+        self.mask = 0
+        self._counts = [0] * _NUM_BITS
+        self._contributions: Dict[str, int] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[VerificationRecord]) -> "EvidenceSummary":
+        """Build a summary for an ad-hoc list of records."""
+        summary = cls()
+        for record in records:
+            summary.update(record)
+        return summary
+
+    def update(self, record: VerificationRecord) -> None:
+        """Apply a created or changed record."""
+        self.discard(record.id)
+        bits = _record_contribution(record)
+        self._contributions[record.id] = bits
+        while bits:
+            low = bits & -bits
+            i = low.bit_length() - 1
+            self._counts[i] += 1
+            self.mask |= low
+            bits ^= low
+
+    def discard(self, record_id: str) -> None:
+        """Remove a record's contribution."""
+        bits = self._contributions.pop(record_id, 0)
+        while bits:
+            low = bits & -bits
+            i = low.bit_length() - 1
+            self._counts[i] -= 1
+            if self._counts[i] == 0:
+                self.mask &= ~low
+            bits ^= low
+
+    def has(self, key, flag: EvidenceFlag = EvidenceFlag.ACTIVE) -> bool:
+        """True if any record has the flag for this key."""
+        return bool(self.mask >> evidence_bit(key, flag) & 1)
+
+    def has_any(self, mask: int) -> bool:
+        """True if any bit in the mask is set."""
+        return bool(self.mask & mask)
+
+    def count(self, key, flag: EvidenceFlag = EvidenceFlag.ACTIVE) -> int:
+        """Number of records with the flag for this key."""
+        return self._counts[evidence_bit(key, flag)]
+
+
+# Common masks
+ANY_VET_VERIFIED = evidence_mask(DocumentType, EvidenceFlag.VET_VERIFIED)
+ANY_TRAINER_VERIFIED = evidence_mask(DocumentType, EvidenceFlag.TRAINER_VERIFIED)
+ANY_VET_VERIFIED_ACTIVE = evidence_mask(DocumentType, EvidenceFlag.VET_VERIFIED_ACTIVE)
+ANY_ACTIVE_SCREENING = evidence_mask(
+    document_types_matching(("screening",)), EvidenceFlag.ACTIVE
+)
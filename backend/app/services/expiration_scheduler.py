@@ -0,0 +1,209 @@
+"""
+Expiration Scheduler
+
+Maintains the expiring_soon / is_expired flags of records (vaccinations,
+certifications) so that read paths never compare dates.
+- Each record with an expiration date is scheduled for its next
+  transition in a min-heap keyed by date: "expiring_soon" EXPIRING_SOON_DAYS
+  before it expires, "expired" the day after.
+- A background thread sleeps until the earliest transition and applies it
+  through the registered listener (record_service), which saves the record,
+  invalidates the cached public status and schedules a rescore.
+- Records are re-tracked on every write; superseded heap entries are
+  skipped when popped.
+
+On startup every record is tracked, so transitions missed while the
+service was down are applied immediately.
+"""
+import heapq
+import logging
+import threading
+from datetime import date, datetime, time as dt_time, timedelta
+from itertools import count
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..core.config import EXPIRING_SOON_DAYS
+from ..core.database import get_repository
+from ..core.repository import AnyRecord
+from .verification_record import record_expiry
+
+logger = logging.getLogger(__name__)
+
+# Re-check at least this often, so clock changes can't strand a wait
+_MAX_SLEEP_SECONDS = 3600.0
+
+# Called with (record, expiring_soon, is_expired) to apply a transition
+TransitionListener = Callable[[AnyRecord, bool, bool], None]
+
+
+def expiry_state(expiry: Optional[date], today: date) -> Tuple[bool, bool]:
+    """(expiring_soon, is_expired) of a record expiring on `expiry`."""
+    if expiry is None:
+        return False, False
+    if today > expiry:
+        return False, True
+    return today >= expiry - timedelta(days=EXPIRING_SOON_DAYS), False
+
+
+def next_transition(expiry: Optional[date], today: date) -> Optional[date]:
+    """Date of the next state change after today, if any."""
+    if expiry is None:
+        return None
+    soon_on = expiry - timedelta(days=EXPIRING_SOON_DAYS)
+    if today < soon_on:
+        return soon_on
+    if today <= expiry:
+        return expiry + timedelta(days=1)
+    return None
+
+
+class ExpirationScheduler:
+    """Date-keyed min-heap of pending record state transitions."""
+
+    def __init__(self):
+        self._wakeup = threading.Condition(threading.Lock())
+        self._heap: List[Tuple[date, int, str, str]] = []  # (fires on, seq, dog_id, record_id)
+        self._scheduled: Dict[str, date] = {}  # record_id -> current fire date
+        self._seq = count()
+        self._listeners: List[TransitionListener] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self.fired = 0
+        self.transitions = 0
+        self.errors = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_listener(self, listener: TransitionListener) -> None:
+        self._listeners.append(listener)
+
+    def track(self, record: AnyRecord, today: Optional[date] = None) -> None:
+        """(Re)schedule a record after it was written."""
+        today = today or date.today()
+        expiry = record_expiry(record)
+        if expiry_state(expiry, today) != (record.expiring_soon, record.is_expired):
+            fires_on: Optional[date] = today  # stale: apply as soon as possible
+        else:
+            fires_on = next_transition(expiry, today)
+
+        with self._wakeup:
+            if fires_on is None:
+                self._scheduled.pop(record.id, None)
+                return
+            if self._scheduled.get(record.id) == fires_on:
+                return
+            self._scheduled[record.id] = fires_on
+            heapq.heappush(self._heap, (fires_on, next(self._seq), record.dog_id, record.id))
+            if self._heap[0][3] == record.id:
+                self._wakeup.notify()
+
+        if fires_on <= today and not self.running:
+            self.fire_due(today)
+
+    def fire_due(self, today: Optional[date] = None) -> int:
+        """Apply every transition due by today. Returns the number applied."""
+        today = today or date.today()
+        applied = 0
+        while True:
+            with self._wakeup:
+                entry = self._pop_due(today)
+            if entry is None:
+                return applied
+            dog_id, record_id = entry
+            try:
+                applied += self._fire(dog_id, record_id, today)
+            except Exception:
+                self.errors += 1
+                logger.exception("Expiry transition for record %s failed", record_id)
+
+    def _pop_due(self, today: date) -> Optional[Tuple[str, str]]:
+        while self._heap and self._heap[0][0] <= today:
+            fires_on, _, dog_id, record_id = heapq.heappop(self._heap)
+            if self._scheduled.get(record_id) == fires_on:
+                del self._scheduled[record_id]
+                return dog_id, record_id
+        return None
+
+    def _fire(self, dog_id: str, record_id: str, today: date) -> int:
+        self.fired += 1
+        # From the repository, not the index: another worker may have written
+        # the record since, and the transition must not overwrite that
+        record = get_repository().get_record(record_id)
+        if record is None or record.dog_id != dog_id:
+            return 0
+        state = expiry_state(record_expiry(record), today)
+        if state == (record.expiring_soon, record.is_expired):
+            # Already current (written since it was scheduled)
+            self.track(record, today)
+            return 0
+        for listener in self._listeners:
+            listener(record, *state)  # re-tracks the saved record
+        self.transitions += 1
+        return 1
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Track every stored record (startup). Returns the number scheduled."""
+        repo = get_repository()
+        dog_ids = [dog.id for dog in repo.list_dogs()]
+        today = date.today()
+        for start in range(0, len(dog_ids), batch_size):
+            bulk = repo.list_records_for_dogs(dog_ids[start:start + batch_size])
+            for records in bulk.values():
+                for record in records:
+                    self.track(record, today)
+        return len(self._scheduled)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="expiration-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            self.fire_due()
+            with self._wakeup:
+                if self._stopping:
+                    return
+                if self._heap and self._heap[0][0] <= date.today():
+                    continue
+                timeout = _MAX_SLEEP_SECONDS
+                if self._heap:
+                    fires_at = datetime.combine(self._heap[0][0], dt_time.min)
+                    timeout = min(
+                        max((fires_at - datetime.now()).total_seconds(), 0.0),
+                        _MAX_SLEEP_SECONDS
+                    )
+                self._wakeup.wait(timeout)
+
+    def stats(self) -> Dict[str, object]:
+        with self._wakeup:
+            next_due = self._heap[0][0].isoformat() if self._heap else None
+            return {
+                "running": self.running,
+                "scheduled": len(self._scheduled),
+                "heap_size": len(self._heap),
+                "next_transition": next_due,
+                "fired": self.fired,
+                "transitions": self.transitions,
+                "errors": self.errors,
+            }
+
+
+# Process-wide scheduler
+expiration_scheduler = ExpirationScheduler()
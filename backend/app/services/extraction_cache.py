@@ -0,0 +1,190 @@
+"""
+Extraction Cache
+
+Persistent cache of the content part of document analyses (keyword
+scores of the text, extracted fields) keyed by file hash, so re-uploads of
+the same file (re-submissions, multi-dog households, retries) skip OCR and
+extraction. Anything that depends on the filename is recomputed per upload.
+- Entries live in a local SQLite file shared by all workers on the host.
+- Keys include the extractor version: after an extractor upgrade old
+  entries simply miss, and age out.
+- Size-bounded LRU: every hit refreshes an entry's last use; when the
+  stored bytes exceed the limit, least recently used entries are evicted.
+
+Dates in extracted data are stored tagged and come back as dates.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from ..core.config import EXTRACTION_CACHE_PATH, EXTRACTION_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+_SQL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction_cache (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_used
+    ON extraction_cache(last_used);
+"""
+_SQL_GET = "SELECT data FROM extraction_cache WHERE key = ?"
+_SQL_TOUCH = "UPDATE extraction_cache SET last_used = ? WHERE key = ?"
+_SQL_SIZE = "SELECT size FROM extraction_cache WHERE key = ?"
+_SQL_PUT = """
+INSERT INTO extraction_cache (key, data, size, last_used) VALUES (?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET data = excluded.data, size = excluded.size,
+    last_used = excluded.last_used
+"""
+_SQL_TOTALS = "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extraction_cache"
+_SQL_OLDEST = "SELECT key, size FROM extraction_cache ORDER BY last_used LIMIT ?"
+_SQL_DELETE = "DELETE FROM extraction_cache WHERE key = ?"
+_SQL_CLEAR = "DELETE FROM extraction_cache"
+
+_EVICT_BATCH = 100
+_DATE_TAGS = {"__date__": date, "__datetime__": datetime}
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    raise TypeError(f"Not cacheable: {type(value).__name__}")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        tag, value = next(iter(obj.items()))
+        if tag in _DATE_TAGS:
+            return _DATE_TAGS[tag].fromisoformat(value)
+    return obj
+
+
+class ExtractionCache:
+    """Size-bounded LRU of analysis results on local disk."""
+
+    def __init__(
+        self,
+        path: str = EXTRACTION_CACHE_PATH,
+        max_bytes: int = EXTRACTION_CACHE_MAX_BYTES
+    ):
+        self._path = path
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so importing the module never touches the disk
+        if self._conn is None:
+            conn = sqlite3.connect(self._path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SQL_SCHEMA)
+            self._bytes = conn.execute(_SQL_TOTALS).fetchone()[1]
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def key(file_hash: str, version: str) -> str:
+        return f"{version}:{file_hash}"
+
+    def get(self, file_hash: str, version: str) -> Optional[Dict[str, Any]]:
+        """Cached result for a file and extractor version, or None."""
+        key = self.key(file_hash, version)
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(_SQL_GET, (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                with conn:
+                    conn.execute(_SQL_TOUCH, (time.time(), key))
+                self.hits += 1
+        except sqlite3.Error:
+            # A cache failure must never fail document processing
+            self.errors += 1
+            logger.exception("Extraction cache read failed")
+            return None
+        return json.loads(row[0], object_hook=_decode)
+
+    def put(self, file_hash: str, version: str, result: Dict[str, Any]) -> None:
+        """Store a result, evicting least recently used entries if over the limit."""
+        data = json.dumps(result, default=_encode)
+        size = len(data)
+        if size > self._max_bytes:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                key = self.key(file_hash, version)
+                with conn:
+                    # An overwrite replaces the old entry's bytes
+                    previous = conn.execute(_SQL_SIZE, (key,)).fetchone()
+                    conn.execute(_SQL_PUT, (key, data, size, time.time()))
+                self._bytes += size - (previous[0] if previous else 0)
+                self.stores += 1
+                if self._bytes > self._max_bytes:
+                    self._evict(conn)
+        except sqlite3.Error:
+            self.errors += 1
+            logger.exception("Extraction cache write failed")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # Other processes share the file, so start from the stored total
+        self._bytes = conn.execute(_SQL_TOTALS).fetchone()[1]
+        while self._bytes > self._max_bytes:
+            oldest = conn.execute(_SQL_OLDEST, (_EVICT_BATCH,)).fetchall()
+            if not oldest:
+                break
+            with conn:
+                for key, size in oldest:
+                    conn.execute(_SQL_DELETE, (key,))
+                    self._bytes -= size
+                    self.evictions += 1
+                    if self._bytes <= self._max_bytes:
+                        break
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(_SQL_CLEAR)
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, stored = (0, 0)
+            if self._conn is not None:
+                entries, stored = self._conn.execute(_SQL_TOTALS).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": stored,
+                "max_bytes": self._max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "errors": self.errors,
+            }
+
+
+# Process-wide cache
+extraction_cache = ExtractionCache()
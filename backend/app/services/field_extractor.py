@@ -0,0 +1,307 @@
+"""
+Field Extractor
+
+Extracts structured fields from OCR / text-layer text for
+NormalizedRecord.extracted_data: date_administered, expiration_date,
+vaccine_name, vet_name, clinic, microchip, screening_grade and
+tasks_certified.
+- Every field label is compiled once into a single pattern (a prefix
+  trie, matched against lowercased text), so the text is scanned in one
+  pass, page by page for streamed text, with no per-field rescans.
+- A label's value runs to the end of its line, the next column or the
+  next label that has a colon or starts a column ("Clinic:" on its own
+  line takes the next line). Label words inside a value are kept
+  ("Clinic: Portland Animal Hospital"). Labels without a colon only
+  count at the start of a line or column, so prose mentions are skipped.
+- Labelled values ("Expires: 03/15/2026") win; unlabelled fallbacks
+  ("Dr. Emily Chen", a "... Animal Hospital" heading, a bare 15-digit
+  chip number) only fill gaps.
+- Dates in ISO, US numeric, dotted European and month-name formats are
+  normalized to date objects.
+
+The first value found for a field is kept; scanning stops once every
+field is filled.
+"""
+import re
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# Field -> labels that introduce its value (longest alternatives first)
+LABELS: Dict[str, List[str]] = {
+    "date_administered": [
+        "date administered", "administered on", "administered", "date of vaccination",
+        "vaccination date", "date vaccinated", "date given",
+    ],
+    "expiration_date": [
+        "expiration date", "expiration", "expiry date", "expires on", "expires",
+        "valid until", "valid through", "next due", "due date",
+    ],
+    "vaccine_name": ["vaccine name", "vaccine", "product name"],
+    "vet_name": ["attending veterinarian", "veterinarian", "vet name", "signed by"],
+    "clinic": ["clinic name", "clinic", "animal hospital", "hospital", "practice name"],
+    "microchip": ["microchip number", "microchip no", "microchip id", "microchip", "chip number", "chip id"],
+    "screening_grade": ["ofa grade", "final grade", "grade", "rating", "result"],
+    "tasks_certified": ["tasks certified", "certified tasks", "tasks trained", "trained tasks", "tasks"],
+}
+
+DATE_FIELDS = ("date_administered", "expiration_date")
+FIELDS = tuple(LABELS)
+
+_MONTHS = {
+    name: i
+    for i, names in enumerate(
+        [("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+         ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+         ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"),
+         ("dec", "december")],
+        start=1
+    )
+    for name in names
+}
+_MONTH = "|".join(sorted(_MONTHS, key=len, reverse=True))
+
+# One pattern per date format; groups are (year, month, day) by name
+_DATE = re.compile(
+    r"(?P<iso>(?P<iy>\d{4})[-/.](?P<im>\d{1,2})[-/.](?P<id>\d{1,2}))"
+    r"|(?P<us>(?P<um>\d{1,2})[/-](?P<ud>\d{1,2})[/-](?P<uy>\d{4}|\d{2}))"
+    r"|(?P<eu>(?P<ed>\d{1,2})\.(?P<em>\d{1,2})\.(?P<ey>\d{4}))"
+    rf"|(?P<mdy>(?P<mm>{_MONTH})\.?\s+(?P<md>\d{{1,2}})(?:st|nd|rd|th)?,?\s+(?P<my>\d{{4}}))"
+    rf"|(?P<dmy>(?P<dd>\d{{1,2}})(?:st|nd|rd|th)?\s+(?P<dm>{_MONTH})\.?,?\s+(?P<dy>\d{{4}}))",
+    re.IGNORECASE
+)
+
+_label_to_field = {label: field for field, labels in LABELS.items() for label in labels}
+
+
+def _alternation(words: Iterable[str]) -> str:
+    """Regex alternation of the words as a prefix trie, so a miss fails on its first character."""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [
+            (r"[ \t]+" if ch == " " else re.escape(ch)) + emit(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if "" in node else "")
+
+    return emit(trie)
+
+
+# The single scan pattern, run over lowercased text: a field label, a
+# "Dr." name (unlabelled vet) or a bare 15-digit chip number
+_SCAN = re.compile(
+    rf"\b(?:(?P<label>{_alternation(_label_to_field)})\b(?P<sep>[ \t]*[.:#\-]*)[ \t]*"
+    r"|(?P<doctor>dr\b\.?[ \t]+)(?=[a-z])"
+    r"|(?P<chip>\d{15}\b))"
+)
+_DOCTOR_NAME = re.compile(r"[A-Z][a-zA-Z'\-]+(?:[ \t]+[A-Z]\.)?(?:[ \t]+[A-Z][a-zA-Z'\-]+){0,2}")
+# Columns in OCR text: tabs, runs of spaces, table bars
+_COLUMN_GAP = re.compile(r"\t| {2,}|\|")
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+_BULLETS = " \t-*\u2022"
+
+_CHIP_DIGITS = re.compile(r"\d[\d\s\-]{7,20}\d")
+_CHIP_LENGTHS = (9, 10, 15)
+_TASK_SPLIT = re.compile(r"\s*(?:[,;/]|\band\b)\s*", re.IGNORECASE)
+_CREDENTIALS = re.compile(r"[,\s]+(?:dvm|vmd|bvsc|mrcvs|d\.v\.m\.)\.?$", re.IGNORECASE)
+_TRAILING = " \t\r.,;:-|"
+_MAX_VALUE_CHARS = 120
+
+_GRADES = {
+    "excellent": "Excellent", "good": "Good", "fair": "Fair", "borderline": "Borderline",
+    "mild": "Mild", "moderate": "Moderate", "severe": "Severe", "normal": "Normal",
+    "pass": "Pass", "passed": "Pass", "clear": "Clear", "unaffected": "Unaffected",
+    "affected": "Affected", "grade i": "Grade I", "grade ii": "Grade II",
+    "grade iii": "Grade III",
+}
+_GRADE = re.compile(
+    r"\b(" + "|".join(sorted(_GRADES, key=len, reverse=True)).replace(" ", r"\s+") + r")\b",
+    re.IGNORECASE
+)
+
+
+def parse_date(text: str) -> Optional[date]:
+    """First date in the text, in any supported format."""
+    for m in _DATE.finditer(text):
+        if m.group("iso"):
+            y, mo, d = m.group("iy"), m.group("im"), m.group("id")
+        elif m.group("us"):
+            y, mo, d = m.group("uy"), m.group("um"), m.group("ud")
+            if len(y) == 2:
+                y = "20" + y
+        elif m.group("eu"):
+            y, mo, d = m.group("ey"), m.group("em"), m.group("ed")
+        elif m.group("mdy"):
+            y, mo, d = m.group("my"), _MONTHS[m.group("mm").lower()], m.group("md")
+        else:
+            y, mo, d = m.group("dy"), _MONTHS[m.group("dm").lower()], m.group("dd")
+        try:
+            return date(int(y), int(mo), int(d))
+        except ValueError:
+            continue  # e.g. 13/01/2024: keep looking
+    return None
+
+
+def _text(value: str) -> Optional[str]:
+    value = value.strip(_TRAILING)[:_MAX_VALUE_CHARS].strip(_TRAILING)
+    return value or None
+
+
+def _vet_name(value: str) -> Optional[str]:
+    return _text(_CREDENTIALS.sub("", value.strip(_TRAILING)))
+
+
+def _microchip(value: str) -> Optional[str]:
+    for m in _CHIP_DIGITS.finditer(value):
+        digits = re.sub(r"\D", "", m.group())
+        if len(digits) in _CHIP_LENGTHS:
+            return digits
+    return None
+
+
+def _grade(value: str) -> Optional[str]:
+    m = _GRADE.search(value)
+    if m:
+        return _GRADES[" ".join(m.group(1).lower().split())]
+    return None
+
+
+def _tasks(value: str) -> Optional[List[str]]:
+    tasks = [t.strip(_TRAILING) for t in _TASK_SPLIT.split(value)]
+    tasks = [t for t in tasks if t]
+    return tasks or None
+
+
+def _starts_column(chunk: str, pos: int) -> bool:
+    line_start = chunk.rfind("\n", 0, pos) + 1
+    return not _COLUMN_GAP.split(chunk[line_start:pos])[-1].strip(_BULLETS)
+
+
+_PARSERS: Dict[str, Callable[[str], Any]] = {
+    "date_administered": parse_date,
+    "expiration_date": parse_date,
+    "vaccine_name": _text,
+    "vet_name": _vet_name,
+    "clinic": _text,
+    "microchip": _microchip,
+    "screening_grade": _grade,
+    "tasks_certified": _tasks,
+}
+
+
+class FieldExtractor:
+    """Single-pass extraction over the precompiled scan pattern."""
+
+    def extract(self, text: Union[str, Iterable[str]]) -> Dict[str, Any]:
+        """
+        Fields found in the text. Accepts a string or an iterable of chunks
+        (e.g. pages from a streaming text extractor); chunks are only read
+        until every field is filled.
+        """
+        chunks = [text] if isinstance(text, str) else text
+        fields: Dict[str, Any] = {}
+        fallbacks: Dict[str, Any] = {}
+        for chunk in chunks:
+            self._scan(chunk, fields, fallbacks)
+            if len(fields) == len(FIELDS):
+                break
+        for field, value in fallbacks.items():
+            fields.setdefault(field, value)
+        return fields
+
+    def _scan(self, chunk: str, fields: Dict[str, Any], fallbacks: Dict[str, Any]) -> None:
+        lowered = chunk.lower()
+        if len(lowered) != len(chunk):
+            lowered = chunk.translate(_ASCII_LOWER)  # keeps offsets aligned
+        # A label's value runs to the end of its line, or the next label on it
+        # that ends it (see _ends_value)
+        pending: Optional[Tuple[str, int, int, bool]] = None
+        for m in _SCAN.finditer(lowered):
+            label = m.group("label")
+            if label is None:
+                if m.group("doctor") and "vet_name" not in fallbacks:
+                    name = _DOCTOR_NAME.match(chunk, m.end())
+                    if name:
+                        fallbacks["vet_name"] = " ".join(chunk[m.start():name.end()].split())
+                elif m.group("chip"):
+                    fallbacks.setdefault("microchip", m.group("chip"))
+                continue
+            field = _label_to_field[" ".join(label.split())]
+            if pending is not None:
+                if m.start() < pending[2] and not self._ends_value(chunk, m, field):
+                    continue  # part of the value: "Cedar Vet Clinic"
+                self._resolve(chunk, fields, *pending, end=min(pending[2], m.start()))
+                pending = None
+            if field in fields:
+                continue
+            if not self._is_field_label(chunk, m, field):
+                if field == "clinic" and "clinic" not in fallbacks:
+                    # "Portland Animal Hospital" heading: the name ends with the label
+                    name = self._column_ending_at(chunk, m.end("label"))
+                    if name:
+                        fallbacks["clinic"] = name
+                continue
+            line_end = chunk.find("\n", m.end())
+            pending = (field, m.end(), len(chunk) if line_end < 0 else line_end, ":" in m.group("sep"))
+        if pending is not None:
+            self._resolve(chunk, fields, *pending, end=pending[2])
+
+    @staticmethod
+    def _is_field_label(chunk: str, m: "re.Match[str]", field: str) -> bool:
+        """Labels count when followed by ':' / '#' or starting a line or column; dates always."""
+        if field in DATE_FIELDS or ":" in m.group("sep") or "#" in m.group("sep"):
+            return True
+        return _starts_column(chunk, m.start())
+
+    @staticmethod
+    def _ends_value(chunk: str, m: "re.Match[str]", field: str) -> bool:
+        """
+        Whether a label inside the previous label's value starts a new field:
+        followed by ':' / '#', starting a column, or a date label before a date.
+        """
+        if ":" in m.group("sep") or "#" in m.group("sep") or _starts_column(chunk, m.start()):
+            return True
+        return field in DATE_FIELDS and _DATE.match(chunk, m.end()) is not None
+
+    @staticmethod
+    def _column_ending_at(chunk: str, end: int) -> Optional[str]:
+        """Text of the line/column that ends at `end`, or None if more follows on it."""
+        line_end = chunk.find("\n", end)
+        rest = chunk[end:line_end if line_end >= 0 else len(chunk)]
+        if _COLUMN_GAP.split(rest, 1)[0].strip(_TRAILING):
+            return None
+        line_start = chunk.rfind("\n", 0, end) + 1
+        return _text(_COLUMN_GAP.split(chunk[line_start:end])[-1].strip(_BULLETS))
+
+    @staticmethod
+    def _resolve(
+        chunk: str,
+        fields: Dict[str, Any],
+        field: str,
+        start: int,
+        line_end: int,
+        colon: bool,
+        end: int
+    ) -> None:
+        value = _COLUMN_GAP.split(chunk[start:end], 1)[0]
+        if not value.strip() and colon and end == line_end < len(chunk):
+            # "Clinic:" with the value on the next line
+            next_end = chunk.find("\n", line_end + 1)
+            next_line = chunk[line_end + 1:next_end if next_end >= 0 else len(chunk)]
+            value = _COLUMN_GAP.split(next_line.strip(), 1)[0]
+        parsed = _PARSERS[field](value)
+        if parsed is not None and field not in fields:
+            fields[field] = parsed
+
+
+# Compiled once per process
+field_extractor = FieldExtractor()
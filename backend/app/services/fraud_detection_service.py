@@ -4,15 +4,18 @@ Fraud Detection Service
 Detects potential fraud and abuse.
 INTERNAL ONLY - flags are never exposed to businesses or public APIs.
 """
-from typing import List, Dict, Any
+from typing import Iterable, List, Dict, Any, Tuple
 from ..models.document import RawDocument
 from ..models.dog import Dog
+from .near_duplicate_index import NearDuplicate
+from .photo_hash_index import PhotoMatch
 
 
 class FraudDetectionService:
     """
     Detects fraud patterns:
     - Document deduplication (same file used for multiple dogs)
+    - Near-duplicate documents (re-scanned or edited copies)
     - Inconsistent data (same microchip, different dogs)
     - Reused PDFs across handlers
     """
@@ -20,23 +23,35 @@ class FraudDetectionService:
     @staticmethod
     def check_document_fraud(
         new_document: RawDocument,
-        existing_documents: List[RawDocument]
+        hash_owners: Iterable[Tuple[str, str]],
+        near_duplicates: Iterable[NearDuplicate] = ()
     ) -> List[str]:
         """
         Check if a new document is potentially fraudulent.
+        `hash_owners` are the (dog_id, handler_id) pairs that have uploaded
+        the same file, from the document hash index.
+        `near_duplicates` are similar earlier documents (near_duplicate_index).
         Returns list of fraud flags (empty if clean).
         """
         flags = []
         
         # Check for duplicate file hash
         duplicate_hash = any(
-            doc.file_hash == new_document.file_hash
-            and doc.dog_id != new_document.dog_id
-            for doc in existing_documents
+            dog_id != new_document.dog_id
+            for dog_id, _ in hash_owners
         )
         if duplicate_hash:
             flags.append("Document hash matches another dog's document - possible reuse")
         
+        # Check for near-duplicates (e.g. same certificate with the name edited)
+        other_dogs = [d for d in near_duplicates if d.dog_id != new_document.dog_id]
+        if other_dogs:
+            best = max(d.similarity for d in other_dogs)
+            flags.append(
+                f"Document content {best:.0%} similar to {len(other_dogs)} "
+                f"document(s) of other dogs - possible edited copy"
+            )
+        
         # Check for suspicious filename patterns
         if "fake" in new_document.filename.lower():
             flags.append("Filename suggests fake document")
@@ -49,10 +64,13 @@ class FraudDetectionService:
     @staticmethod
     def check_dog_consistency(
         dog: Dog,
-        all_dogs: List[Dog]
+        all_dogs: List[Dog],
+        photo_matches: Iterable[PhotoMatch] = ()
     ) -> List[str]:
         """
         Check for data inconsistencies across dogs.
+        `photo_matches` are dogs with a perceptually matching profile photo
+        (photo_hash_index).
         Returns list of inconsistency flags.
         """
         flags = []
@@ -67,8 +85,14 @@ class FraudDetectionService:
             if duplicate_chip:
                 flags.append(f"Microchip {dog.microchip} used by multiple dogs")
         
-        # Check for suspicious photo reuse (would need image hashing)
-        # Placeholder for image similarity detection
+        # Check for the same photo reused by other handlers (e.g. stock photos)
+        other_handlers = [m for m in photo_matches if m.handler_id != dog.handler_id]
+        if other_handlers:
+            handler_count = len({m.handler_id for m in other_handlers})
+            flags.append(
+                f"Profile photo matches {len(other_handlers)} dog(s) of "
+                f"{handler_count} other handler(s) - possible reused photo"
+            )
         
         return flags
     
@@ -0,0 +1,250 @@
+"""
+Fraud Graph
+
+Links dogs and handlers that share evidence into clusters (possible fraud
+rings), kept incrementally with a union-find structure:
+- a dog is joined to its handler
+- dogs sharing a microchip or an uploaded file (file_hash) are joined
+- dogs with near-duplicate documents or matching photos are joined
+
+Shared attributes are matched through a key -> first entity map, so each
+addition is a near-constant-time union - never a scan over all dogs.
+Union by size with path halving keeps find() near-constant; member lists
+and evidence are merged smaller-into-larger.
+
+A cluster is suspicious once it holds shared evidence.
+Union-find cannot split clusters, so rebuild() (startup or admin) recomputes
+the graph from current data after edits or deletions.
+
+Single-worker feature: the graph is per process and only sees the links
+made in its own worker (and the near-duplicate and photo indexes it is
+rebuilt from are per process too). With several workers, run one worker
+for the admin fraud cluster endpoints, or call rebuild() to pick up other
+workers' dogs and shared files.
+INTERNAL ONLY - never exposed to businesses or public APIs.
+"""
+import heapq
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..core.database import get_repository
+from ..core.job_queue import Job, job_queue
+from ..models.dog import Dog
+from .near_duplicate_index import near_duplicate_index
+from .photo_hash_index import photo_hash_index
+
+REBUILD_JOB = "rebuild_fraud_graph"
+
+# Evidence kinds
+MICROCHIP = "microchip"
+FILE_HASH = "file_hash"
+NEAR_DUPLICATE = "near_duplicate"
+PHOTO = "photo"
+
+
+def dog_node(dog_id: str) -> str:
+    return f"dog:{dog_id}"
+
+
+def handler_node(handler_id: str) -> str:
+    return f"handler:{handler_id}"
+
+
+class _Cluster:
+    """Aggregates stored on a union-find root."""
+
+    __slots__ = ("members", "handler_count", "evidence")
+
+    def __init__(self, node: str):
+        self.members: List[str] = [node]
+        self.handler_count = 1 if node.startswith("handler:") else 0
+        # kind -> shared values (microchips, file hashes) or linked dog pairs
+        self.evidence: Dict[str, Set[str]] = {}
+
+    def absorb(self, other: "_Cluster") -> None:
+        self.members.extend(other.members)
+        self.handler_count += other.handler_count
+        for kind, values in other.evidence.items():
+            self.evidence.setdefault(kind, set()).update(values)
+
+
+class FraudGraph:
+    """Incremental union-find over dogs and handlers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._parent: Dict[str, str] = {}
+        self._clusters: Dict[str, _Cluster] = {}  # root -> aggregates
+        self._first_by_key: Dict[Tuple[str, str], str] = {}  # (kind, value) -> node
+        self._suspicious: Set[str] = set()  # roots holding evidence
+
+    # Union-find core (called with the lock held)
+
+    def _add_node(self, node: str) -> None:
+        if node not in self._parent:
+            self._parent[node] = node
+            self._clusters[node] = _Cluster(node)
+
+    def _find(self, node: str) -> str:
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]  # path halving
+            node = parent[node]
+        return node
+
+    def _union(self, a: str, b: str) -> str:
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return root_a
+        cluster_a, cluster_b = self._clusters[root_a], self._clusters[root_b]
+        if len(cluster_a.members) < len(cluster_b.members):
+            root_a, root_b = root_b, root_a
+            cluster_a, cluster_b = cluster_b, cluster_a
+        self._parent[root_b] = root_a
+        cluster_a.absorb(cluster_b)
+        del self._clusters[root_b]
+        if root_b in self._suspicious:
+            self._suspicious.discard(root_b)
+            self._suspicious.add(root_a)
+        return root_a
+
+    def _link(self, a: str, b: str, kind: str, value: str) -> None:
+        self._add_node(a)
+        self._add_node(b)
+        root = self._union(a, b)
+        self._clusters[root].evidence.setdefault(kind, set()).add(value)
+        self._suspicious.add(root)
+
+    def _attach_key(self, node: str, kind: str, value: str) -> None:
+        """Join node with the first entity that had this attribute value."""
+        self._add_node(node)
+        first = self._first_by_key.setdefault((kind, value), node)
+        if first != node:
+            self._link(node, first, kind, value)
+
+    # Incremental updates
+
+    def add_dog(self, dog: Dog) -> None:
+        with self._lock:
+            self._add_dog(dog)
+
+    def _add_dog(self, dog: Dog) -> None:
+        node = dog_node(dog.id)
+        self._add_node(node)
+        self._add_node(handler_node(dog.handler_id))
+        self._union(node, handler_node(dog.handler_id))
+        if dog.microchip:
+            self._attach_key(node, MICROCHIP, dog.microchip)
+
+    def add_document(self, file_hash: str, dog_id: str, handler_id: str) -> None:
+        with self._lock:
+            self._add_document(file_hash, dog_id, handler_id)
+
+    def _add_document(self, file_hash: str, dog_id: str, handler_id: str) -> None:
+        node = dog_node(dog_id)
+        self._add_node(handler_node(handler_id))
+        self._add_node(node)
+        self._union(node, handler_node(handler_id))
+        self._attach_key(node, FILE_HASH, file_hash)
+
+    def link_dogs(self, dog_id: str, other_dog_ids: Iterable[str], kind: str) -> None:
+        """Join dogs matched by similarity (near-duplicate documents, photos)."""
+        with self._lock:
+            for other in other_dog_ids:
+                if other != dog_id:
+                    pair = "|".join(sorted((dog_id, other)))
+                    self._link(dog_node(dog_id), dog_node(other), kind, pair)
+
+    # Queries
+
+    def _describe(self, root: str) -> Dict[str, Any]:
+        cluster = self._clusters[root]
+        dogs = sorted(m[4:] for m in cluster.members if m.startswith("dog:"))
+        handlers = sorted(m[8:] for m in cluster.members if m.startswith("handler:"))
+        return {
+            "cluster_id": root,
+            "size": len(cluster.members),
+            "dog_count": len(dogs),
+            "handler_count": cluster.handler_count,
+            "dog_ids": dogs,
+            "handler_ids": handlers,
+            "suspicious": root in self._suspicious,
+            "evidence": {kind: sorted(values) for kind, values in cluster.evidence.items()},
+        }
+
+    def cluster_of(self, node: str) -> Optional[Dict[str, Any]]:
+        """The cluster containing a dog or handler node, or None if unknown."""
+        with self._lock:
+            if node not in self._parent:
+                return None
+            return self._describe(self._find(node))
+
+    def largest_clusters(
+        self,
+        limit: int = 20,
+        min_handlers: int = 1
+    ) -> List[Dict[str, Any]]:
+        """Largest suspicious clusters with at least min_handlers handlers."""
+        with self._lock:
+            roots = (
+                r for r in self._suspicious
+                if self._clusters[r].handler_count >= min_handlers
+            )
+            largest = heapq.nlargest(
+                limit, roots, key=lambda r: (len(self._clusters[r].members), r)
+            )
+            return [self._describe(r) for r in largest]
+
+    def rebuild(self) -> Dict[str, int]:
+        """Recompute the graph from dogs, the hash index and the similarity indexes."""
+        repo = get_repository()
+        shared_hashes = []
+        after = None
+        while True:
+            rows = repo.list_shared_document_hashes(min_dogs=2, after=after, limit=1000)
+            if not rows:
+                break
+            shared_hashes.extend(r[0] for r in rows)
+            after = rows[-1][0]
+        owners = [(h, repo.get_document_hash_owners(h)) for h in shared_hashes]
+        near_duplicates = near_duplicate_index.dog_matches()
+        photo_matches = photo_hash_index.dog_matches()
+
+        with self._lock:
+            self._reset()
+            for dog in repo.list_dogs():
+                self._add_dog(dog)
+            for file_hash, pairs in owners:
+                for dog_id, handler_id in pairs:
+                    self._add_document(file_hash, dog_id, handler_id)
+            for kind, matches in ((NEAR_DUPLICATE, near_duplicates), (PHOTO, photo_matches)):
+                for dog_id, other in matches:
+                    if dog_id != other:
+                        pair = "|".join(sorted((dog_id, other)))
+                        self._link(dog_node(dog_id), dog_node(other), kind, pair)
+            return self._stats()
+
+    def _stats(self) -> Dict[str, int]:
+        return {
+            "entities": len(self._parent),
+            "clusters": len(self._clusters),
+            "suspicious_clusters": len(self._suspicious),
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return self._stats()
+
+
+# Process-wide graph (not shared between workers, see module docstring)
+fraud_graph = FraudGraph()
+
+
+def submit_rebuild() -> Job:
+    return job_queue.submit(REBUILD_JOB, {}, tenant_id="admin")
+
+
+job_queue.register(REBUILD_JOB, fraud_graph.rebuild)
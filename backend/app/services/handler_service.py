@@ -1,10 +1,20 @@
 """Handler service - get handler data."""
 from typing import Optional
 from ..models.handler import Handler
-from ..core.database import FAKE_DB
+from ..core.database import get_repository
+from .public_status_cache import public_status_cache
 
 
 def get_handler(handler_id: str) -> Optional[Handler]:
     """Get handler by ID."""
-    return FAKE_DB.get("handlers", {}).get(handler_id)
+    return get_repository().get_handler(handler_id)
 
+
+def save_handler(handler: Handler) -> Handler:
+    """Persist a handler."""
+    repo = get_repository()
+    repo.save_handler(handler)
+    public_status_cache.on_handler_saved(
+        handler, (dog.id for dog in repo.find_dogs_by_handler(handler.id))
+    )
+    return handler
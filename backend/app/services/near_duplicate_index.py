@@ -0,0 +1,225 @@
+"""
+Near-Duplicate Document Index
+
+Finds documents whose extracted text is nearly the same as an earlier one
+(re-scanned, re-saved or with a name edited), which exact file_hash
+matching misses.
+- Text is split into character shingles and summarized by a MinHash
+  signature (vectorized with NumPy).
+- Signatures are bucketed by LSH bands, so a lookup only compares against
+  documents sharing at least one band - not the whole population.
+- Candidates are confirmed by estimated Jaccard similarity.
+
+Signatures are persisted in the repository and the band index is rebuilt
+from them on startup.
+INTERNAL ONLY - matches feed fraud flags.
+"""
+import threading
+import zlib
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from ..core.config import (
+    MINHASH_NUM_PERM,
+    MINHASH_BANDS,
+    MINHASH_SHINGLE_SIZE,
+    NEAR_DUPLICATE_THRESHOLD
+)
+from ..core.database import get_repository
+from ..models.document import RawDocument
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SEED = 1  # fixed so signatures stay comparable across processes and restarts
+
+# Extracted fields that describe the upload rather than the document
+_IGNORED_FIELDS = {"source_filename"}
+
+
+class NearDuplicate(NamedTuple):
+    document_id: str
+    dog_id: str
+    handler_id: str
+    similarity: float
+
+
+def document_text(extracted_data: Dict[str, Any]) -> str:
+    """Normalized text of the extracted fields, in a stable order."""
+    parts = []
+    for key in sorted(extracted_data):
+        if key in _IGNORED_FIELDS:
+            continue
+        value = extracted_data[key]
+        if isinstance(value, (list, tuple)):
+            value = " ".join(str(v) for v in value)
+        parts.append(f"{key} {value}")
+    return " ".join(" ".join(parts).lower().split())
+
+
+def shingle_hashes(text: str, size: int = MINHASH_SHINGLE_SIZE) -> np.ndarray:
+    """32-bit hashes of the text's distinct character shingles."""
+    if len(text) <= size:
+        shingles = {text} if text else set()
+    else:
+        shingles = {text[i:i + size] for i in range(len(text) - size + 1)}
+    return np.fromiter(
+        (zlib.crc32(s.encode()) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+
+
+class MinHasher:
+    """MinHash over universal hash functions (a*x + b) mod p."""
+
+    def __init__(self, num_perm: int = MINHASH_NUM_PERM, seed: int = _SEED):
+        rng = np.random.default_rng(seed)
+        # a, b < 2^32 and x < 2^32 keep a*x + b inside uint64 before the mod
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        # (shingles, num_perm) in one pass, then min down each column
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """LSH band index over MinHash signatures."""
+
+    def __init__(
+        self,
+        num_perm: int = MINHASH_NUM_PERM,
+        bands: int = MINHASH_BANDS,
+        threshold: float = NEAR_DUPLICATE_THRESHOLD
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self._hasher = MinHasher(num_perm)
+        self._bands = bands
+        self._rows = num_perm // bands
+        self._threshold = threshold
+        self._lock = threading.Lock()
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._owners: Dict[str, Tuple[str, str]] = {}  # document -> (dog, handler)
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature_for(self, extracted_data: Dict[str, Any]) -> np.ndarray:
+        return self._hasher.signature(shingle_hashes(document_text(extracted_data)))
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[i * self._rows:(i + 1) * self._rows].tobytes()
+            for i in range(self._bands)
+        ]
+
+    def query(
+        self,
+        signature: np.ndarray,
+        exclude: Optional[str] = None
+    ) -> List[NearDuplicate]:
+        """Indexed documents at or above the similarity threshold, most similar first."""
+        with self._lock:
+            candidates: Set[str] = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            candidates.discard(exclude)
+            matches = []
+            for document_id in candidates:
+                similarity = float(np.mean(self._signatures[document_id] == signature))
+                if similarity >= self._threshold:
+                    dog_id, handler_id = self._owners[document_id]
+                    matches.append(NearDuplicate(document_id, dog_id, handler_id, similarity))
+        matches.sort(key=lambda m: (-m.similarity, m.document_id))
+        return matches
+
+    def insert(
+        self,
+        document_id: str,
+        dog_id: str,
+        handler_id: str,
+        signature: np.ndarray
+    ) -> None:
+        with self._lock:
+            previous = self._signatures.get(document_id)
+            if previous is not None:
+                for band, key in enumerate(self._band_keys(previous)):
+                    self._buckets[band].get(key, set()).discard(document_id)
+            self._signatures[document_id] = signature
+            self._owners[document_id] = (dog_id, handler_id)
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, set()).add(document_id)
+
+    def add_document(
+        self,
+        document: RawDocument,
+        extracted_data: Dict[str, Any]
+    ) -> List[NearDuplicate]:
+        """
+        Index a processed document and persist its signature.
+        Returns the earlier documents it nearly duplicates.
+        Documents with no extracted fields are not indexed: every empty
+        text would otherwise match every other.
+        """
+        if not document_text(extracted_data):
+            return []
+        signature = self.signature_for(extracted_data)
+        matches = self.query(signature, exclude=document.id)
+        get_repository().save_document_signature(
+            document.id, document.dog_id, document.handler_id, signature.tobytes()
+        )
+        self.insert(document.id, document.dog_id, document.handler_id, signature)
+        return matches
+
+    def dog_matches(self) -> List[Tuple[str, str]]:
+        """(dog_id, dog_id) pairs of every indexed near-duplicate (fraud graph rebuild)."""
+        with self._lock:
+            documents = list(self._signatures.items())
+        pairs = []
+        for document_id, signature in documents:
+            dog_id = self._owners[document_id][0]
+            pairs.extend(
+                (dog_id, match.dog_id)
+                for match in self.query(signature, exclude=document_id)
+                if match.dog_id != dog_id
+            )
+        return pairs
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Load every persisted signature (startup). Returns the number loaded."""
+        repo = get_repository()
+        loaded = 0
+        after_id = None
+        while True:
+            rows = repo.list_document_signatures(after_id, batch_size)
+            if not rows:
+                break
+            for document_id, dog_id, handler_id, signature in rows:
+                self.insert(
+                    document_id, dog_id, handler_id,
+                    np.frombuffer(signature, dtype=np.uint32)
+                )
+            loaded += len(rows)
+            after_id = rows[-1][0]
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._signatures),
+            "num_perm": self._hasher.num_perm,
+            "bands": self._bands,
+            "rows_per_band": self._rows,
+            "threshold": self._threshold,
+            "buckets": sum(len(b) for b in self._buckets),
+        }
+
+
+# Process-wide index
+near_duplicate_index = NearDuplicateIndex()
@@ -0,0 +1,698 @@
+"""
+PDF Text Layer
+
+Streams the text layer of a stored PDF page by page, without reading the
+file into memory.
+- The blob is memory-mapped; only the cross-reference data, the page
+  tree and each page's content streams are parsed and decoded, so peak
+  memory follows the largest page rather than the file (image data of
+  scanned pages is never decoded).
+- Classic xref tables (following /Prev chains of incremental updates),
+  PDF 1.5 xref streams and object streams are supported; a damaged xref
+  falls back to scanning the file for objects.
+- Text comes from the text operators (Tj, TJ, ', ") of page content
+  streams and form XObjects, mapped through each font's ToUnicode CMap,
+  or read as WinAnsi for simple fonts without one.
+- Stream filters: FlateDecode (with PNG predictors), ASCIIHexDecode and
+  ASCII85Decode. Other filters and encrypted files yield no text.
+
+Scanned PDFs have no text layer: callers fall back to OCR when no page
+yields text.
+"""
+import base64
+import binascii
+import mmap
+import re
+import zlib
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# Decoded size limit per stream (guards against compression bombs)
+MAX_STREAM_BYTES = 16 * 1024 * 1024
+# TJ adjustments (thousandths of an em) wider than this are word gaps
+_TJ_SPACE = 200
+_MAX_FORM_DEPTH = 4
+_MAX_NESTING = 100
+_HEADER_WINDOW = 1024
+_TRAILER_WINDOW = 2048
+
+_WS = rb"[ \t\r\n\f\x00]"
+_REGULAR = rb"[^ \t\r\n\f\x00()<>\[\]{}/%]"
+_SKIP = re.compile(rb"(?:[ \t\r\n\f\x00]+|%[^\r\n]*)*")
+_TOKEN = re.compile(
+    rb"(?P<dict_open><<)|(?P<dict_close>>>)"
+    rb"|(?P<array_open>\[)|(?P<array_close>\])"
+    rb"|(?P<name>/" + _REGULAR + rb"*)"
+    rb"|(?P<number>[+-]?(?:\d+(?:\.\d*)?|\.\d+))(?!" + _REGULAR + rb")"
+    rb"|(?P<hex><[0-9A-Fa-f \t\r\n\f\x00]*>)"
+    rb"|(?P<string>\()"
+    rb"|(?P<keyword>" + _REGULAR + rb"+)"
+)
+_REF_TAIL = re.compile(_WS + rb"+(\d+)" + _WS + rb"+R(?!" + _REGULAR + rb")")
+_STRING_SPECIAL = re.compile(rb"[()\\]")
+_ESCAPE = re.compile(rb"\\([nrtbf()\\]|[0-7]{1,3}|\r\n?|\n)")
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f",
+            b"(": b"(", b")": b")", b"\\": b"\\"}
+_NAME_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+_NOT_HEX = re.compile(rb"[^0-9A-Fa-f]")
+
+_OBJ_HEADER = re.compile(_WS + rb"*(\d+)" + _WS + rb"+(\d+)" + _WS + rb"+obj(?!" + _REGULAR + rb")")
+_OBJ_SCAN = re.compile(rb"(?<![0-9])(\d+)" + _WS + rb"+(\d+)" + _WS + rb"+obj(?!" + _REGULAR + rb")")
+_STREAM_START = re.compile(_WS + rb"*stream(?:\r\n|\n|\r)")
+_ENDSTREAM = re.compile(_WS + rb"*endstream")
+_STARTXREF = re.compile(rb"startxref" + _WS + rb"+(\d+)")
+_XREF_KEYWORD = re.compile(_WS + rb"*xref")
+_XREF_SUBSECTION = re.compile(_WS + rb"*(\d+)" + _WS + rb"+(\d+)(?=" + _WS + rb")")
+_XREF_ENTRY = re.compile(_WS + rb"*(\d{10})" + _WS + rb"(\d{5})" + _WS + rb"([nf])")
+_TRAILER_KEYWORD = re.compile(_WS + rb"*trailer")
+_INLINE_IMAGE_END = re.compile(_WS + rb"EI(?!" + _REGULAR + rb")")
+
+
+class PdfError(Exception):
+    """Raised for files (or parts of files) that cannot be read as PDF."""
+
+
+class _EndOfData(PdfError):
+    pass
+
+
+class Ref(NamedTuple):
+    num: int
+    gen: int
+
+
+class Name(str):
+    """A PDF name (/Type); strings are bytes."""
+
+
+class _Keyword(str):
+    """A bare keyword: operators in content streams."""
+
+
+class _Stream:
+    __slots__ = ("dict", "start")
+
+    def __init__(self, stream_dict: Dict[str, Any], start: int):
+        self.dict = stream_dict
+        self.start = start  # offset of the stream data in the file
+
+
+_ARRAY_END = object()
+_DICT_END = object()
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+def _literal_end(buf: Buffer, pos: int) -> int:
+    """Offset just past the ")" closing a literal string whose body starts at pos."""
+    depth = 1
+    while True:
+        m = _STRING_SPECIAL.search(buf, pos)
+        if m is None:
+            raise PdfError("Unterminated string")
+        ch = buf[m.start()]
+        pos = m.start() + (2 if ch == 0x5C else 1)
+        if ch == 0x28:
+            depth += 1
+        elif ch == 0x29:
+            depth -= 1
+            if depth == 0:
+                return pos
+
+
+def _unescape(raw: bytes) -> bytes:
+    def replace(m: "re.Match[bytes]") -> bytes:
+        esc = m.group(1)
+        if esc in _ESCAPES:
+            return _ESCAPES[esc]
+        if esc[:1].isdigit():
+            return bytes([int(esc, 8) & 0xFF])
+        return b""  # line continuation
+
+    return _ESCAPE.sub(replace, raw)
+
+
+def _parse_value(buf: Buffer, pos: int, depth: int = 0) -> Tuple[Any, int]:
+    """Parse one PDF value (or content-stream operator) at pos."""
+    pos = _SKIP.match(buf, pos).end()
+    m = _TOKEN.match(buf, pos)
+    if m is None:
+        if pos >= len(buf):
+            raise _EndOfData("End of data")
+        raise PdfError(f"Unexpected byte at offset {pos}")
+    kind = m.lastgroup
+    end = m.end()
+    if kind == "number":
+        text = m.group()
+        if b"." in text:
+            return float(text), end
+        ref = _REF_TAIL.match(buf, end)
+        if ref:
+            return Ref(int(text), int(ref.group(1))), ref.end()
+        return int(text), end
+    if kind == "name":
+        return Name(_NAME_ESCAPE.sub(lambda e: bytes([int(e.group(1), 16)]), m.group()[1:]).decode("latin-1")), end
+    if kind == "string":
+        close = _literal_end(buf, end)
+        return _unescape(buf[end:close - 1]), close
+    if kind == "hex":
+        digits = _NOT_HEX.sub(b"", m.group())
+        return binascii.unhexlify(digits + b"0" * (len(digits) % 2)), end
+    if kind == "keyword":
+        word = m.group()
+        if word == b"true":
+            return True, end
+        if word == b"false":
+            return False, end
+        if word == b"null":
+            return None, end
+        return _Keyword(word.decode("latin-1")), end
+    if kind == "array_close":
+        return _ARRAY_END, end
+    if kind == "dict_close":
+        return _DICT_END, end
+
+    if depth >= _MAX_NESTING:
+        raise PdfError("Nesting too deep")
+    if kind == "array_open":
+        items: List[Any] = []
+        while True:
+            value, end = _parse_value(buf, end, depth + 1)
+            if value is _ARRAY_END:
+                return items, end
+            if value is _DICT_END:
+                raise PdfError(f"Unbalanced '>>' at offset {end}")
+            items.append(value)
+    entries: Dict[str, Any] = {}
+    while True:
+        key, end = _parse_value(buf, end, depth + 1)
+        if key is _DICT_END:
+            return entries, end
+        if not isinstance(key, Name):
+            raise PdfError(f"Bad dictionary key at offset {end}")
+        value, end = _parse_value(buf, end, depth + 1)
+        if value is _DICT_END or value is _ARRAY_END:
+            raise PdfError(f"Missing dictionary value at offset {end}")
+        entries[key] = value
+
+
+def _unpredict(data: bytes, parms: Dict[str, Any]) -> bytes:
+    """Undo PNG row predictors (Predictor >= 10)."""
+    if parms.get("Predictor", 1) < 10:
+        return data
+    colors = parms.get("Colors", 1)
+    bits = parms.get("BitsPerComponent", 8)
+    bpp = max(1, colors * bits // 8)
+    row_len = (colors * bits * parms.get("Columns", 1) + 7) // 8
+    out = bytearray()
+    prev = bytearray(row_len)
+    for i in range(0, len(data) - row_len, row_len + 1):
+        kind = data[i]
+        row = bytearray(data[i + 1:i + 1 + row_len])
+        for j in range(row_len):
+            left = row[j - bpp] if j >= bpp else 0
+            if kind == 1:
+                row[j] = (row[j] + left) & 0xFF
+            elif kind == 2:
+                row[j] = (row[j] + prev[j]) & 0xFF
+            elif kind == 3:
+                row[j] = (row[j] + (left + prev[j]) // 2) & 0xFF
+            elif kind == 4:
+                up_left = prev[j - bpp] if j >= bpp else 0
+                p = left + prev[j] - up_left
+                pa, pb, pc = abs(p - left), abs(p - prev[j]), abs(p - up_left)
+                pred = left if pa <= pb and pa <= pc else prev[j] if pb <= pc else up_left
+                row[j] = (row[j] + pred) & 0xFF
+        out += row
+        prev = row
+    return bytes(out)
+
+
+def _apply_filter(name: str, data: bytes, parms: Dict[str, Any]) -> bytes:
+    try:
+        if name in ("FlateDecode", "Fl"):
+            return _unpredict(zlib.decompressobj().decompress(data, MAX_STREAM_BYTES), parms)
+        if name in ("ASCIIHexDecode", "AHx"):
+            digits = _NOT_HEX.sub(b"", data.split(b">", 1)[0])
+            return binascii.unhexlify(digits + b"0" * (len(digits) % 2))
+        if name in ("ASCII85Decode", "A85"):
+            data = data.strip()
+            if data.startswith(b"<~"):
+                data = data[2:]
+            return base64.a85decode(data.split(b"~>", 1)[0], ignorechars=b" \t\r\n\f\x00")
+    except (zlib.error, ValueError) as e:
+        raise PdfError(f"Bad {name} stream: {e}") from e
+    raise PdfError(f"Unsupported filter: {name}")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class _Font:
+    """Decodes shown strings: ToUnicode CMap, else WinAnsi (simple fonts)."""
+
+    __slots__ = ("_cmap", "_lengths", "_composite")
+
+    def __init__(self, cmap: Optional[Dict[bytes, str]], composite: bool):
+        self._cmap = cmap
+        self._lengths = sorted({len(code) for code in cmap}, reverse=True) if cmap else []
+        self._composite = composite
+
+    def decode(self, data: bytes) -> str:
+        if not self._cmap:
+            # Composite fonts need a CMap to mean anything
+            return "" if self._composite else data.decode("cp1252", errors="replace")
+        cmap, out, i = self._cmap, [], 0
+        while i < len(data):
+            for n in self._lengths:
+                text = cmap.get(data[i:i + n])
+                if text is not None:
+                    out.append(text)
+                    i += n
+                    break
+            else:
+                i += 2 if self._composite else 1
+        return "".join(out)
+
+
+_DEFAULT_FONT = _Font(None, False)
+
+
+def _parse_cmap(data: bytes) -> Dict[bytes, str]:
+    """Code -> text of a ToUnicode CMap (bfchar and bfrange entries)."""
+    cmap: Dict[bytes, str] = {}
+    operands: List[Any] = []
+    pos = 0
+    while True:
+        try:
+            value, pos = _parse_value(data, pos)
+        except _EndOfData:
+            return cmap
+        if not isinstance(value, _Keyword):
+            operands.append(value)
+            continue
+        if value == "endbfchar":
+            for src, dst in zip(operands[0::2], operands[1::2]):
+                if isinstance(src, bytes) and isinstance(dst, bytes):
+                    cmap[src] = dst.decode("utf-16-be", errors="replace")
+        elif value == "endbfrange":
+            for lo, hi, dst in zip(operands[0::3], operands[1::3], operands[2::3]):
+                if not (isinstance(lo, bytes) and isinstance(hi, bytes)) or len(lo) != len(hi):
+                    continue
+                first, last = int.from_bytes(lo, "big"), int.from_bytes(hi, "big")
+                for k in range(min(last - first + 1, 0x10000)):
+                    code = (first + k).to_bytes(len(lo), "big")
+                    if isinstance(dst, list):
+                        if k < len(dst) and isinstance(dst[k], bytes):
+                            cmap[code] = dst[k].decode("utf-16-be", errors="replace")
+                    elif isinstance(dst, bytes) and dst:
+                        value_bytes = dst[:-1] + bytes([(dst[-1] + k) & 0xFF])
+                        cmap[code] = value_bytes.decode("utf-16-be", errors="replace")
+        operands.clear()
+
+
+class PdfReader:
+    """Lazy object access over a memory-mapped PDF."""
+
+    def __init__(self, buf: Buffer):
+        self._buf = buf
+        if buf.find(b"%PDF-", 0, _HEADER_WINDOW) < 0:
+            raise PdfError("Not a PDF file")
+        self._xref: Dict[int, Union[int, Tuple[int, int], None]] = {}
+        self._objects: Dict[int, Any] = {}
+        self._fonts: Dict[Any, _Font] = {}
+        try:
+            self.trailer = self._load_xref()
+        except (PdfError, LookupError, TypeError, ValueError):
+            self._xref.clear()
+            self.trailer = self._scan_objects()
+        if "Encrypt" in self.trailer:
+            raise PdfError("Encrypted PDF")
+
+    # --- Cross-reference data ---
+
+    def _load_xref(self) -> Dict[str, Any]:
+        window_start = max(0, len(self._buf) - _TRAILER_WINDOW)
+        at = self._buf.rfind(b"startxref", window_start)
+        m = _STARTXREF.match(self._buf, at) if at >= 0 else None
+        if m is None:
+            raise PdfError("No startxref")
+        offset: Optional[int] = int(m.group(1))
+        trailer: Optional[Dict[str, Any]] = None
+        seen = set()
+        # Newest section first: its entries win over older updates
+        while offset is not None and offset not in seen:
+            seen.add(offset)
+            if _XREF_KEYWORD.match(self._buf, offset):
+                section = self._read_xref_table(offset)
+                if isinstance(section.get("XRefStm"), int):
+                    self._read_xref_stream(section["XRefStm"])  # hybrid files
+            else:
+                section = self._read_xref_stream(offset)
+            if trailer is None:
+                trailer = section
+            offset = section.get("Prev")
+        if trailer is None or "Root" not in trailer:
+            raise PdfError("No trailer")
+        return trailer
+
+    def _read_xref_table(self, offset: int) -> Dict[str, Any]:
+        pos = _XREF_KEYWORD.match(self._buf, offset).end()
+        while True:
+            sub = _XREF_SUBSECTION.match(self._buf, pos)
+            if sub is None:
+                break
+            first, count = int(sub.group(1)), int(sub.group(2))
+            pos = sub.end()
+            for num in range(first, first + count):
+                entry = _XREF_ENTRY.match(self._buf, pos)
+                if entry is None:
+                    raise PdfError(f"Bad xref entry at offset {pos}")
+                pos = entry.end()
+                self._xref.setdefault(num, int(entry.group(1)) if entry.group(3) == b"n" else None)
+        keyword = _TRAILER_KEYWORD.match(self._buf, pos)
+        if keyword is None:
+            raise PdfError("No trailer after xref table")
+        trailer, _ = _parse_value(self._buf, keyword.end())
+        if not isinstance(trailer, dict):
+            raise PdfError("Bad trailer")
+        return trailer
+
+    def _read_xref_stream(self, offset: int) -> Dict[str, Any]:
+        stream = self._read_at(offset)
+        if not isinstance(stream, _Stream) or stream.dict.get("Type") != "XRef":
+            raise PdfError(f"No xref at offset {offset}")
+        widths = [int(w) for w in stream.dict["W"]]
+        row_len = sum(widths)
+        index = stream.dict.get("Index") or [0, stream.dict["Size"]]
+        data = self._decode(stream)
+        pos = 0
+        for first, count in zip(index[0::2], index[1::2]):
+            for num in range(first, first + count):
+                if pos + row_len > len(data):
+                    break
+                fields = []
+                for w in widths:
+                    fields.append(int.from_bytes(data[pos:pos + w], "big") if w else None)
+                    pos += w
+                kind = 1 if fields[0] is None else fields[0]
+                if kind == 0:
+                    self._xref.setdefault(num, None)
+                elif kind == 1:
+                    self._xref.setdefault(num, fields[1])
+                elif kind == 2:
+                    self._xref.setdefault(num, (fields[1], fields[2] or 0))
+        return stream.dict
+
+    def _scan_objects(self) -> Dict[str, Any]:
+        """Rebuild the xref by scanning for "N G obj" (damaged files)."""
+        for m in _OBJ_SCAN.finditer(self._buf):
+            self._xref[int(m.group(1))] = m.start()  # later definitions win
+        trailer: Dict[str, Any] = {}
+        at = self._buf.rfind(b"trailer")
+        if at >= 0:
+            try:
+                value, _ = _parse_value(self._buf, at + len(b"trailer"))
+                if isinstance(value, dict):
+                    trailer = value
+            except PdfError:
+                pass
+        for num in list(self._xref):
+            obj = self.object(num)
+            if isinstance(obj, _Stream) and obj.dict.get("Type") == "ObjStm":
+                for member, _ in self._object_stream_offsets(obj)[0]:
+                    self._xref.setdefault(member, (num, 0))
+            elif "Root" not in trailer and isinstance(obj, dict) and obj.get("Type") == "Catalog":
+                trailer["Root"] = Ref(num, 0)
+        if "Root" not in trailer:
+            raise PdfError("No document catalog")
+        return trailer
+
+    # --- Objects ---
+
+    def _read_at(self, offset: int) -> Any:
+        m = _OBJ_HEADER.match(self._buf, offset)
+        if m is None:
+            raise PdfError(f"No object at offset {offset}")
+        value, pos = _parse_value(self._buf, m.end())
+        if isinstance(value, dict):
+            start = _STREAM_START.match(self._buf, pos)
+            if start:
+                return _Stream(value, start.end())
+        return value
+
+    def object(self, num: int) -> Any:
+        if num in self._objects:
+            return self._objects[num]
+        self._objects[num] = None  # breaks reference cycles
+        entry = self._xref.get(num)
+        if isinstance(entry, int):
+            try:
+                self._objects[num] = self._read_at(entry)
+            except PdfError:
+                pass
+        elif entry is not None:
+            self._load_object_stream(entry[0])
+        return self._objects[num]
+
+    def resolve(self, value: Any) -> Any:
+        for _ in range(32):
+            if not isinstance(value, Ref):
+                return value
+            value = self.object(value.num)
+        return None
+
+    def _object_stream_offsets(self, stream: _Stream) -> Tuple[List[Tuple[int, int]], bytes]:
+        data = self._decode(stream)
+        first = self.resolve(stream.dict.get("First", 0))
+        header, numbers, pos = data[:first], [], 0
+        for _ in range(2 * self.resolve(stream.dict.get("N", 0))):
+            try:
+                value, pos = _parse_value(header, pos)
+            except _EndOfData:
+                break
+            numbers.append(value)
+        pairs = list(zip(numbers[0::2], numbers[1::2]))
+        return [(num, first + offset) for num, offset in pairs], data
+
+    def _load_object_stream(self, stream_num: int) -> None:
+        stream = self.object(stream_num)
+        if not isinstance(stream, _Stream):
+            return
+        try:
+            members, data = self._object_stream_offsets(stream)
+        except PdfError:
+            return
+        for num, offset in members:
+            # Only objects the xref places here (not superseded versions)
+            entry = self._xref.get(num)
+            if isinstance(entry, tuple) and entry[0] == stream_num:
+                try:
+                    self._objects[num] = _parse_value(data, offset)[0]
+                except PdfError:
+                    self._objects[num] = None
+
+    def _decode(self, stream: _Stream) -> bytes:
+        length = self.resolve(stream.dict.get("Length"))
+        start = stream.start
+        end = start + length if isinstance(length, int) and length >= 0 else -1
+        if end < 0 or end > len(self._buf) or not _ENDSTREAM.match(self._buf, end):
+            end = self._buf.find(b"endstream", start)
+            if end < 0:
+                raise PdfError(f"Unterminated stream at offset {start}")
+        data = self._buf[start:end]
+        filters = _as_list(self.resolve(stream.dict.get("Filter")))
+        parms = _as_list(self.resolve(stream.dict.get("DecodeParms")))
+        for i, name in enumerate(filters):
+            parm = self.resolve(parms[i]) if i < len(parms) else None
+            data = _apply_filter(self.resolve(name), data, parm or {})
+        return data
+
+    # --- Pages and text ---
+
+    def pages(self) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """(page dictionary, resources) of every page, in order."""
+        root = self.resolve(self.trailer.get("Root"))
+        if not isinstance(root, dict):
+            raise PdfError("No document catalog")
+        stack: List[Tuple[Any, Optional[Dict[str, Any]]]] = [(root.get("Pages"), None)]
+        seen = set()
+        while stack:
+            ref, inherited = stack.pop()
+            if isinstance(ref, Ref):
+                if ref in seen:
+                    continue
+                seen.add(ref)
+            node = self.resolve(ref)
+            if not isinstance(node, dict):
+                continue
+            resources = self.resolve(node.get("Resources"))
+            if not isinstance(resources, dict):
+                resources = inherited or {}
+            kids = self.resolve(node.get("Kids"))
+            if node.get("Type") == "Page" or not isinstance(kids, list):
+                yield node, resources
+            else:
+                stack.extend((kid, resources) for kid in reversed(kids))
+
+    def page_text(self, page: Dict[str, Any], resources: Dict[str, Any]) -> str:
+        streams = [self.resolve(s) for s in _as_list(self.resolve(page.get("Contents")))]
+        content = b"\n".join(self._decode(s) for s in streams if isinstance(s, _Stream))
+        return self._content_text(content, resources, 0)
+
+    def _font(self, resources: Dict[str, Any], name: Any) -> _Font:
+        fonts = self.resolve(resources.get("Font"))
+        ref = fonts.get(name) if isinstance(fonts, dict) else None
+        key = ref if isinstance(ref, Ref) else id(ref)
+        font = self._fonts.get(key)
+        if font is None:
+            font_dict = self.resolve(ref)
+            font = _DEFAULT_FONT
+            if isinstance(font_dict, dict):
+                to_unicode = self.resolve(font_dict.get("ToUnicode"))
+                cmap = None
+                if isinstance(to_unicode, _Stream):
+                    try:
+                        cmap = _parse_cmap(self._decode(to_unicode))
+                    except PdfError:
+                        pass
+                font = _Font(cmap, font_dict.get("Subtype") == "Type0")
+            self._fonts[key] = font
+        return font
+
+    def _content_text(self, content: bytes, resources: Dict[str, Any], depth: int) -> str:
+        out: List[str] = []
+        operands: List[Any] = []
+        font = _DEFAULT_FONT
+        line_y = 0.0  # current text line position (unscaled)
+        shown_y: Optional[float] = None  # line of the last shown text
+        moved = False
+        leading = 0.0
+
+        def show(text: str) -> None:
+            nonlocal shown_y, moved
+            if shown_y is not None and out:
+                if abs(line_y - shown_y) > 1:
+                    out.append("\n")
+                elif moved and out[-1][-1:] not in (" ", "\n"):
+                    out.append(" ")
+            out.append(text)
+            shown_y = line_y
+            moved = False
+
+        pos = 0
+        while True:
+            try:
+                value, pos = _parse_value(content, pos)
+            except _EndOfData:
+                break
+            if not isinstance(value, _Keyword):
+                operands.append(value)
+                continue
+            op = value
+            try:
+                if op == "Tf":
+                    if isinstance(operands[-2], Name):
+                        font = self._font(resources, operands[-2])
+                elif op == "Tj":
+                    if isinstance(operands[-1], bytes):
+                        show(font.decode(operands[-1]))
+                elif op in ("'", '"'):
+                    line_y -= leading or 1
+                    if isinstance(operands[-1], bytes):
+                        show(font.decode(operands[-1]))
+                elif op == "TJ":
+                    if isinstance(operands[-1], list):
+                        parts = []
+                        for item in operands[-1]:
+                            if isinstance(item, bytes):
+                                parts.append(font.decode(item))
+                            elif (
+                                _is_number(item) and item < -_TJ_SPACE
+                                and parts and not parts[-1].endswith(" ")
+                            ):
+                                parts.append(" ")
+                        show("".join(parts))
+                elif op in ("Td", "TD"):
+                    if _is_number(operands[-1]):
+                        line_y += operands[-1]
+                        if op == "TD":
+                            leading = -operands[-1]
+                    moved = True
+                elif op == "T*":
+                    line_y -= leading or 1
+                elif op == "TL":
+                    if _is_number(operands[-1]):
+                        leading = operands[-1]
+                elif op == "Tm":
+                    if _is_number(operands[-1]):
+                        line_y = operands[-1]
+                    moved = True
+                elif op == "BT":
+                    line_y = 0.0
+                    moved = True
+                elif op == "ID":
+                    end = _INLINE_IMAGE_END.search(content, pos)
+                    pos = end.end() if end else len(content)
+                elif op == "Do" and depth < _MAX_FORM_DEPTH and isinstance(operands[-1], Name):
+                    text = self._form_text(resources, operands[-1], depth)
+                    if text:
+                        out.append("\n" + text + "\n")
+                        shown_y = None
+            except (IndexError, TypeError, AttributeError):
+                pass  # operator with missing or wrong operands
+            operands.clear()
+        lines = "".join(out).split("\n")
+        return "\n".join(line.rstrip() for line in lines if line.strip())
+
+    def _form_text(self, resources: Dict[str, Any], name: Any, depth: int) -> str:
+        xobjects = self.resolve(resources.get("XObject"))
+        form = self.resolve(xobjects.get(name)) if isinstance(xobjects, dict) else None
+        if not isinstance(form, _Stream) or form.dict.get("Subtype") != "Form":
+            return ""  # images are never decoded
+        form_resources = self.resolve(form.dict.get("Resources"))
+        if not isinstance(form_resources, dict):
+            form_resources = resources
+        return self._content_text(self._decode(form), form_resources, depth + 1)
+
+
+# Malformed structures inside a page only lose that page's text
+_PAGE_ERRORS = (PdfError, LookupError, TypeError, ValueError, AttributeError, RecursionError)
+
+
+def iter_pdf_text(path: str) -> Iterator[str]:
+    """
+    Text of each page of the PDF at path, in order ("" for pages without
+    text). Raises PdfError if the file is not a readable PDF.
+    """
+    with open(path, "rb") as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # empty file
+            raise PdfError(str(e)) from e
+        with buf:
+            try:
+                reader = PdfReader(buf)
+            except PdfError:
+                raise
+            except _PAGE_ERRORS as e:
+                raise PdfError(f"Unreadable PDF: {e}") from e
+            pages = reader.pages()
+            while True:
+                try:
+                    page, resources = next(pages)
+                except StopIteration:
+                    return
+                except _PAGE_ERRORS as e:
+                    raise PdfError(f"Bad page tree: {e}") from e
+                try:
+                    text = reader.page_text(page, resources)
+                except _PAGE_ERRORS:
+                    text = ""
+                yield text
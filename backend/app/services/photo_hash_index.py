@@ -0,0 +1,306 @@
+"""
+Photo Hash Index
+
+Detects the same profile photo (often a stock image) reused across dogs.
+- Each Dog.photo_url image is decoded and reduced to two 64-bit perceptual
+  hashes: aHash (pixels vs mean) and dHash (horizontal gradients).
+  Re-encoding, resizing and small edits move them only a few bits.
+- dHashes are kept in a BK-tree, so "within Hamming radius r" queries
+  prune most of the population by the triangle inequality instead of
+  comparing every pair. Candidates are confirmed on aHash.
+
+Hashes are persisted in the repository and the tree is rebuilt on startup.
+Photos are hashed by a background job (dog_service) whenever a dog's
+photo_url changes. A photo_url that cannot be hashed is recorded as failed
+and not tried again until the dog's photo_url changes.
+INTERNAL ONLY - matches feed fraud flags.
+"""
+import io
+import os
+import threading
+import urllib.request
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image
+
+from ..core.config import (
+    PHOTO_ROOT,
+    PHOTO_FETCH_REMOTE,
+    PHOTO_MAX_BYTES,
+    PHOTO_FETCH_TIMEOUT_SECONDS,
+    PHOTO_HASH_MAX_DISTANCE
+)
+from ..core.database import get_repository
+from ..core.job_queue import PermanentJobError
+from ..models.dog import Dog
+from .blob_store import blob_store
+
+_HASH_SIZE = 8  # 8x8 -> 64-bit hashes
+_BLOB_PREFIX = "blob://sha256/"
+
+
+class PhotoMatch(NamedTuple):
+    dog_id: str
+    handler_id: str
+    distance: int  # dHash Hamming distance
+
+
+def average_hash(pixels: np.ndarray) -> int:
+    """aHash of an 8x8 grayscale array: bit set where the pixel is above the mean."""
+    bits = (pixels > pixels.mean()).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def difference_hash(pixels: np.ndarray) -> int:
+    """dHash of an 8x9 grayscale array: bit set where brightness increases left to right."""
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def image_hashes(image: Image.Image) -> Tuple[int, int]:
+    """(aHash, dHash) of an image."""
+    gray = image.convert("L")
+    small = np.asarray(gray.resize((_HASH_SIZE, _HASH_SIZE), Image.LANCZOS), dtype=np.float32)
+    wide = np.asarray(gray.resize((_HASH_SIZE + 1, _HASH_SIZE), Image.LANCZOS), dtype=np.float32)
+    return average_hash(small), difference_hash(wide)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes with Hamming distance.
+    Each node holds the ids sharing its exact hash; removing an id leaves
+    the node in place as a routing node.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self):
+        # node: [hash, ids, {distance: child}]
+        self._root: Optional[list] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item_id: str) -> None:
+        if self._root is None:
+            self._root = [value, {item_id}, {}]
+            self._size = 1
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].add(item_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, {item_id}, {}]
+                self._size += 1
+                return
+            node = child
+
+    def discard(self, value: int, item_id: str) -> None:
+        node = self._root
+        while node is not None:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].discard(item_id)
+                return
+            node = node[2].get(distance)
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, int, Set[str]]]:
+        """(distance, hash, ids) of every node within radius."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius and node[1]:
+                found.append((distance, node[0], node[1]))
+            # Only subtrees at |d - k| <= radius can hold matches
+            for k, child in node[2].items():
+                if distance - radius <= k <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+def open_photo(photo_url: str) -> BinaryIO:
+    """
+    Open a photo from the blob store, the local photo root, or (when
+    enabled) over HTTP. Raises PermanentJobError for unusable URLs.
+    """
+    if photo_url.startswith(_BLOB_PREFIX):
+        return blob_store.open(photo_url[len(_BLOB_PREFIX):])
+    if photo_url.startswith(("http://", "https://")):
+        if not PHOTO_FETCH_REMOTE:
+            raise PermanentJobError("Remote photo fetching is disabled")
+        with urllib.request.urlopen(photo_url, timeout=PHOTO_FETCH_TIMEOUT_SECONDS) as response:
+            data = response.read(PHOTO_MAX_BYTES + 1)
+        if len(data) > PHOTO_MAX_BYTES:
+            raise PermanentJobError("Photo is too large")
+        return io.BytesIO(data)
+
+    root = os.path.realpath(PHOTO_ROOT)
+    path = os.path.realpath(os.path.join(root, photo_url.lstrip("/")))
+    if not path.startswith(root + os.sep):
+        raise PermanentJobError("Photo path is outside the photo root")
+    if not os.path.isfile(path):
+        raise PermanentJobError("Photo not found")
+    return open(path, "rb")
+
+
+class PhotoHashIndex:
+    """Perceptual hashes of dog profile photos with radius queries."""
+
+    def __init__(self, max_distance: int = PHOTO_HASH_MAX_DISTANCE):
+        self._max_distance = max_distance
+        self._lock = threading.Lock()
+        self._tree = BKTree()
+        # dog_id -> (handler_id, photo_url, aHash, dHash)
+        self._dogs: Dict[str, Tuple[str, str, int, int]] = {}
+        # dog_id -> photo_url that could not be hashed
+        self._failed: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._dogs)
+
+    def photo_url_for(self, dog_id: str) -> Optional[str]:
+        entry = self._dogs.get(dog_id)
+        return entry[1] if entry else None
+
+    def insert(
+        self,
+        dog_id: str,
+        handler_id: str,
+        photo_url: str,
+        ahash: int,
+        dhash: int
+    ) -> None:
+        with self._lock:
+            self._remove(dog_id)
+            self._dogs[dog_id] = (handler_id, photo_url, ahash, dhash)
+            self._tree.add(dhash, dog_id)
+
+    def remove(self, dog_id: str) -> None:
+        with self._lock:
+            self._remove(dog_id)
+
+    def _remove(self, dog_id: str) -> None:
+        previous = self._dogs.pop(dog_id, None)
+        if previous is not None:
+            self._tree.discard(previous[3], dog_id)
+
+    def query(
+        self,
+        ahash: int,
+        dhash: int,
+        exclude: Optional[str] = None
+    ) -> List[PhotoMatch]:
+        """Dogs whose photo is within the Hamming radius on both hashes, closest first."""
+        matches = []
+        with self._lock:
+            for distance, _, dog_ids in self._tree.search(dhash, self._max_distance):
+                for dog_id in dog_ids:
+                    if dog_id == exclude:
+                        continue
+                    handler_id, _, other_ahash, _ = self._dogs[dog_id]
+                    if hamming(ahash, other_ahash) <= self._max_distance:
+                        matches.append(PhotoMatch(dog_id, handler_id, distance))
+        matches.sort(key=lambda m: (m.distance, m.dog_id))
+        return matches
+
+    def matches_for_dog(self, dog_id: str) -> List[PhotoMatch]:
+        entry = self._dogs.get(dog_id)
+        if entry is None:
+            return []
+        return self.query(entry[2], entry[3], exclude=dog_id)
+
+    def hash_dog_photo(self, dog: Dog) -> List[PhotoMatch]:
+        """
+        Decode and hash a dog's photo, persist and index it.
+        Returns the dogs whose photo it matches.
+        """
+        repo = get_repository()
+        if dog.id in self._failed:
+            repo.delete_photo_hash_failure(dog.id)
+            self._failed.pop(dog.id, None)
+        if not dog.photo_url:
+            repo.delete_photo_hash(dog.id)
+            self.remove(dog.id)
+            return []
+
+        try:
+            with open_photo(dog.photo_url) as f:
+                image = Image.open(f)
+                image.draft("L", (64, 64))  # decode JPEGs at reduced size
+                ahash, dhash = image_hashes(image)
+        except (OSError, Image.DecompressionBombError, PermanentJobError) as e:
+            # The old hash no longer describes the dog's photo
+            repo.delete_photo_hash(dog.id)
+            self.remove(dog.id)
+            repo.save_photo_hash_failure(dog.id, dog.photo_url)
+            self._failed[dog.id] = dog.photo_url
+            if isinstance(e, PermanentJobError):
+                raise
+            raise PermanentJobError(f"Unreadable photo: {e}") from e
+
+        repo.save_photo_hash(dog.id, dog.handler_id, dog.photo_url, ahash, dhash)
+        self.insert(dog.id, dog.handler_id, dog.photo_url, ahash, dhash)
+        return self.matches_for_dog(dog.id)
+
+    def needs_hash(self, dog: Dog) -> bool:
+        """True if the dog's photo changed since it was last hashed (or failed to be)."""
+        return (
+            dog.photo_url != self.photo_url_for(dog.id)
+            and dog.photo_url != self._failed.get(dog.id)
+        )
+
+    def dog_matches(self) -> List[Tuple[str, str]]:
+        """(dog_id, dog_id) pairs of every matching photo (fraud graph rebuild)."""
+        return [
+            (dog_id, match.dog_id)
+            for dog_id in list(self._dogs)
+            for match in self.matches_for_dog(dog_id)
+        ]
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Load persisted photo hashes and failures (startup). Returns the number of hashes."""
+        repo = get_repository()
+        loaded = 0
+        after_id = None
+        while True:
+            rows = repo.list_photo_hashes(after_id, batch_size)
+            if not rows:
+                break
+            for dog_id, handler_id, photo_url, ahash, dhash in rows:
+                self.insert(dog_id, handler_id, photo_url, ahash, dhash)
+            loaded += len(rows)
+            after_id = rows[-1][0]
+        after_id = None
+        while True:
+            failures = repo.list_photo_hash_failures(after_id, batch_size)
+            if not failures:
+                break
+            self._failed.update(failures)
+            after_id = failures[-1][0]
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dogs": len(self._dogs),
+            "tree_nodes": len(self._tree),
+            "failed": len(self._failed),
+            "max_distance": self._max_distance,
+        }
+
+
+# Process-wide index
+photo_hash_index = PhotoHashIndex()
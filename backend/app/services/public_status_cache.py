@@ -0,0 +1,208 @@
+"""
+Public Status Cache
+
+Bounded LRU/TTL cache of PublicStatusSummary per dog for the business
+verification hot path. Each entry also holds the pre-serialized JSON body.
+
+Entries are invalidated when:
+- the dog's records change (record_service)
+- a public dog field changes: name, photo, verification level, service role (dog_service)
+- the handler's name changes (handler_service)
+- a record expires or starts expiring soon (expiration scheduler, via record_service)
+- the TTL elapses
+
+The cache is per process; the hooks above only run in the writing worker.
+Writes by other workers are picked up on read: at most every
+PUBLIC_STATUS_CACHE_SYNC_SECONDS the repository's record, dog and handler
+change feeds are checked and the affected dogs are invalidated.
+
+Concurrent misses for the same dog are coalesced by public_status_flight.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set
+
+from ..core.config import (
+    PUBLIC_STATUS_CACHE_SIZE,
+    PUBLIC_STATUS_CACHE_SYNC_SECONDS,
+    PUBLIC_STATUS_CACHE_TTL_SECONDS
+)
+from ..core.database import get_repository
+from ..core.repository import DOG_CHANGES, HANDLER_CHANGES, RECORD_CHANGES
+from ..core.singleflight import SingleFlight
+from ..models.dog import Dog
+from ..models.handler import Handler
+from ..models.verification import PublicStatusSummary
+
+
+class CachedPublicStatus:
+    """A cached summary and its serialized JSON body."""
+
+    __slots__ = ("summary", "body", "expires_at")
+
+    def __init__(self, summary: PublicStatusSummary, expires_at: float):
+        self.summary = summary
+        self.body = summary.model_dump_json().encode()
+        self.expires_at = expires_at  # monotonic clock
+
+
+class PublicStatusCache:
+    """LRU cache of public status summaries keyed by dog_id."""
+
+    def __init__(
+        self,
+        max_entries: int = PUBLIC_STATUS_CACHE_SIZE,
+        ttl_seconds: float = PUBLIC_STATUS_CACHE_TTL_SECONDS,
+        sync_interval: float = PUBLIC_STATUS_CACHE_SYNC_SECONDS
+    ):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._sync_lock = threading.Lock()
+        self._sync_interval = sync_interval
+        self._seqs: Dict[str, int] = {}  # feed -> change seq last synced
+        self._next_sync = 0.0
+        self._entries: "OrderedDict[str, CachedPublicStatus]" = OrderedDict()
+        # Bumped on every invalidation, so a summary computed from data that
+        # changed mid-computation is never stored. Dogs are stamped with the
+        # generation of their last invalidation; the stamps are bounded like
+        # the entries, and a put older than the newest dropped stamp is refused.
+        self._generation = 0
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._forgotten = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _sync(self) -> None:
+        """Invalidate dogs whose records, profile or handler were saved since the last check."""
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        with self._sync_lock:
+            if now < self._next_sync:
+                return
+            repo = get_repository()
+            changed: Dict[str, Set[str]] = {}
+            for feed in (RECORD_CHANGES, DOG_CHANGES, HANDLER_CHANGES):
+                seq, keys = repo.changes_since(feed, self._seqs.get(feed))
+                if feed in self._seqs:
+                    changed[feed] = set(keys)
+                self._seqs[feed] = seq
+            self._next_sync = now + self._sync_interval
+            dog_ids = changed.get(RECORD_CHANGES, set()) | changed.get(DOG_CHANGES, set())
+            for handler_id in changed.get(HANDLER_CHANGES, ()):
+                dog_ids.update(dog.id for dog in repo.find_dogs_by_handler(handler_id))
+            for dog_id in dog_ids:
+                self.invalidate(dog_id)
+
+    def get(self, dog_id: str) -> Optional[CachedPublicStatus]:
+        """Get a fresh entry, or None on a miss."""
+        self._sync()
+        with self._lock:
+            entry = self._entries.get(dog_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[dog_id]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(dog_id)
+            self.hits += 1
+            return entry
+
+    def generation(self, dog_id: str) -> int:
+        """Current invalidation generation; read before computing a summary."""
+        return self._generation
+
+    def put(
+        self,
+        summary: PublicStatusSummary,
+        generation: Optional[int] = None
+    ) -> CachedPublicStatus:
+        """
+        Cache a summary, evicting the least recently used entry if full.
+        If `generation` is given and the dog was invalidated since, the entry
+        is returned but not stored.
+        """
+        entry = CachedPublicStatus(summary, time.monotonic() + self._ttl_seconds)
+        with self._lock:
+            if generation is not None and (
+                generation < self._forgotten
+                or self._invalidated.get(summary.dog_id, 0) > generation
+            ):
+                return entry
+            self._entries[summary.dog_id] = entry
+            self._entries.move_to_end(summary.dog_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, dog_id: str) -> None:
+        """Drop a dog's entry."""
+        with self._lock:
+            self._generation += 1
+            self._invalidated[dog_id] = self._generation
+            self._invalidated.move_to_end(dog_id)
+            while len(self._invalidated) > self._max_entries:
+                _, self._forgotten = self._invalidated.popitem(last=False)
+            if self._entries.pop(dog_id, None) is not None:
+                self.invalidations += 1
+
+    def on_dog_saved(self, dog: Dog) -> None:
+        """Invalidate if any public field of the dog changed."""
+        entry = self._entries.get(dog.id)
+        if entry is None:
+            # Nothing cached, but a summary may be mid-computation
+            self.invalidate(dog.id)
+            return
+        summary = entry.summary
+        if (
+            summary.dog_name != dog.name
+            or summary.dog_photo_url != dog.photo_url
+            or summary.verification_level != dog.verification_level
+            or summary.service_role != dog.service_role
+        ):
+            self.invalidate(dog.id)
+
+    def on_handler_saved(self, handler: Handler, dog_ids: Iterable[str]) -> None:
+        """Invalidate the handler's dogs if the handler name changed."""
+        for dog_id in dog_ids:
+            entry = self._entries.get(dog_id)
+            if entry is None or entry.summary.handler_name != handler.name:
+                self.invalidate(dog_id)
+
+    def clear(self) -> None:
+        """Drop every entry; summaries being computed are not stored either."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._invalidated.clear()
+            self._forgotten = self._generation
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+# Process-wide cache
+public_status_cache = PublicStatusCache()
+
+# Coalesces concurrent cache misses for the same dog
+public_status_flight = SingleFlight("public_status")
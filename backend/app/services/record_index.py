@@ -0,0 +1,194 @@
+"""
+Record Index
+
+In-process index over a dog's records, kept consistent by record_service.
+Provides:
+- Global record_id -> record lookup (O(1))
+- Per-dog record_id -> record lookup, in insertion order
+- Per-dog, per-category ordering by expiration date (soonest first)
+- Per-dog EvidenceSummary for constant-time verification decisions
+- Per-dog VerificationRecords, converted once as records are indexed,
+  for the verification paths
+
+Dogs are loaded from the repository lazily on first access.
+The index is per process. Record writes go through record_service; writes
+by other workers are picked up on read: at most every
+RECORD_INDEX_SYNC_SECONDS the repository's record change sequence is
+checked and dogs saved since are dropped, to be reloaded on next access.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..core.config import RECORD_INDEX_SYNC_SECONDS
+from ..core.database import get_repository
+from ..core.repository import RECORD_CHANGES, AnyRecord
+from .evidence_summary import EvidenceSummary
+from .verification_record import VerificationRecord, to_verification_record
+
+# (no_expiry, expiration_date, record_id) - records without an expiry sort last
+_ExpiryKey = Tuple[bool, date, str]
+
+
+def _expiry_key(record: VerificationRecord) -> _ExpiryKey:
+    expiry = record.expiry
+    return (expiry is None, expiry or date.max, record.id)
+
+
+class RecordIndex:
+    """Indexes records by id, by dog, and by (dog, category) ordered by expiry."""
+
+    def __init__(self, sync_interval: float = RECORD_INDEX_SYNC_SECONDS):
+        self._lock = threading.RLock()
+        self._sync_interval = sync_interval
+        self._seq: Optional[int] = None  # repository record change seq last synced
+        self._next_sync = 0.0
+        self._by_id: Dict[str, AnyRecord] = {}
+        self._by_dog: Dict[str, Dict[str, AnyRecord]] = {}
+        self._views: Dict[str, Dict[str, VerificationRecord]] = {}
+        self._by_category: Dict[Tuple[str, str], List[_ExpiryKey]] = {}
+        # record_id -> (dog_id, category, expiry key) it is currently filed under
+        self._filed_as: Dict[str, Tuple[str, str, _ExpiryKey]] = {}
+        self._evidence: Dict[str, EvidenceSummary] = {}
+        self._loaded_dogs: Set[str] = set()
+
+    def _sync(self) -> None:
+        """Drop loaded dogs whose records were saved since the last check."""
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        with self._lock:
+            seq, changed = get_repository().changes_since(RECORD_CHANGES, self._seq)
+            self._next_sync = now + self._sync_interval
+            if self._seq is not None:
+                for dog_id in changed:
+                    if dog_id in self._loaded_dogs:
+                        self.forget_dog(dog_id)
+            self._seq = seq
+
+    def _ensure_loaded(self, dog_id: str) -> None:
+        self._sync()
+        if dog_id in self._loaded_dogs:
+            return
+        with self._lock:
+            if dog_id in self._loaded_dogs:
+                return
+            self._by_dog.setdefault(dog_id, {})
+            self._evidence.setdefault(dog_id, EvidenceSummary())
+            for record in get_repository().list_records(dog_id):
+                self._file(record)
+            self._loaded_dogs.add(dog_id)
+
+    def preload(self, dog_ids: List[str]) -> None:
+        """Load several dogs' records with one bulk repository read."""
+        self._sync()
+        missing = [i for i in dict.fromkeys(dog_ids) if i not in self._loaded_dogs]
+        if not missing:
+            return
+        with self._lock:
+            missing = [i for i in missing if i not in self._loaded_dogs]
+            bulk = get_repository().list_records_for_dogs(missing)
+            for dog_id in missing:
+                self._by_dog.setdefault(dog_id, {})
+                self._evidence.setdefault(dog_id, EvidenceSummary())
+                for record in bulk.get(dog_id, []):
+                    self._file(record)
+                self._loaded_dogs.add(dog_id)
+
+    def _file(self, record: AnyRecord) -> None:
+        """Add or re-file a record under its current dog, category and expiry."""
+        view = to_verification_record(record)
+        category = view.category
+        key = _expiry_key(view)
+        filed = (record.dog_id, category, key)
+        previous = self._filed_as.get(record.id)
+
+        if previous is not None and previous != filed:
+            old_dog_id, old_category, old_key = previous
+            entries = self._by_category.get((old_dog_id, old_category), [])
+            i = bisect_left(entries, old_key)
+            if i < len(entries) and entries[i] == old_key:
+                del entries[i]
+            if old_dog_id != record.dog_id:
+                self._by_dog.get(old_dog_id, {}).pop(record.id, None)
+                self._views.get(old_dog_id, {}).pop(record.id, None)
+                if old_dog_id in self._evidence:
+                    self._evidence[old_dog_id].discard(record.id)
+
+        self._by_id[record.id] = record
+        self._by_dog.setdefault(record.dog_id, {})[record.id] = record
+        self._views.setdefault(record.dog_id, {})[record.id] = view
+        self._evidence.setdefault(record.dog_id, EvidenceSummary()).update(view)
+        if previous != filed:
+            insort(self._by_category.setdefault((record.dog_id, category), []), key)
+            self._filed_as[record.id] = filed
+
+    def upsert(self, record: AnyRecord) -> None:
+        """Index a newly created or updated record."""
+        with self._lock:
+            self._ensure_loaded(record.dog_id)
+            self._file(record)
+
+    # Reads hold the lock so a sync can't drop the dog between load and read
+
+    def get(self, dog_id: str, record_id: str) -> Optional[AnyRecord]:
+        """Get a record belonging to a dog."""
+        with self._lock:
+            self._ensure_loaded(dog_id)
+            return self._by_dog[dog_id].get(record_id)
+
+    def get_by_id(self, record_id: str) -> Optional[AnyRecord]:
+        """Get a record by id, if its dog has been loaded."""
+        self._sync()
+        return self._by_id.get(record_id)
+
+    def records_for_dog(self, dog_id: str) -> List[AnyRecord]:
+        """All records for a dog, in insertion order."""
+        with self._lock:
+            self._ensure_loaded(dog_id)
+            return list(self._by_dog[dog_id].values())
+
+    def verification_records(self, dog_id: str) -> List[VerificationRecord]:
+        """A dog's records as VerificationRecords, in insertion order."""
+        with self._lock:
+            self._ensure_loaded(dog_id)
+            return list(self._views.get(dog_id, {}).values())
+
+    def records_by_category(self, dog_id: str, category: str) -> List[AnyRecord]:
+        """A dog's records in one category, soonest expiration first."""
+        with self._lock:
+            self._ensure_loaded(dog_id)
+            entries = self._by_category.get((dog_id, category), [])
+            return [self._by_id[key[2]] for key in entries]
+
+    def earliest_expiry(self, dog_id: str, category: str) -> Optional[date]:
+        """Soonest expiration date among a dog's records in one category."""
+        with self._lock:
+            self._ensure_loaded(dog_id)
+            entries = self._by_category.get((dog_id, category))
+            if not entries or entries[0][0]:
+                return None
+            return entries[0][1]
+
+    def evidence(self, dog_id: str) -> EvidenceSummary:
+        """A dog's evidence summary."""
+        with self._lock:
+            self._ensure_loaded(dog_id)
+            return self._evidence[dog_id]
+
+    def forget_dog(self, dog_id: str) -> None:
+        """Drop a dog's records so they are reloaded from the repository."""
+        with self._lock:
+            self._views.pop(dog_id, None)
+            for record_id in self._by_dog.pop(dog_id, {}):
+                self._by_id.pop(record_id, None)
+                _, category, _ = self._filed_as.pop(record_id)
+                self._by_category.pop((dog_id, category), None)
+            self._evidence.pop(dog_id, None)
+            self._loaded_dogs.discard(dog_id)
+
+
+# Process-wide index
+record_index = RecordIndex()
@@ -1,7 +1,37 @@
 from typing import Optional
 from uuid import uuid4
 from ..models.record import Record
-from ..core.database import FAKE_DB
+from ..core.database import get_repository
+from ..core.repository import AnyRecord
+from .evidence_summary import EvidenceSummary
+from .expiration_scheduler import expiration_scheduler
+from .public_status_cache import public_status_cache
+from .record_index import record_index
+from .rescore_scheduler import rescore_scheduler
+from .verification_record import VerificationRecord
+
+
+def _record_changed(record: AnyRecord) -> None:
+    """Keep indexes, caches and scores consistent after a record write."""
+    record_index.upsert(record)
+    public_status_cache.invalidate(record.dog_id)
+    rescore_scheduler.mark_dirty(record.dog_id)
+    expiration_scheduler.track(record)
+
+
+def _apply_expiry_transition(record: AnyRecord, expiring_soon: bool, is_expired: bool) -> None:
+    """
+    Save a record's new expiry state (expiration scheduler listener).
+    The scheduler passes the record as just read from the repository.
+    """
+    updated = record.model_copy(
+        update={"expiring_soon": expiring_soon, "is_expired": is_expired}
+    )
+    get_repository().save_record(updated)
+    _record_changed(updated)
+
+
+expiration_scheduler.add_listener(_apply_expiry_transition)
 
 
 def create_record(
@@ -10,10 +40,12 @@ def create_record(
     category: str
 ) -> Optional[Record]:
     """Create a new record for a dog."""
+    repo = get_repository()
+
     # Check if dog exists
-    if dog_id not in FAKE_DB["dogs"]:
+    if repo.get_dog(dog_id) is None:
         return None
-    
+
     # Create new record
     record = Record(
         id=str(uuid4()),
@@ -22,33 +54,37 @@ def create_record(
         category=category,
         status="uploaded"
     )
-    
+
     # Add to dog's records
-    FAKE_DB["dogs"][dog_id].records.append(record)
-    
+    repo.save_record(record)
+    _record_changed(record)
+
     return record
 
 
 def get_record(dog_id: str, record_id: str) -> Optional[Record]:
     """Get a specific record for a dog."""
-    dog = FAKE_DB["dogs"].get(dog_id)
-    if not dog:
-        return None
-    
-    for record in dog.records:
-        if record.id == record_id:
-            return record
-    
-    return None
+    return record_index.get(dog_id, record_id)
 
 
 def get_dog_records(dog_id: str) -> list[Record]:
     """Get all records for a dog."""
-    dog = FAKE_DB["dogs"].get(dog_id)
-    if not dog:
-        return []
-    
-    return dog.records
+    return record_index.records_for_dog(dog_id)
+
+
+def get_verification_records(dog_id: str) -> list[VerificationRecord]:
+    """Get all records for a dog, as read by the verification paths."""
+    return record_index.verification_records(dog_id)
+
+
+def get_records_by_category(dog_id: str, category: str) -> list[Record]:
+    """Get a dog's records in one category, soonest expiration first."""
+    return record_index.records_by_category(dog_id, category)
+
+
+def get_evidence_summary(dog_id: str) -> EvidenceSummary:
+    """Get a dog's incrementally maintained evidence summary."""
+    return record_index.evidence(dog_id)
 
 
 def update_record(
@@ -60,10 +96,12 @@ def update_record(
     issues: Optional[list[str]] = None
 ) -> Optional[Record]:
     """Update a record's analysis information."""
-    record = get_record(dog_id, record_id)
-    if not record:
+    # Read-modify-write from the repository: the index copy may be behind
+    # a write made by another worker
+    record = get_repository().get_record(record_id)
+    if not record or record.dog_id != dog_id:
         return None
-    
+
     if status is not None:
         record.status = status
     if analysis_status is not None:
@@ -72,6 +110,8 @@ def update_record(
         record.risk_score = risk_score
     if issues is not None:
         record.issues = issues
-    
-    return record
 
+    get_repository().save_record(record)
+    _record_changed(record)
+
+    return record
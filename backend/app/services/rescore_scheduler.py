@@ -0,0 +1,218 @@
+"""
+Rescore Scheduler
+
+Keeps stored InternalVerificationScores and Dog.verification_level current
+as records change, without rescoring on the request path.
+- Record and profile writes mark the dog dirty (mark_dirty).
+- A background thread rescores dirty dogs once they have been quiet for
+  the debounce window, so a burst of uploads causes one rescore. A dog
+  that keeps changing is still rescored after the maximum delay.
+- Due dogs are scored together with the batch scorer and applied in one
+  pass: scores are stored, level changes are saved with a
+  VerificationHistory entry, and the review queue is updated.
+- A batch that fails is marked dirty again and retried with exponential
+  backoff, up to max_attempts per dog.
+
+When the worker is not running (scripts, tests) dogs are rescored
+synchronously on mark_dirty.
+INTERNAL ONLY - scores are never exposed to businesses.
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..core.config import (
+    RESCORE_DEBOUNCE_SECONDS,
+    RESCORE_MAX_DELAY_SECONDS,
+    RESCORE_BATCH_SIZE,
+    RESCORE_MAX_ATTEMPTS,
+    RESCORE_RETRY_BASE_SECONDS,
+    RESCORE_RETRY_MAX_SECONDS
+)
+from ..core.database import get_repository
+from ..models.verification import InternalVerificationScores
+from .batch_scoring import apply_batch, score_batch
+from .record_index import record_index
+from .review_queue_service import review_queue
+
+logger = logging.getLogger(__name__)
+
+
+class RescoreScheduler:
+    """Debounced, coalescing rescoring of dirty dogs."""
+
+    def __init__(
+        self,
+        debounce: float = RESCORE_DEBOUNCE_SECONDS,
+        max_delay: float = RESCORE_MAX_DELAY_SECONDS,
+        batch_size: int = RESCORE_BATCH_SIZE,
+        max_attempts: int = RESCORE_MAX_ATTEMPTS,
+        retry_base: float = RESCORE_RETRY_BASE_SECONDS,
+        retry_max: float = RESCORE_RETRY_MAX_SECONDS
+    ):
+        self._debounce = debounce
+        self._max_delay = max_delay
+        self._batch_size = batch_size
+        self._max_attempts = max_attempts
+        self._retry_base = retry_base
+        self._retry_max = retry_max
+        self._wakeup = threading.Condition(threading.Lock())
+        # dog_id -> (first marked, last marked), monotonic seconds
+        self._dirty: Dict[str, Tuple[float, float]] = {}
+        # dog_id -> failed attempts, and the earliest retry (monotonic seconds)
+        self._failures: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self.marked = 0
+        self.rescored = 0
+        self.batches = 0
+        self.levels_changed = 0
+        self.errors = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def mark_dirty(self, dog_id: str) -> None:
+        """Schedule a dog for rescoring after its records or profile changed."""
+        if not self.running:
+            self.rescore([dog_id])
+            return
+        now = time.monotonic()
+        with self._wakeup:
+            self.marked += 1
+            first, _ = self._dirty.get(dog_id, (now, now))
+            self._dirty[dog_id] = (first, now)
+            # Existing deadlines are never later than a new one, so the
+            # worker only needs waking when it is idle
+            if len(self._dirty) == 1:
+                self._wakeup.notify()
+
+    def _due(self, now: float) -> Tuple[List[str], Optional[float]]:
+        """Dirty dogs due for rescoring (removed), and seconds until the next is due."""
+        due: List[str] = []
+        next_due: Optional[float] = None
+        for dog_id, (first, last) in self._dirty.items():
+            deadline = max(
+                min(last + self._debounce, first + self._max_delay),
+                self._retry_at.get(dog_id, 0.0)
+            )
+            if deadline <= now and len(due) < self._batch_size:
+                due.append(dog_id)
+            else:
+                wait = max(deadline - now, 0.0)
+                next_due = wait if next_due is None else min(next_due, wait)
+        for dog_id in due:
+            del self._dirty[dog_id]
+            self._retry_at.pop(dog_id, None)
+        return due, next_due
+
+    def _retry(self, dog_ids: List[str]) -> None:
+        """Mark a failed batch dirty again, backing off per dog."""
+        now = time.monotonic()
+        with self._wakeup:
+            for dog_id in dog_ids:
+                attempts = self._failures.get(dog_id, 0) + 1
+                if attempts >= self._max_attempts:
+                    self._failures.pop(dog_id, None)
+                    self.dropped += 1
+                    logger.error("Giving up rescoring dog %s after %d attempts", dog_id, attempts)
+                    continue
+                self._failures[dog_id] = attempts
+                first, last = self._dirty.get(dog_id, (now, now))
+                self._dirty[dog_id] = (first, last)
+                delay = min(self._retry_base * 2 ** (attempts - 1), self._retry_max)
+                self._retry_at[dog_id] = now + delay
+
+    def rescore(self, dog_ids: List[str]) -> int:
+        """Rescore dogs now and apply the results. Returns the number of level changes."""
+        repo = get_repository()
+        dogs = repo.get_dogs(dog_ids)
+        for dog_id in dog_ids:
+            if dog_id not in dogs:
+                review_queue.remove_dog(dog_id)
+        if not dogs:
+            return 0
+        batch_dogs = list(dogs.values())
+        record_index.preload([d.id for d in batch_dogs])
+        records = [record_index.verification_records(d.id) for d in batch_dogs]
+        changed = apply_batch(score_batch(batch_dogs, records), "Records changed")
+        self.rescored += len(batch_dogs)
+        self.batches += 1
+        self.levels_changed += changed
+        return changed
+
+    def get_scores(self, dog_id: str) -> Optional[InternalVerificationScores]:
+        """Stored scores for a dog, computing them first if it was never scored."""
+        repo = get_repository()
+        scores = repo.get_internal_scores(dog_id)
+        if scores is None:
+            self.rescore([dog_id])
+            scores = repo.get_internal_scores(dog_id)
+        return scores
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="rescore-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Rescore everything still dirty, then stop the worker."""
+        if self._thread is None:
+            return
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            with self._wakeup:
+                if self._stopping:
+                    # Flush regardless of the debounce window
+                    due, next_due = self._due(float("inf"))
+                    if not due:
+                        return
+                else:
+                    due, next_due = self._due(time.monotonic())
+                    if not due:
+                        self._wakeup.wait(next_due)
+                        continue
+            try:
+                self.rescore(due)
+            except Exception:
+                self.errors += 1
+                logger.exception("Rescoring %d dogs failed", len(due))
+                self._retry(due)
+                continue
+            if self._failures:
+                with self._wakeup:
+                    for dog_id in due:
+                        self._failures.pop(dog_id, None)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self.running,
+            "dirty": len(self._dirty),
+            "marked": self.marked,
+            "rescored": self.rescored,
+            "batches": self.batches,
+            "levels_changed": self.levels_changed,
+            "errors": self.errors,
+            "retrying": len(self._failures),
+            "dropped": self.dropped,
+            "debounce_seconds": self._debounce,
+        }
+
+
+# Process-wide scheduler
+rescore_scheduler = RescoreScheduler()
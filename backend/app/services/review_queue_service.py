@@ -0,0 +1,307 @@
+"""
+Review Queue Service
+
+Materialized admin views, refreshed per dog whenever a dog or one of its
+records changes (never by rescoring the whole population per request):
+- Review queue: dogs requiring human review, ordered by severity
+  (fraud flags first, then lowest service eligibility score, then longest
+  waiting). Kept as a sorted list of priorities, so pages are a bisect on
+  the cursor and a slice. Trade-off: an update is an O(log n) search plus
+  an O(n) list insert/delete (a memmove, microseconds at 100k entries),
+  where a heap would make updates O(log n) but every page a sort.
+- Fraud flags: dogs with fraud or consistency flags, ordered by dog_id.
+
+The views are per process. Writes by other workers are picked up on
+read: at most every REVIEW_QUEUE_SYNC_SECONDS the repository's dog, score
+and document change feeds are checked, and changed dogs (and dogs sharing
+their microchip) are re-applied from their stored internal scores.
+
+INTERNAL ONLY - never exposed to businesses or public APIs.
+"""
+import base64
+import json
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..core.config import REVIEW_QUEUE_SYNC_SECONDS
+from ..core.database import get_repository
+from ..core.repository import DOCUMENT_CHANGES, DOG_CHANGES, SCORE_CHANGES
+from ..models.dog import Dog
+from ..models.verification import InternalVerificationScores
+from .document_flags import dog_document_flags
+from .fraud_detection_service import FraudDetectionService
+from .photo_hash_index import photo_hash_index
+from .record_index import record_index
+from .verification_engine import VerificationEngine
+
+# (fraud rank, service eligibility score, enqueued at, dog_id) - lower is more urgent
+Priority = Tuple[int, float, float, str]
+
+# Repository change feeds that affect a dog's entry and flags
+_SYNC_FEEDS = (DOG_CHANGES, SCORE_CHANGES, DOCUMENT_CHANGES)
+
+
+class ReviewEntry:
+    """A dog waiting for human review."""
+
+    __slots__ = ("dog_id", "dog_name", "priority", "enqueued_at", "scores", "fraud_flags")
+
+    def __init__(
+        self,
+        dog: Dog,
+        scores: InternalVerificationScores,
+        fraud_flags: List[str],
+        enqueued_at: datetime
+    ):
+        self.dog_id = dog.id
+        self.dog_name = dog.name
+        self.scores = scores
+        self.fraud_flags = fraud_flags
+        self.enqueued_at = enqueued_at
+        self.priority: Priority = (
+            0 if fraud_flags else 1,
+            scores.service_eligibility_score,
+            enqueued_at.timestamp(),
+            dog.id,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "dog_id": self.dog_id,
+            "dog_name": self.dog_name,
+            "review_reason": self.scores.review_reason,
+            "fraud_flags": self.fraud_flags,
+            "mismatch_flags": self.scores.mismatch_flags,
+            "service_eligibility_score": self.scores.service_eligibility_score,
+            "training_evidence_score": self.scores.training_evidence_score,
+            "enqueued_at": self.enqueued_at,
+        }
+
+
+def _encode_cursor(value: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Any:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class ReviewQueue:
+    """Incrementally maintained review queue and fraud flag views."""
+
+    def __init__(self, sync_interval: float = REVIEW_QUEUE_SYNC_SECONDS):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, ReviewEntry] = {}
+        self._order: List[Priority] = []  # sorted, for cursor pagination
+        self._fraud_flags: Dict[str, List[str]] = {}
+        self._flagged_ids: List[str] = []  # sorted, for cursor pagination
+        # dog_id -> microchip its flags were last computed with
+        self._microchips: Dict[str, str] = {}
+        self._sync_lock = threading.Lock()
+        self._sync_interval = sync_interval
+        self._seqs: Dict[str, int] = {}  # feed -> change seq last synced
+        self._next_sync = 0.0
+
+    def __len__(self) -> int:
+        self._sync()
+        return len(self._entries)
+
+    def _sync(self) -> None:
+        """Re-apply dogs saved by any worker since the last check."""
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        with self._sync_lock:
+            if now < self._next_sync:
+                return
+            repo = get_repository()
+            changed: Set[str] = set()
+            for feed in _SYNC_FEEDS:
+                seq, keys = repo.changes_since(feed, self._seqs.get(feed))
+                if feed in self._seqs:
+                    changed.update(keys)
+                self._seqs[feed] = seq
+            self._next_sync = now + self._sync_interval
+            if changed:
+                self.reload_dogs(changed)
+
+    def reload_dogs(self, dog_ids: Iterable[str]) -> None:
+        """
+        Re-apply dogs from their stored internal scores (computed if never
+        stored), along with every dog sharing their old or new microchip.
+        """
+        repo = get_repository()
+        dog_ids = set(dog_ids)
+        dogs = repo.get_dogs(sorted(dog_ids))
+        affected = set(dog_ids)
+        for dog_id in dog_ids:
+            affected.update(self._microchip_peers(dogs.get(dog_id), dog_id))
+        for dog_id in sorted(affected):
+            dog = dogs.get(dog_id) or repo.get_dog(dog_id)
+            if dog is None:
+                self.remove_dog(dog_id)
+                continue
+            scores = repo.get_internal_scores(dog_id)
+            if scores is None:
+                self.refresh_dog(dog_id)
+            else:
+                self.apply_scores(dog, scores)
+
+    def refresh_microchip_peers(self, dog: Dog) -> None:
+        """Re-apply the other dogs sharing a saved dog's old or new microchip."""
+        self.reload_dogs(self._microchip_peers(dog, dog.id))
+
+    def _microchip_peers(self, dog: Optional[Dog], dog_id: str) -> Set[str]:
+        microchips = {self._microchips.get(dog_id), dog.microchip if dog else None}
+        repo = get_repository()
+        return {
+            peer.id
+            for microchip in microchips if microchip
+            for peer in repo.find_dogs_by_microchip(microchip)
+            if peer.id != dog_id
+        }
+
+    def refresh_dog(self, dog_id: str) -> None:
+        """Recompute one dog's scores and update both views."""
+        repo = get_repository()
+        dog = repo.get_dog(dog_id)
+        if dog is None:
+            self.remove_dog(dog_id)
+            return
+
+        scores = VerificationEngine.compute_internal_scores(
+            dog, record_index.verification_records(dog_id), record_index.evidence(dog_id)
+        )
+        self.apply_scores(dog, scores)
+
+    def apply_scores(self, dog: Dog, scores: InternalVerificationScores) -> None:
+        """Update both views from freshly computed scores."""
+        same_chip = (
+            get_repository().find_dogs_by_microchip(dog.microchip)
+            if dog.microchip else []
+        )
+        fraud_flags = scores.fraud_flags + FraudDetectionService.check_dog_consistency(
+            dog, same_chip, photo_hash_index.matches_for_dog(dog.id)
+        )
+        fraud_flags += [f for f in dog_document_flags(dog.id) if f not in fraud_flags]
+
+        with self._lock:
+            self._set_fraud_flags(dog.id, fraud_flags)
+            if dog.microchip:
+                self._microchips[dog.id] = dog.microchip
+            else:
+                self._microchips.pop(dog.id, None)
+
+            current = self._entries.get(dog.id)
+            if not (scores.requires_human_review or fraud_flags):
+                if current is not None:
+                    del self._entries[dog.id]
+                    self._unorder(current.priority)
+                return
+
+            # Age in queue is kept across refreshes
+            enqueued_at = current.enqueued_at if current else datetime.now()
+            entry = ReviewEntry(dog, scores, fraud_flags, enqueued_at)
+            self._entries[dog.id] = entry
+            if current is None or current.priority != entry.priority:
+                if current is not None:
+                    self._unorder(current.priority)
+                insort(self._order, entry.priority)
+
+    def remove_dog(self, dog_id: str) -> None:
+        with self._lock:
+            current = self._entries.pop(dog_id, None)
+            if current is not None:
+                self._unorder(current.priority)
+            self._set_fraud_flags(dog_id, [])
+            self._microchips.pop(dog_id, None)
+
+    def _unorder(self, priority: Priority) -> None:
+        del self._order[bisect_left(self._order, priority)]
+
+    def _set_fraud_flags(self, dog_id: str, flags: List[str]) -> None:
+        had_flags = dog_id in self._fraud_flags
+        if flags:
+            self._fraud_flags[dog_id] = flags
+            if not had_flags:
+                insort(self._flagged_ids, dog_id)
+        elif had_flags:
+            del self._fraud_flags[dog_id]
+            i = bisect_right(self._flagged_ids, dog_id) - 1
+            del self._flagged_ids[i]
+
+    def peek(self) -> Optional[ReviewEntry]:
+        """Most urgent entry."""
+        self._sync()
+        with self._lock:
+            return self._entries[self._order[0][3]] if self._order else None
+
+    def page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[ReviewEntry], Optional[str]]:
+        """Entries in priority order after the cursor, and the next cursor."""
+        after = None
+        if cursor:
+            decoded = _decode_cursor(cursor)
+            if not (
+                isinstance(decoded, list) and len(decoded) == 4
+                and isinstance(decoded[0], int)
+                and all(isinstance(v, (int, float)) for v in decoded[1:3])
+                and isinstance(decoded[3], str)
+            ):
+                raise ValueError("Invalid cursor")
+            after = tuple(decoded)
+        self._sync()
+        with self._lock:
+            start = bisect_right(self._order, after) if after is not None else 0
+            entries = [
+                self._entries[priority[3]]
+                for priority in self._order[start:start + limit]
+            ]
+        next_cursor = (
+            _encode_cursor(list(entries[-1].priority))
+            if len(entries) == limit else None
+        )
+        return entries, next_cursor
+
+    def fraud_flag_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Flagged dogs ordered by dog_id after the cursor, and the next cursor."""
+        after = _decode_cursor(cursor) if cursor else None
+        if after is not None and not isinstance(after, str):
+            raise ValueError("Invalid cursor")
+        self._sync()
+        with self._lock:
+            start = bisect_right(self._flagged_ids, after) if after is not None else 0
+            ids = self._flagged_ids[start:start + limit]
+            items = [
+                {"dog_id": dog_id, "fraud_flags": self._fraud_flags[dog_id]}
+                for dog_id in ids
+            ]
+        next_cursor = _encode_cursor(ids[-1]) if len(ids) == limit else None
+        return items, next_cursor
+
+    def fraud_flag_count(self) -> int:
+        self._sync()
+        return len(self._flagged_ids)
+
+    def rebuild(self) -> None:
+        """Populate both views from every dog (startup)."""
+        self._sync()  # later writes by other workers are picked up from here
+        for dog in get_repository().list_dogs():
+            self.refresh_dog(dog.id)
+
+
+# Process-wide views
+review_queue = ReviewQueue()
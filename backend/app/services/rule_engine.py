@@ -0,0 +1,552 @@
+"""
+Verification Rule Engine
+
+Verification rules are declared in a JSON rule set (rules/verification_rules.json)
+instead of being hard-coded in each service:
+- Each decision (verification_level, legacy_verified, training_verified,
+  vet_verified, public_access_test_passed) is an ordered decision table;
+  the first row whose condition holds gives the result.
+- Conditions test a dog's evidence summary ({"evidence": key, "flag": flag})
+  and, for the verification level, its internal scores. They combine with
+  "all", "any" and "not".
+- Overrides replace decision tables per service role, per jurisdiction, or
+  both (most specific wins).
+
+Rule sets are compiled once per load: evidence conditions become bitmask
+tests over EvidenceSummary.mask (all-of and any-of over single bits fold
+into one mask test), and every (decision, role, jurisdiction) table is
+resolved up front. The same compiled predicates evaluate column-wise for
+batch scoring.
+
+The file is re-read when its modification time changes (checked at most
+every RULES_RELOAD_CHECK_SECONDS), so every worker picks up edits without
+a restart. An invalid file is rejected and the previous rules stay active.
+Per-rule hit counts and full evaluation traces are available for the admin
+portal.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import VERIFICATION_RULES_PATH, RULES_RELOAD_CHECK_SECONDS
+from ..models.document import DocumentType, WalletCategory
+from ..models.dog import Dog
+from ..models.verification import InternalVerificationScores, ServiceRole, VerificationLevel
+from .evidence_summary import LEGACY_CATEGORIES, EvidenceFlag, evidence_mask
+from .public_status_cache import public_status_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _boolean(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise ValueError(value)
+    return value
+
+
+# Decision name -> result parser
+DECISIONS: Dict[str, Callable[[Any], Any]] = {
+    "verification_level": VerificationLevel,
+    "legacy_verified": _boolean,
+    "training_verified": _boolean,
+    "vet_verified": _boolean,
+    "public_access_test_passed": _boolean,
+}
+
+# Decisions evaluated with internal scores; the others only see evidence
+SCORED_DECISIONS = frozenset({"verification_level"})
+
+# Score condition name -> InternalVerificationScores attribute
+_SCORES = {
+    "service_eligibility": "service_eligibility_score",
+    "training_evidence": "training_evidence_score",
+    "health_completeness": "health_completeness_score",
+    "task_breed_compatibility": "task_breed_compatibility_score",
+}
+
+
+class RuleError(ValueError):
+    """Invalid rule set."""
+
+
+class RuleColumns:
+    """Column-wise inputs for batch evaluation (see batch_scoring)."""
+
+    size: int
+
+    def bit(self, bit: int) -> np.ndarray: ...
+
+    def score(self, name: str) -> np.ndarray: ...
+
+    def requires_review(self) -> np.ndarray: ...
+
+
+# Compiled predicates
+
+class _Predicate:
+    __slots__ = ()
+
+    def test(self, mask: int, scores: Optional[InternalVerificationScores]) -> bool:
+        raise NotImplementedError
+
+    def columns(self, cols: RuleColumns) -> np.ndarray:
+        raise NotImplementedError
+
+
+def _bits(mask: int) -> List[int]:
+    bits = []
+    while mask:
+        low = mask & -mask
+        bits.append(low.bit_length() - 1)
+        mask ^= low
+    return bits
+
+
+class _AnyBits(_Predicate):
+    __slots__ = ("mask",)
+
+    def __init__(self, mask: int):
+        self.mask = mask
+
+    def test(self, mask, scores):
+        return bool(mask & self.mask)
+
+    def columns(self, cols):
+        return np.logical_or.reduce([cols.bit(b) for b in _bits(self.mask)])
+
+
+class _AllBits(_Predicate):
+    __slots__ = ("mask",)
+
+    def __init__(self, mask: int):
+        self.mask = mask
+
+    def test(self, mask, scores):
+        return mask & self.mask == self.mask
+
+    def columns(self, cols):
+        return np.logical_and.reduce([cols.bit(b) for b in _bits(self.mask)])
+
+
+class _Not(_Predicate):
+    __slots__ = ("inner",)
+
+    def __init__(self, inner: _Predicate):
+        self.inner = inner
+
+    def test(self, mask, scores):
+        return not self.inner.test(mask, scores)
+
+    def columns(self, cols):
+        return ~self.inner.columns(cols)
+
+
+class _All(_Predicate):
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: List[_Predicate]):
+        self.parts = parts
+
+    def test(self, mask, scores):
+        return all(p.test(mask, scores) for p in self.parts)
+
+    def columns(self, cols):
+        return np.logical_and.reduce([p.columns(cols) for p in self.parts])
+
+
+class _Any(_Predicate):
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: List[_Predicate]):
+        self.parts = parts
+
+    def test(self, mask, scores):
+        return any(p.test(mask, scores) for p in self.parts)
+
+    def columns(self, cols):
+        return np.logical_or.reduce([p.columns(cols) for p in self.parts])
+
+
+class _ScoreAtLeast(_Predicate):
+    __slots__ = ("name", "minimum")
+
+    def __init__(self, name: str, minimum: float):
+        self.name = name
+        self.minimum = minimum
+
+    def test(self, mask, scores):
+        if scores is None:
+            raise ValueError("Rule needs internal scores")
+        return getattr(scores, _SCORES[self.name]) >= self.minimum
+
+    def columns(self, cols):
+        return cols.score(self.name) >= self.minimum
+
+
+class _RequiresReview(_Predicate):
+    __slots__ = ("value",)
+
+    def __init__(self, value: bool):
+        self.value = value
+
+    def test(self, mask, scores):
+        if scores is None:
+            raise ValueError("Rule needs internal scores")
+        return scores.requires_human_review == self.value
+
+    def columns(self, cols):
+        return cols.requires_review() == self.value
+
+
+# Compilation
+
+def _evidence_keys(name: str) -> List[Any]:
+    if name == "document_type:*":
+        return list(DocumentType)
+    kind, _, value = name.rpartition(":")
+    if kind in ("", "document_type") and value in DocumentType._value2member_map_:
+        return [DocumentType(value)]
+    if kind in ("", "wallet_category") and value in WalletCategory._value2member_map_:
+        return [WalletCategory(value)]
+    if kind in ("", "legacy") and value in LEGACY_CATEGORIES:
+        return [value]
+    raise RuleError(f"Unknown evidence key: {name}")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _compile(condition: Any, scored: bool) -> _Predicate:
+    """Compile a condition; `scored` allows score and requires_review tests."""
+    if not isinstance(condition, dict) or len(condition) == 0:
+        raise RuleError(f"Invalid condition: {condition!r}")
+
+    if "evidence" in condition:
+        names = condition["evidence"]
+        names = [names] if isinstance(names, str) else names
+        if not isinstance(names, list) or not names or not all(isinstance(n, str) for n in names):
+            raise RuleError(f"Invalid evidence keys: {condition['evidence']!r}")
+        flag_name = condition.get("flag", "active")
+        if not isinstance(flag_name, str) or flag_name.upper() not in EvidenceFlag.__members__:
+            raise RuleError(f"Unknown evidence flag: {flag_name!r}")
+        keys = [key for name in names for key in _evidence_keys(name)]
+        return _AnyBits(evidence_mask(keys, EvidenceFlag[flag_name.upper()]))
+
+    if "score" in condition or "requires_review" in condition:
+        if not scored:
+            raise RuleError(f"Condition needs internal scores, which this decision does not have: {condition!r}")
+        if "score" in condition:
+            if condition["score"] not in _SCORES or not _is_number(condition.get("min")):
+                raise RuleError(f"Invalid score condition: {condition!r}")
+            return _ScoreAtLeast(condition["score"], float(condition["min"]))
+        if not isinstance(condition["requires_review"], bool):
+            raise RuleError(f"requires_review must be true or false: {condition!r}")
+        return _RequiresReview(condition["requires_review"])
+
+    if "not" in condition:
+        return _Not(_compile(condition["not"], scored))
+
+    for combinator, bits_class, combined_class in (
+        ("all", _AllBits, _All),
+        ("any", _AnyBits, _Any),
+    ):
+        if combinator not in condition:
+            continue
+        if not isinstance(condition[combinator], list):
+            raise RuleError(f"'{combinator}' needs a list of conditions")
+        parts = [_compile(c, scored) for c in condition[combinator]]
+        if not parts:
+            raise RuleError(f"Empty '{combinator}' condition")
+        # Fold single-bit tests (and same-kind masks) into one mask test
+        folded = 0
+        rest: List[_Predicate] = []
+        for part in parts:
+            single = isinstance(part, (_AnyBits, _AllBits)) and len(_bits(part.mask)) == 1
+            if single or isinstance(part, bits_class):
+                folded |= part.mask
+            else:
+                rest.append(part)
+        if folded:
+            rest.insert(0, bits_class(folded))
+        return rest[0] if len(rest) == 1 else combined_class(rest)
+
+    raise RuleError(f"Invalid condition: {condition!r}")
+
+
+class DecisionTable:
+    """Ordered (rule id, predicate, result) rows; the first match wins."""
+
+    __slots__ = ("name", "rows")
+
+    def __init__(self, name: str, rows: List[Tuple[str, Optional[_Predicate], Any]]):
+        self.name = name
+        self.rows = rows
+
+    @classmethod
+    def compile(cls, name: str, rows: Any) -> "DecisionTable":
+        parse = DECISIONS[name]
+        if not isinstance(rows, list) or not rows:
+            raise RuleError(f"Decision {name} has no rules")
+        compiled = []
+        for row in rows:
+            if not isinstance(row, dict) or not isinstance(row.get("id"), str) or "result" not in row:
+                raise RuleError(f"Decision {name}: every rule needs an id and a result")
+            try:
+                result = parse(row["result"])
+            except (TypeError, ValueError):
+                raise RuleError(f"Decision {name}: invalid result {row['result']!r}") from None
+            scored = name in SCORED_DECISIONS
+            predicate = _compile(row["when"], scored) if "when" in row else None
+            compiled.append((row["id"], predicate, result))
+        if compiled[-1][1] is not None:
+            raise RuleError(f"Decision {name}: the last rule must have no condition")
+        return cls(name, compiled)
+
+    def decide(
+        self,
+        mask: int,
+        scores: Optional[InternalVerificationScores] = None
+    ) -> Tuple[Any, str]:
+        """(result, rule id) of the first matching rule."""
+        for rule_id, predicate, result in self.rows:
+            if predicate is None or predicate.test(mask, scores):
+                return result, rule_id
+        raise AssertionError("unreachable: the last rule always matches")
+
+    def trace(
+        self,
+        mask: int,
+        scores: Optional[InternalVerificationScores] = None
+    ) -> Dict[str, Any]:
+        """Evaluate every rule and report which one decided."""
+        rules = []
+        decided = None
+        for rule_id, predicate, result in self.rows:
+            matched = predicate is None or predicate.test(mask, scores)
+            if matched and decided is None:
+                decided = (rule_id, result)
+            rules.append({"rule": rule_id, "matched": matched})
+        return {
+            "result": getattr(decided[1], "value", decided[1]),
+            "decided_by": decided[0],
+            "rules": rules,
+        }
+
+    def decide_columns(self, cols: RuleColumns) -> np.ndarray:
+        """Index of the deciding row for every dog in a batch."""
+        conditions = [p.columns(cols) for _, p, _ in self.rows[:-1]]
+        if not conditions:
+            return np.zeros(cols.size, dtype=np.int64)
+        return np.select(conditions, list(range(len(conditions))), default=len(self.rows) - 1)
+
+
+class CompiledRules:
+    """A compiled rule set: decision tables resolved per (role, jurisdiction)."""
+
+    def __init__(self, source: Dict[str, Any]):
+        if not isinstance(source, dict) or not isinstance(source.get("decisions"), dict):
+            raise RuleError("Rule set needs a 'decisions' object")
+        self.version = str(source.get("version", ""))
+
+        base = source["decisions"]
+        missing = set(DECISIONS) - set(base)
+        if missing:
+            raise RuleError(f"Missing decisions: {', '.join(sorted(missing))}")
+        layers: List[Tuple[Optional[str], Optional[str], Dict[str, Any]]] = [(None, None, base)]
+        jurisdictions = set()
+        overrides = source.get("overrides", [])
+        if not isinstance(overrides, list):
+            raise RuleError("'overrides' must be a list")
+        for override in overrides:
+            if not isinstance(override, dict) or not isinstance(override.get("decisions", {}), dict):
+                raise RuleError(f"Invalid override: {override!r}")
+            role = override.get("service_role")
+            if role is not None and role not in ServiceRole._value2member_map_:
+                raise RuleError(f"Unknown service role: {role!r}")
+            jurisdiction = override.get("jurisdiction")
+            if jurisdiction is not None:
+                if not isinstance(jurisdiction, str):
+                    raise RuleError(f"Invalid jurisdiction: {jurisdiction!r}")
+                jurisdictions.add(jurisdiction)
+            layers.append((role, jurisdiction, override.get("decisions", {})))
+        unknown = {name for _, _, decisions in layers for name in decisions} - set(DECISIONS)
+        if unknown:
+            raise RuleError(f"Unknown decisions: {', '.join(sorted(unknown))}")
+
+        # Compile each declared table once, then resolve every combination
+        compiled: Dict[Tuple[str, Optional[str], Optional[str]], DecisionTable] = {}
+        for role, jurisdiction, decisions in layers:
+            for name, rows in decisions.items():
+                compiled[(name, role, jurisdiction)] = DecisionTable.compile(name, rows)
+
+        def specificity(role, jurisdiction):
+            return (jurisdiction is not None, role is not None)
+
+        self._tables: Dict[Tuple[str, Optional[str], Optional[str]], DecisionTable] = {}
+        for name in DECISIONS:
+            for role in [None, *(r.value for r in ServiceRole)]:
+                for jurisdiction in [None, *jurisdictions]:
+                    candidates = [
+                        key for key in compiled
+                        if key[0] == name
+                        and key[1] in (None, role)
+                        and key[2] in (None, jurisdiction)
+                    ]
+                    best = max(candidates, key=lambda k: specificity(k[1], k[2]))
+                    self._tables[(name, role, jurisdiction)] = compiled[best]
+        self._jurisdictions = jurisdictions
+
+    def table(
+        self,
+        decision: str,
+        service_role: Optional[ServiceRole] = None,
+        jurisdiction: Optional[str] = None
+    ) -> DecisionTable:
+        if jurisdiction not in self._jurisdictions:
+            jurisdiction = None
+        role = service_role.value if service_role is not None else None
+        return self._tables[(decision, role, jurisdiction)]
+
+    def table_for(self, decision: str, dog: Dog) -> DecisionTable:
+        return self.table(decision, dog.service_role, dog.jurisdiction)
+
+
+def load_rules(path: str) -> CompiledRules:
+    with open(path, encoding="utf-8") as f:
+        try:
+            source = json.load(f)
+        except json.JSONDecodeError as e:
+            raise RuleError(f"Invalid JSON: {e}") from e
+    try:
+        return CompiledRules(source)
+    except RuleError:
+        raise
+    except (TypeError, ValueError, AttributeError, LookupError) as e:
+        # Anything the explicit checks missed still keeps the previous rules
+        raise RuleError(f"Invalid rule set: {type(e).__name__}: {e}") from e
+
+
+class RuleEngine:
+    """Holds the active compiled rule set and reloads it when the file changes."""
+
+    def __init__(
+        self,
+        path: str = VERIFICATION_RULES_PATH,
+        check_interval: float = RULES_RELOAD_CHECK_SECONDS
+    ):
+        self._path = path
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._rules: Optional[CompiledRules] = None
+        self._mtime: Optional[int] = None
+        self._next_check = 0.0
+        self._hits: Counter = Counter()
+
+        self.loaded_at: Optional[datetime] = None
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+
+    def rules(self) -> CompiledRules:
+        """The active rule set, reloading it first if the file changed."""
+        if self._rules is None or time.monotonic() >= self._next_check:
+            self._check()
+        return self._rules
+
+    def _check(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._rules is not None and now < self._next_check:
+                return
+            self._next_check = now + self._check_interval
+            try:
+                mtime = os.stat(self._path).st_mtime_ns
+                if mtime != self._mtime:
+                    self._load(mtime)
+            except (OSError, RuleError) as e:
+                if self._rules is None:
+                    raise
+                self.reload_errors += 1
+                self.last_error = str(e)
+                logger.error("Keeping rule set %s: %s", self._rules.version, e)
+
+    def _load(self, mtime: int) -> CompiledRules:
+        rules = load_rules(self._path)
+        replaced = self._rules is not None
+        self._rules, self._mtime = rules, mtime
+        self._hits = Counter()
+        self.loaded_at = datetime.now()
+        self.last_error = None
+        if replaced:
+            self.reloads += 1
+            # Cached public statuses were decided by the previous rules
+            public_status_cache.clear()
+            logger.info("Loaded rule set %s", rules.version)
+        return rules
+
+    def reload(self) -> CompiledRules:
+        """Re-read the rule file now. Raises RuleError (or OSError) if it is invalid."""
+        with self._lock:
+            self._next_check = time.monotonic() + self._check_interval
+            try:
+                return self._load(os.stat(self._path).st_mtime_ns)
+            except (OSError, RuleError) as e:
+                self.reload_errors += 1
+                self.last_error = str(e)
+                raise
+
+    def decide(
+        self,
+        decision: str,
+        dog: Dog,
+        mask: int,
+        scores: Optional[InternalVerificationScores] = None
+    ) -> Any:
+        """Result of a decision for a dog's evidence mask (and scores)."""
+        result, rule_id = self.rules().table_for(decision, dog).decide(mask, scores)
+        self._hits[(decision, rule_id)] += 1
+        return result
+
+    def count_hits(self, decision: str, hits: Dict[str, int]) -> None:
+        """Record rule hits decided outside decide() (batch evaluation)."""
+        self._hits.update({(decision, rule_id): n for rule_id, n in hits.items()})
+
+    def trace(
+        self,
+        dog: Dog,
+        mask: int,
+        scores: Optional[InternalVerificationScores] = None
+    ) -> Dict[str, Any]:
+        """Every decision for a dog, with the outcome of each rule."""
+        rules = self.rules()
+        return {
+            name: rules.table_for(name, dog).trace(mask, scores)
+            for name in DECISIONS
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        rules = self.rules()
+        hits: Dict[str, Dict[str, int]] = {}
+        for (decision, rule_id), count in sorted(self._hits.items()):
+            hits.setdefault(decision, {})[rule_id] = count
+        return {
+            "version": rules.version,
+            "path": self._path,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_error": self.last_error,
+            "hits": hits,
+        }
+
+
+# Process-wide engine
+rule_engine = RuleEngine()
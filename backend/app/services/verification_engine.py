@@ -20,8 +20,16 @@ from ..models.verification import (
     VerificationHistory
 )
 from ..models.dog import Dog
-from ..models.document import NormalizedRecord, WalletCategory
+from ..models.document import DocumentType, WalletCategory
 from ..models.breed import BREED_DATABASE
+from .evidence_summary import (
+    EvidenceSummary,
+    ANY_VET_VERIFIED,
+    ANY_ACTIVE_SCREENING,
+    document_types_matching
+)
+from .rule_engine import rule_engine
+from .verification_record import VerificationRecord
 
 
 class VerificationEngine:
@@ -33,16 +41,20 @@ class VerificationEngine:
     @staticmethod
     def compute_internal_scores(
         dog: Dog,
-        records: List[NormalizedRecord]
+        records: List[VerificationRecord],
+        evidence: Optional[EvidenceSummary] = None
     ) -> InternalVerificationScores:
         """
         Compute all internal scores for a dog.
         These scores are used for internal review and verification decisions.
         NEVER exposed to businesses or public APIs.
         """
+        if evidence is None:
+            evidence = EvidenceSummary.from_records(records)
+
         # Service eligibility score
         service_eligibility = VerificationEngine._compute_service_eligibility_score(
-            dog, records
+            dog, records, evidence
         )
         
         # Training evidence score
@@ -50,7 +62,7 @@ class VerificationEngine:
         
         # Health completeness score
         health_score = VerificationEngine._compute_health_completeness_score(
-            dog, records
+            dog, records, evidence
         )
         
         # Task-breed compatibility score (internal flag only)
@@ -94,92 +106,61 @@ class VerificationEngine:
     @staticmethod
     def determine_verification_level(
         dog: Dog,
-        records: List[NormalizedRecord],
-        internal_scores: InternalVerificationScores
+        records: List[VerificationRecord],
+        internal_scores: InternalVerificationScores,
+        evidence: Optional[EvidenceSummary] = None
     ) -> VerificationLevel:
         """
         Determine public-facing verification level based on records and scores.
         This is what businesses see - NO breed-based denials.
+
+        Decided by the "verification_level" rules (rule_engine): by default
+        Yellow for incomplete records, Green until vet and trainer verified,
+        Blue for high scores without pending review.
         """
-        # Yellow: Incomplete records
-        has_vaccination = any(
-            r.wallet_category == WalletCategory.VACCINATIONS
-            and r.is_active
-            for r in records
-        )
-        
-        has_training = any(
-            r.wallet_category == WalletCategory.TRAINING_VERIFICATION
-            and r.is_active
-            for r in records
+        if evidence is None:
+            evidence = EvidenceSummary.from_records(records)
+
+        return rule_engine.decide(
+            "verification_level", dog, evidence.mask, internal_scores
         )
-        
-        if not has_vaccination or not has_training:
-            return VerificationLevel.YELLOW
-        
-        # Green: Complete records, but not verified by vet/trainer
-        vet_verified_records = any(r.vet_verified for r in records)
-        trainer_verified_records = any(r.trainer_verified for r in records)
-        
-        if not vet_verified_records or not trainer_verified_records:
-            return VerificationLevel.GREEN
-        
-        # Blue: Premium verified - vet + trainer verified, high scores
-        if (
-            internal_scores.service_eligibility_score >= 0.8 and
-            internal_scores.training_evidence_score >= 0.8 and
-            internal_scores.health_completeness_score >= 0.8 and
-            not internal_scores.requires_human_review
-        ):
-            return VerificationLevel.BLUE
-        
-        # If scores are good but needs review, stay at Green until reviewed
-        return VerificationLevel.GREEN
     
     @staticmethod
     def _compute_service_eligibility_score(
         dog: Dog,
-        records: List[NormalizedRecord]
+        records: List[VerificationRecord],
+        evidence: Optional[EvidenceSummary] = None
     ) -> float:
         """Score based on completeness of required service dog documentation."""
+        if evidence is None:
+            evidence = EvidenceSummary.from_records(records)
+
         score = 0.0
         
         # Has vaccination records (required)
-        has_rabies = any(
-            r.document_type.value == "rabies_certificate" and r.is_active
-            for r in records
-        )
+        has_rabies = evidence.has(DocumentType.RABIES_CERTIFICATE)
         if has_rabies:
             score += 0.3
         
         # Has training attestation
-        has_training = any(
-            r.document_type.value == "service_task_attestation" and r.is_active
-            for r in records
-        )
+        has_training = evidence.has(DocumentType.SERVICE_TASK_ATTESTATION)
         if has_training:
             score += 0.3
         
         # Has public access test
-        has_pat = any(
-            r.document_type.value == "public_access_test" and r.is_active
-            for r in records
-        )
+        has_pat = evidence.has(DocumentType.PUBLIC_ACCESS_TEST)
         if has_pat:
             score += 0.2
         
         # Has health screenings (breed-appropriate)
-        has_screenings = any(
-            "screening" in r.document_type.value and r.is_active
-            for r in records
-        )
+        has_screenings = evidence.has_any(ANY_ACTIVE_SCREENING)
         if has_screenings:
             score += 0.2
         
         return min(score, 1.0)
     
     @staticmethod
-    def _compute_training_evidence_score(records: List[NormalizedRecord]) -> float:
+    def _compute_training_evidence_score(records: List[VerificationRecord]) -> float:
         """Score based on training documentation quality."""
         training_records = [
             r for r in records
@@ -208,20 +189,18 @@ class VerificationEngine:
     @staticmethod
     def _compute_health_completeness_score(
         dog: Dog,
-        records: List[NormalizedRecord]
+        records: List[VerificationRecord],
+        evidence: Optional[EvidenceSummary] = None
     ) -> float:
         """Score based on health record completeness."""
+        if evidence is None:
+            evidence = EvidenceSummary.from_records(records)
+
         score = 0.0
         
         # Required vaccinations
-        has_rabies = any(
-            r.document_type.value == "rabies_certificate" and r.is_active
-            for r in records
-        )
-        has_dhpp = any(
-            r.document_type.value == "dhpp" and r.is_active
-            for r in records
-        )
+        has_rabies = evidence.has(DocumentType.RABIES_CERTIFICATE)
+        has_dhpp = evidence.has(DocumentType.DHPP)
         
         if has_rabies:
             score += 0.3
@@ -233,16 +212,14 @@ class VerificationEngine:
         if breed_info:
             recommended = breed_info.recommended_screenings
             completed = sum(
-                1 for r in records
-                if any(screening in r.document_type.value for screening in recommended)
-                and r.is_active
+                evidence.count(doc_type)
+                for doc_type in document_types_matching(tuple(recommended))
             )
             if recommended:
                 score += 0.3 * (completed / len(recommended))
         
         # Vet verified records
-        vet_verified_count = sum(1 for r in records if r.vet_verified)
-        if vet_verified_count > 0:
+        if evidence.has_any(ANY_VET_VERIFIED):
             score += 0.2
         
         return min(score, 1.0)
@@ -269,7 +246,7 @@ class VerificationEngine:
     @staticmethod
     def _generate_flags(
         dog: Dog,
-        records: List[NormalizedRecord]
+        records: List[VerificationRecord]
     ) -> tuple[List[str], List[str]]:
         """
         Generate fraud and mismatch flags.
@@ -299,7 +276,8 @@ class VerificationEngine:
             required = breed_info.recommended_screenings[:2]  # Top 2 most important
             for screening in required:
                 has_screening = any(
-                    screening in r.document_type.value and r.is_active
+                    r.active and r.normalized
+                    and screening in r.document_type.value
                     for r in records
                 )
                 if not has_screening:
@@ -0,0 +1,126 @@
+"""
+Verification Record
+
+Compact, schema-independent view of a record for the verification paths
+(evidence summary, scoring, public status).
+Records are stored either as legacy Record or NormalizedRecord; each is
+converted once when it enters the record index (or a bulk read), so
+verification code reads plain slots instead of probing which schema a
+record has. Legacy records leave the normalized-only fields empty.
+"""
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from ..core.repository import AnyRecord
+from ..models.document import DocumentType, NormalizedRecord, WalletCategory
+
+# Legacy Record categories
+LEGACY_CATEGORIES = ("vaccination", "training", "vet_visit", "travel")
+
+
+class VerificationRecord:
+    """A record's verification-relevant fields, resolved once."""
+
+    __slots__ = (
+        "id",
+        "dog_id",
+        "normalized",
+        "category",
+        "document_type",
+        "wallet_category",
+        "active",
+        "expiring_soon",
+        "accepted",
+        "vet_verified",
+        "trainer_verified",
+        "expiry",
+        "record_date",
+        "tasks",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        dog_id: str,
+        normalized: bool,
+        category: str,
+        document_type: Optional[DocumentType],
+        wallet_category: Optional[WalletCategory],
+        active: bool,
+        expiring_soon: bool,
+        accepted: bool,
+        vet_verified: bool,
+        trainer_verified: bool,
+        expiry: Optional[date],
+        record_date: Optional[date],
+        tasks: Tuple[str, ...]
+    ):
+        self.id = id
+        self.dog_id = dog_id
+        self.normalized = normalized
+        self.category = category  # wallet category value or legacy category
+        self.document_type = document_type
+        self.wallet_category = wallet_category
+        # Counts as evidence: NormalizedRecord.is_active / legacy not denied; not expired
+        self.active = active
+        self.expiring_soon = expiring_soon
+        self.accepted = accepted  # legacy analysis_status == "accepted"
+        self.vet_verified = vet_verified
+        self.trainer_verified = trainer_verified
+        self.expiry = expiry
+        self.record_date = record_date
+        self.tasks = tasks  # certified tasks of training records
+
+    def __repr__(self) -> str:
+        return f"VerificationRecord({self.id!r}, dog_id={self.dog_id!r}, category={self.category!r})"
+
+
+def to_verification_record(record: AnyRecord) -> VerificationRecord:
+    """Convert a stored record (either schema)."""
+    if isinstance(record, NormalizedRecord):
+        tasks = ()
+        if record.wallet_category == WalletCategory.TRAINING_VERIFICATION:
+            tasks = tuple(record.extracted_data.get("tasks_certified", ()))
+        return VerificationRecord(
+            id=record.id,
+            dog_id=record.dog_id,
+            normalized=True,
+            category=record.wallet_category.value,
+            document_type=record.document_type,
+            wallet_category=record.wallet_category,
+            active=record.is_active and not record.is_expired,
+            expiring_soon=record.expiring_soon,
+            accepted=False,
+            vet_verified=record.vet_verified,
+            trainer_verified=record.trainer_verified,
+            expiry=record.expiration_date,
+            record_date=record.record_date,
+            tasks=tasks
+        )
+    return VerificationRecord(
+        id=record.id,
+        dog_id=record.dog_id,
+        normalized=False,
+        category=record.category,
+        document_type=None,
+        wallet_category=None,
+        active=record.analysis_status != "denied" and not record.is_expired,
+        expiring_soon=record.expiring_soon,
+        accepted=record.analysis_status == "accepted",
+        vet_verified=False,
+        trainer_verified=False,
+        expiry=record.expires_at,
+        record_date=None,
+        tasks=()
+    )
+
+
+def to_verification_records(records: Iterable[AnyRecord]) -> List[VerificationRecord]:
+    return [to_verification_record(r) for r in records]
+
+
+def record_expiry(record: AnyRecord) -> Optional[date]:
+    """Expiration date of a stored record, if any."""
+    if isinstance(record, NormalizedRecord):
+        return record.expiration_date
+    return record.expires_at
@@ -0,0 +1,89 @@
+"""
+Field extraction throughput on synthetic multi-page certificates.
+
+Run from backend/:
+    python -m benchmarks.field_extraction [--docs 2000] [--pages 6]
+"""
+import argparse
+import random
+import time
+from datetime import date
+from typing import Any, Dict, Tuple
+
+from app.services.field_extractor import field_extractor
+
+_FILLER = (
+    "This certificate is issued in accordance with state regulations. The animal described "
+    "below was examined and found free of signs of infectious disease at the time of exam.\n"
+    "Owner acknowledges receipt of the product information sheet and aftercare instructions.\n"
+)
+_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d.%m.%Y", "%B %d, %Y", "%d %b %Y")
+
+
+def _certificate(rng: random.Random, pages: int) -> Tuple[str, Dict[str, Any]]:
+    """A certificate and the fields it should extract to."""
+    given = date(rng.randint(2019, 2025), rng.randint(1, 12), rng.randint(1, 28))
+    expires = given.replace(year=given.year + 3)
+    fmt = rng.choice(_DATE_FORMATS)
+    expected = {
+        "vaccine_name": rng.choice(["Rabies (Imrab 3)", "DHPP", "Nobivac Canine 1-DAPPv"]),
+        "date_administered": given,
+        "expiration_date": expires,
+        "microchip": str(rng.randint(10 ** 14, 10 ** 15 - 1)),
+        "clinic": rng.choice([
+            "Portland Animal Hospital", "Cedar Vet Clinic", "Hospital for Small Animals"
+        ]),
+        "vet_name": f"Dr. {rng.choice(['Emily Chen', 'Raj Patel'])}",
+        "screening_grade": rng.choice(["Excellent", "Good", "Fair"]),
+        "tasks_certified": ["deep pressure therapy", "medication reminder", "guiding"],
+    }
+    fields = (
+        f"Vaccine: {expected['vaccine_name']}\n"
+        f"Date Administered: {given.strftime(fmt)}\n"
+        f"Expires: {expires.strftime(fmt)}\n"
+        f"Microchip #: {expected['microchip']}\n"
+        f"{rng.choice(['Clinic', 'Practice Name'])}: {expected['clinic']}\n"
+        f"Attending Veterinarian: {expected['vet_name']}, DVM\n"
+        f"OFA Grade: {expected['screening_grade']}\n"
+        f"Tasks certified: deep pressure therapy, medication reminder and guiding\n"
+    )
+    body = [_FILLER * 20 for _ in range(pages)]
+    # Fields land on the last page, so every page is scanned
+    body[-1] += fields
+    return "\f".join(body), expected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    certificates = [_certificate(rng, args.pages) for _ in range(args.docs)]
+    total_bytes = sum(len(d) for d, _ in certificates)
+
+    start = time.perf_counter()
+    results = [field_extractor.extract(document.split("\f")) for document, _ in certificates]
+    elapsed = time.perf_counter() - start
+
+    found = sum(len(r) for r in results)
+    wrong = [
+        (field, result.get(field), value)
+        for result, (_, expected) in zip(results, certificates)
+        for field, value in expected.items()
+        if result.get(field) != value
+    ]
+    if wrong:
+        field, got, want = wrong[0]
+        raise SystemExit(f"{len(wrong)} wrong field values, e.g. {field}: {got!r} != {want!r}")
+
+    print(f"documents:  {args.docs} x {args.pages} pages ({total_bytes / 1e6:.1f} MB)")
+    print(f"fields:     {found / args.docs:.2f} per document")
+    print(f"elapsed:    {elapsed:.3f} s")
+    print(f"throughput: {args.docs / elapsed:,.0f} docs/s, {total_bytes / 1e6 / elapsed:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
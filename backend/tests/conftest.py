@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Local stores go to a scratch directory; config is read at import time
+_scratch = tempfile.mkdtemp(prefix="dog-passport-tests-")
+os.environ.setdefault("DOG_PASSPORT_AUDIT_LOG_DIR", os.path.join(_scratch, "audit_log"))
+os.environ.setdefault("DOG_PASSPORT_BLOB_DIR", os.path.join(_scratch, "blobs"))
+os.environ.setdefault("DOG_PASSPORT_EXTRACTION_CACHE_PATH", os.path.join(_scratch, "extraction_cache.db"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,49 @@
+import io
+import os
+
+from app.core.database import get_repository
+from app.models.document import DocumentStatus
+from app.services.analysis_service import _apply_analysis
+from app.services.document_flags import REUSED_BY_OTHER_DOG, dog_document_flags
+from app.services.document_service import store_upload
+from app.services.review_queue_service import review_queue
+
+
+def _queue_flags(dog_id):
+    items, cursor = review_queue.fraud_flag_page(limit=1000)
+    while cursor is not None:
+        more, cursor = review_queue.fraud_flag_page(cursor, limit=1000)
+        items += more
+    return next((i["fraud_flags"] for i in items if i["dog_id"] == dog_id), [])
+
+
+def _analysis():
+    return {
+        "detected_type": None,
+        "confidence_score": 0.0,
+        "status": DocumentStatus.PROCESSED,
+        "wallet_category": None,
+        "extracted_data": {},
+    }
+
+
+def test_reused_file_flags_both_dogs_in_review_queue():
+    repo = get_repository()
+    content = os.urandom(64)
+    first = store_upload(repo.get_dog("luna"), "rabies.pdf", "application/pdf", io.BytesIO(content))
+    second = store_upload(repo.get_dog("buddy"), "rabies.pdf", "application/pdf", io.BytesIO(content))
+
+    # Visible at upload, before the processing job runs
+    assert second.status == DocumentStatus.UPLOADED
+    assert repo.get_raw_document(second.id).fraud_flags
+    assert REUSED_BY_OTHER_DOG in _queue_flags("luna")
+
+    result = _apply_analysis(second, _analysis())
+
+    assert result["status"] == DocumentStatus.MANUAL_REVIEW
+    stored = repo.get_raw_document(second.id)
+    assert "Document hash matches another dog's document - possible reuse" in stored.fraud_flags
+    assert repo.get_raw_document(first.id).fraud_flags == [REUSED_BY_OTHER_DOG]
+    assert set(stored.fraud_flags) <= set(_queue_flags("buddy"))
+    assert REUSED_BY_OTHER_DOG in _queue_flags("luna")
+    assert REUSED_BY_OTHER_DOG in dog_document_flags("luna")
@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.analysis_service import analyze_record
+from app.services.dog_service import update_dog_verification
+from app.services.record_service import create_record
+
+
+def test_update_dog_verification_applies_legacy_rule():
+    dog = update_dog_verification("buddy")
+    assert dog is not None
+    assert dog.verified is False
+
+    vaccination = create_record("buddy", "rabies.pdf", "vaccination")
+    training = create_record("buddy", "training_log.pdf", "training")
+    analyze_record("buddy", vaccination.id)
+    result = analyze_record("buddy", training.id)
+
+    assert result["verification"]["verified"] is True
+    assert update_dog_verification("buddy").verified is True
+
+
+def test_dog_status_endpoint():
+    with TestClient(app) as client:
+        response = client.get("/dog-status/luna")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["dog"]["id"] == "luna"
+        assert body["dog"]["service_role"] == "mobility"
+        assert body["verified"] is False
+
+        assert client.get("/dog-status/nobody").status_code == 404
@@ -0,0 +1,11 @@
+from app.services.extraction_cache import ExtractionCache
+
+
+def test_overwrite_replaces_stored_bytes(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.db"), max_bytes=10_000)
+    result = {"fields": {"vaccine_name": "Rabies"}}
+    for _ in range(5):
+        cache.put("abc", "v1", result)
+    assert cache._bytes == cache.stats()["bytes"]
+    assert cache.stats()["entries"] == 1
+
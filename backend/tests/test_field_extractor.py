@@ -0,0 +1,18 @@
+from datetime import date
+
+import pytest
+
+from app.services.field_extractor import field_extractor
+
+
+@pytest.mark.parametrize("text, field, value", [
+    ("Clinic: Portland Animal Hospital", "clinic", "Portland Animal Hospital"),
+    ("Clinic: Cedar Vet Clinic\nVaccine: Rabies", "clinic", "Cedar Vet Clinic"),
+    ("Practice Name: Hospital for Small Animals", "clinic", "Hospital for Small Animals"),
+    ("Clinic:\nPortland Animal Hospital\n", "clinic", "Portland Animal Hospital"),
+    ("Vaccine Name: Rabies Vaccine Date Administered: 2024-01-02", "vaccine_name", "Rabies Vaccine"),
+    ("Vaccine: Rabies  Clinic: Cedar Vet", "vaccine_name", "Rabies"),
+    ("Vaccine: Rabies expires 2027-01-02", "expiration_date", date(2027, 1, 2)),
+])
+def test_label_words_inside_values(text, field, value):
+    assert field_extractor.extract(text)[field] == value
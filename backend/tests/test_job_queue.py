@@ -0,0 +1,71 @@
+import time
+from datetime import datetime
+
+from app.core.database import get_repository
+from app.core.job_queue import FAILED, SUCCEEDED, JobQueue, job_queue
+from app.models.document import DocumentStatus, RawDocument
+from app.services import analysis_service
+from app.services.analysis_service import submit_document_processing, submit_record_analysis
+from app.services.record_service import create_record
+
+
+def _wait(queue, job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_validation_errors_are_not_retried():
+    queue = JobQueue(workers=1, retry_base=0.01)
+    failures = []
+
+    def handler(value):
+        raise ValueError(f"bad value {value}")
+
+    queue.register("validate", handler, on_failure=lambda error, value: failures.append(error))
+    queue.start()
+    try:
+        job = _wait(queue, queue.submit("validate", {"value": 1}, tenant_id="t"))
+    finally:
+        queue.stop()
+    assert job.status == FAILED
+    assert job.attempts == 1
+    assert failures == ["ValueError: bad value 1"]
+
+
+def test_record_analysis_job_succeeds():
+    record = create_record("luna", "vet_visit.pdf", "vet_visit")
+    job_queue.start()
+    try:
+        job = _wait(job_queue, submit_record_analysis("luna", record.id, "user-2"))
+    finally:
+        job_queue.stop()
+    assert job.status == SUCCEEDED, job.error
+    assert job.attempts == 1
+    assert job.result["record"]["analysis_status"] == "accepted"
+
+
+def test_document_left_failed_after_last_attempt(monkeypatch):
+    def broken(raw_doc, text=None):
+        raise RuntimeError("OCR backend down")
+
+    monkeypatch.setattr(analysis_service.DocumentAIService, "analyze_content", broken)
+    monkeypatch.setattr(job_queue, "_retry_base", 0.01)
+    repo = get_repository()
+    doc = RawDocument(
+        id="doc-broken", dog_id="luna", handler_id="user-2", filename="rabies.pdf",
+        file_url="blob://sha256/x", file_hash="ff" * 32, file_size=1,
+        mime_type="application/pdf", uploaded_at=datetime.now(), uploaded_by="handler"
+    )
+    repo.save_raw_document(doc)
+    job_queue.start()
+    try:
+        job = _wait(job_queue, submit_document_processing(doc.id, "user-2"))
+    finally:
+        job_queue.stop()
+    assert job.status == FAILED
+    assert job.attempts == job.max_attempts
+    stored = repo.get_raw_document(doc.id)
+    assert stored.status == DocumentStatus.FAILED
+    assert "OCR backend down" in stored.processing_error
@@ -0,0 +1,49 @@
+import pytest
+
+from app.core.database import get_repository
+from app.models.verification import PublicStatusSummary
+from app.services.public_status_cache import PublicStatusCache
+from app.services.record_service import create_record
+
+
+def _summary(dog):
+    return PublicStatusSummary(
+        dog_id=dog.id,
+        dog_name=dog.name,
+        handler_name="Alex",
+        verification_level=dog.verification_level,
+        service_role=dog.service_role,
+        tasks_description="Mobility support",
+        vaccination_status="current",
+        training_verified=True,
+        vet_verified=True,
+        public_access_test_passed=True,
+        behavior_status="calm",
+    )
+
+
+@pytest.fixture
+def other_worker():
+    """A second worker's cache holding luna's and buddy's summaries."""
+    repo = get_repository()
+    cache = PublicStatusCache(sync_interval=0)
+    for dog_id in ("luna", "buddy"):
+        cache.get(dog_id)
+        cache.put(_summary(repo.get_dog(dog_id)))
+    return cache
+
+
+def test_record_saved_elsewhere_invalidates(other_worker):
+    create_record("luna", "rabies.pdf", "vaccination")
+    assert other_worker.get("luna") is None
+    assert other_worker.get("buddy") is not None
+
+
+def test_dog_and_handler_saved_elsewhere_invalidate(other_worker):
+    repo = get_repository()
+    repo.save_dog(repo.get_dog("buddy"))
+    assert other_worker.get("buddy") is None
+    assert other_worker.get("luna") is not None
+
+    repo.save_handler(repo.get_handler(repo.get_dog("luna").handler_id))
+    assert other_worker.get("luna") is None
@@ -0,0 +1,32 @@
+from app.core.database import get_repository
+from app.services.dog_service import save_dog
+from app.services.review_queue_service import ReviewQueue, review_queue
+
+
+def _flags(queue, dog_id):
+    items, _ = queue.fraud_flag_page(limit=1000)
+    return next((i["fraud_flags"] for i in items if i["dog_id"] == dog_id), [])
+
+
+def test_other_worker_sees_saved_microchip():
+    repo = get_repository()
+    other_worker = ReviewQueue(sync_interval=0)
+    other_worker.rebuild()
+    luna = repo.get_dog("luna").model_copy(update={"microchip": "985112004455660"})
+    copy = luna.model_copy(update={"id": "luna-copy", "name": "Luna II"})
+    # Saved directly: nothing tells other_worker except the change feed
+    repo.save_dog(luna)
+    repo.save_dog(copy)
+
+    assert any("used by multiple dogs" in f for f in _flags(other_worker, "luna-copy"))
+    assert any("used by multiple dogs" in f for f in _flags(other_worker, "luna"))
+
+
+def test_saving_duplicate_microchip_refreshes_existing_owner():
+    repo = get_repository()
+    buddy = repo.get_dog("buddy").model_copy(update={"microchip": "985112004455661"})
+    save_dog(buddy)
+    assert not any("used by multiple dogs" in f for f in _flags(review_queue, "buddy"))
+
+    save_dog(buddy.model_copy(update={"id": "buddy-copy", "name": "Buddy II"}))
+    assert any("used by multiple dogs" in f for f in _flags(review_queue, "buddy"))